@@ -0,0 +1,4 @@
+"""
+Benchmark suite for the RAG Presentation Narrator
+"""
+
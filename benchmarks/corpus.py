@@ -0,0 +1,181 @@
+"""
+Synthetic Presentation Corpus Generator
+Writes deterministic PDF and PPTX decks of configurable size for benchmarking.
+"""
+
+from typing import Dict, List
+from dataclasses import dataclass, asdict
+from pathlib import Path
+import random
+
+
+TOPICS = {
+    "machine_learning": ["gradient", "descent", "loss", "model", "training", "overfitting", "regularization",
+                         "feature", "validation", "accuracy", "neural", "network", "weights", "bias"],
+    "statistics": ["mean", "variance", "distribution", "sample", "hypothesis", "confidence", "interval",
+                   "regression", "correlation", "probability", "estimate", "population", "significance"],
+    "databases": ["index", "query", "transaction", "table", "schema", "join", "normalization", "replica",
+                  "consistency", "latency", "storage", "partition", "cache", "throughput"],
+}
+FILLER = ["the", "a", "of", "and", "to", "in", "is", "for", "with", "how", "why", "this", "each", "we", "our"]
+
+# Corpus sizes used by run_benchmarks.py --size
+PRESETS = {
+    "small": {"decks": 4, "slides_per_deck": 10, "words_per_slide": 60},
+    "medium": {"decks": 12, "slides_per_deck": 25, "words_per_slide": 90},
+    "large": {"decks": 40, "slides_per_deck": 40, "words_per_slide": 120},
+}
+
+
+@dataclass
+class CorpusSpec:
+    """Size and shape of a synthetic corpus."""
+    decks: int = 4
+    slides_per_deck: int = 10
+    words_per_slide: int = 60
+    pdf_fraction: float = 0.5
+    seed: int = 0
+
+
+def _slide_text(rng: random.Random, topic: str, words: int) -> List[str]:
+    """Title plus bullet lines for one slide."""
+    vocabulary = TOPICS[topic]
+    title = " ".join(rng.sample(vocabulary, 3)).title()
+    lines = []
+    remaining = words
+    while remaining > 0:
+        length = min(remaining, rng.randint(8, 16))
+        lines.append(" ".join(
+            rng.choice(vocabulary) if rng.random() < 0.5 else rng.choice(FILLER) for _ in range(length)
+        ).capitalize() + ".")
+        remaining -= length
+    return [title] + lines
+
+
+def _pdf_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(path: Path, slides: List[List[str]]):
+    """
+    Write a minimal PDF with one text page per slide (no third-party writer needed).
+    
+    Args:
+        path: Output file
+        slides: Lines of text per slide
+    """
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None,
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_ids = []
+    for lines in slides:
+        stream = ["BT", "/F1 14 Tf", "50 740 Td", "18 TL"]
+        stream.extend(f"({_pdf_escape(line)}) Tj T*" for line in lines)
+        stream.append("ET")
+        content = "\n".join(stream).encode("latin-1", "replace")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream")
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % len(objects)
+        )
+        page_ids.append(len(objects))
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids).encode()
+    objects[1] = b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % len(page_ids)
+    
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        output += b"%010d 00000 n \n" % offset
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    path.write_bytes(bytes(output))
+
+
+def write_pptx(path: Path, slides: List[List[str]]):
+    """
+    Write a PPTX deck with a title and bullet body per slide.
+    
+    Args:
+        path: Output file
+        slides: Lines of text per slide (first line is the title)
+    """
+    from pptx import Presentation
+    
+    prs = Presentation()
+    layout = prs.slide_layouts[1]
+    for lines in slides:
+        slide = prs.slides.add_slide(layout)
+        slide.shapes.title.text = lines[0]
+        body = slide.placeholders[1].text_frame
+        body.text = lines[1] if len(lines) > 1 else ""
+        for line in lines[2:]:
+            body.add_paragraph().text = line
+    prs.save(path)
+
+
+def generate_corpus(output_dir: str, spec: CorpusSpec) -> List[Dict]:
+    """
+    Generate a synthetic corpus.
+    
+    Args:
+        output_dir: Directory to write decks to
+        spec: Corpus size and shape
+        
+    Returns:
+        Metadata entries (id, title, file_path, format, topic, slide_count)
+    """
+    rng = random.Random(spec.seed)
+    output_path = Path(output_dir)
+    output_path.mkdir(parents=True, exist_ok=True)
+    topics = sorted(TOPICS)
+    presentations = []
+    for number in range(spec.decks):
+        topic = topics[number % len(topics)]
+        slides = [_slide_text(rng, topic, spec.words_per_slide) for _ in range(spec.slides_per_deck)]
+        fmt = "pdf" if rng.random() < spec.pdf_fraction else "pptx"
+        deck_id = f"{topic}_{number:03d}"
+        file_path = output_path / f"{deck_id}.{fmt}"
+        (write_pdf if fmt == "pdf" else write_pptx)(file_path, slides)
+        presentations.append({
+            "id": deck_id,
+            "title": deck_id.replace('_', ' ').title(),
+            "file_path": str(file_path),
+            "format": fmt,
+            "topic": topic,
+            "slide_count": len(slides),
+        })
+    return presentations
+
+
+def sample_queries(spec: CorpusSpec, count: int = 50) -> List[str]:
+    """
+    Deterministic queries drawn from the corpus vocabulary.
+    
+    Args:
+        spec: Corpus spec (its seed is reused)
+        count: Number of queries
+        
+    Returns:
+        Query strings
+    """
+    rng = random.Random(spec.seed + 1)
+    queries = []
+    for _ in range(count):
+        vocabulary = TOPICS[rng.choice(sorted(TOPICS))]
+        queries.append("explain " + " ".join(rng.sample(vocabulary, 3)))
+    return queries
+
+
+def spec_from_preset(size: str, **overrides) -> CorpusSpec:
+    """Build a CorpusSpec from a named preset with optional overrides."""
+    values = dict(PRESETS[size])
+    values.update({name: value for name, value in overrides.items() if value is not None})
+    return CorpusSpec(**values)
+
+
+def spec_to_dict(spec: CorpusSpec) -> Dict:
+    return asdict(spec)
+
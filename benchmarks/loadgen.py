@@ -0,0 +1,357 @@
+"""
+HTTP Load Generator
+Drives the narration server with concurrent keep-alive clients and reports throughput and latency percentiles.
+"""
+
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import argparse
+import asyncio
+import json
+import shutil
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from benchmarks.corpus import PRESETS, generate_corpus, sample_queries, spec_from_preset
+from benchmarks.run_benchmarks import latency_stats
+
+
+ENDPOINT_PATHS = {
+    "retrieve": "/retrieve",
+    "narrate": "/narrate",
+    "stream": "/narrate/stream",
+}
+
+
+async def http_request(
+    reader: asyncio.StreamReader,
+    writer: asyncio.StreamWriter,
+    host: str,
+    method: str,
+    path: str,
+    payload: Optional[Dict] = None
+) -> Tuple[int, Dict[str, str], bytes, float]:
+    """
+    Send one request on a keep-alive connection and read the response.
+    
+    Args:
+        reader: Connection reader
+        writer: Connection writer
+        host: Host header value
+        method: HTTP method
+        path: Request path
+        payload: JSON body (None for no body)
+        
+    Returns:
+        (status, headers, body, seconds to the first body byte)
+    """
+    body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+    head = (f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n")
+    start = time.perf_counter()
+    writer.write(head.encode("latin-1") + body)
+    await writer.drain()
+    
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("Server closed the connection")
+    status = int(status_line.split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    
+    first_byte = None
+    if "chunked" in headers.get("transfer-encoding", ""):
+        parts = []
+        while True:
+            size = int((await reader.readline()).strip(), 16)
+            if first_byte is None:
+                first_byte = time.perf_counter() - start
+            if size == 0:
+                await reader.readline()
+                break
+            parts.append(await reader.readexactly(size))
+            await reader.readline()
+        data = b"".join(parts)
+    else:
+        data = await reader.readexactly(int(headers.get("content-length", "0")))
+        first_byte = time.perf_counter() - start
+    return status, headers, data, first_byte
+
+
+class LoadGenerator:
+    """
+    Closed-loop load: each of ``concurrency`` clients sends its next request
+    as soon as the previous one completes, on a persistent connection.
+    
+    With ``rate`` set, requests are instead sent on a fixed schedule and
+    latency is measured from the scheduled send time, so a stalled server
+    is not hidden by clients that stop sending while they wait.
+    """
+    
+    def __init__(
+        self,
+        url: str,
+        queries: List[str],
+        endpoint: str = "narrate",
+        concurrency: int = 16,
+        total_requests: int = 200,
+        duration: Optional[float] = None,
+        rate: Optional[float] = None,
+        k: int = 5
+    ):
+        """
+        Initialize the load generator.
+        
+        Args:
+            url: Server base URL (e.g. http://127.0.0.1:8080)
+            queries: Queries sent in rotation
+            endpoint: retrieve, narrate, stream or mix (all three in rotation)
+            concurrency: Concurrent client connections
+            total_requests: Requests to send (ignored when duration is set)
+            duration: Seconds to run for
+            rate: Target requests per second across all clients (None for closed loop)
+            k: Chunks retrieved per request
+        """
+        parts = urlsplit(url)
+        self.host = parts.hostname or "127.0.0.1"
+        self.port = parts.port or 80
+        self.queries = queries
+        self.endpoint = endpoint
+        self.concurrency = concurrency
+        self.total_requests = total_requests
+        self.duration = duration
+        self.rate = rate
+        self.k = k
+        self._sent = 0
+        self._deadline = 0.0
+        self._start = 0.0
+        self.latencies: Dict[str, List[float]] = {}
+        self.first_byte: List[float] = []
+        self.statuses: Dict[int, int] = {}
+        self.errors: Dict[str, int] = {}
+    
+    def _next(self) -> Optional[Tuple[int, float]]:
+        """Claim the next request number and its scheduled send time, or None when done."""
+        if self.duration is None and self._sent >= self.total_requests:
+            return None
+        if self.duration is not None and time.perf_counter() >= self._deadline:
+            return None
+        number = self._sent
+        self._sent += 1
+        scheduled = self._start + number / self.rate if self.rate else time.perf_counter()
+        return number, scheduled
+    
+    def _endpoint_for(self, number: int) -> str:
+        if self.endpoint == "mix":
+            return ("retrieve", "narrate", "stream")[number % 3]
+        return self.endpoint
+    
+    async def _client(self):
+        reader = writer = None
+        try:
+            while True:
+                claimed = self._next()
+                if claimed is None:
+                    return
+                number, scheduled = claimed
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                
+                endpoint = self._endpoint_for(number)
+                payload = {"query": self.queries[number % len(self.queries)], "k": self.k}
+                try:
+                    if writer is None:
+                        reader, writer = await asyncio.open_connection(self.host, self.port)
+                    sent = time.perf_counter()
+                    status, headers, _, first_byte = await http_request(
+                        reader, writer, self.host, "POST", ENDPOINT_PATHS[endpoint], payload
+                    )
+                except (ConnectionError, asyncio.IncompleteReadError, ValueError) as e:
+                    name = type(e).__name__
+                    self.errors[name] = self.errors.get(name, 0) + 1
+                    if writer is not None:
+                        writer.close()
+                    reader = writer = None
+                    continue
+                
+                done = time.perf_counter()
+                self.statuses[status] = self.statuses.get(status, 0) + 1
+                if status == 200:
+                    self.latencies.setdefault(endpoint, []).append(done - scheduled)
+                    if endpoint == "stream":
+                        self.first_byte.append(first_byte + (sent - scheduled))
+                if headers.get("connection") == "close":
+                    writer.close()
+                    reader = writer = None
+        finally:
+            if writer is not None:
+                writer.close()
+    
+    async def run(self) -> Dict:
+        """
+        Run the load and summarize it.
+        
+        Returns:
+            Report with throughput, status counts, errors and latency percentiles per endpoint
+        """
+        self._start = time.perf_counter()
+        if self.duration is not None:
+            self._deadline = self._start + self.duration
+        await asyncio.gather(*(self._client() for _ in range(self.concurrency)))
+        elapsed = time.perf_counter() - self._start
+        
+        ok = sum(len(samples) for samples in self.latencies.values())
+        report = {
+            "endpoint": self.endpoint,
+            "concurrency": self.concurrency,
+            "rate": self.rate,
+            "requests": sum(self.statuses.values()) + sum(self.errors.values()),
+            "ok": ok,
+            "elapsed_seconds": elapsed,
+            "throughput_rps": ok / elapsed if elapsed else 0.0,
+            "statuses": {str(status): count for status, count in sorted(self.statuses.items())},
+            "errors": dict(self.errors),
+            "latency": {endpoint: latency_stats(samples) for endpoint, samples in self.latencies.items()},
+        }
+        if self.first_byte:
+            report["stream_first_byte"] = latency_stats(self.first_byte)
+        return report
+
+
+def spawn_server(
+    work_dir: str,
+    size: str = "small",
+    llm_latency_ms: float = 400.0,
+    tokens_per_second: float = 50.0,
+    **server_options
+):
+    """
+    Start a server on a synthetic corpus with the simulated LLM, in a background thread.
+    
+    Args:
+        work_dir: Directory for the corpus and caches
+        size: Corpus size preset
+        llm_latency_ms: Median simulated LLM latency (time to first token)
+        tokens_per_second: Simulated streaming rate after the first token
+        **server_options: NarrationServer options (max_concurrency, max_queue, ...)
+        
+    Returns:
+        (server, stop function)
+    """
+    from src.agents.narrative_agent import NarrativeAgent
+    from src.cache.response_cache import ResponseCache
+    from src.pipeline.rag_pipeline import RAGPipeline
+    from src.server.http_server import NarrationServer
+    
+    corpus_dir = Path(work_dir) / "corpus"
+    generate_corpus(str(corpus_dir), spec_from_preset(size))
+    agent = NarrativeAgent(
+        prompt_template=str(project_root / "src/prompts/narrative_template.txt"),
+        llm_provider="simulated",
+        llm_options={"latency_ms": llm_latency_ms, "latency_p95_ms": llm_latency_ms * 2,
+                     "tokens_per_second": tokens_per_second, "seed": 0},
+        cache=ResponseCache(cache_dir=str(Path(work_dir) / "cache"), backend="sqlite")
+    )
+    pipeline = RAGPipeline(documents_path=str(corpus_dir), agent=agent)
+    server = NarrationServer(pipeline, port=0, **server_options)
+    
+    loop = asyncio.new_event_loop()
+    
+    async def main():
+        await server.start()
+        await server.wait_ready()
+    
+    thread = threading.Thread(target=loop.run_forever, name="rag-loadgen-server", daemon=True)
+    thread.start()
+    ready = asyncio.run_coroutine_threadsafe(main(), loop)
+    ready.result()
+    
+    def stop():
+        asyncio.run_coroutine_threadsafe(server.stop(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+    
+    return server, stop
+
+
+def print_report(report: Dict):
+    print("=" * 60)
+    print(f"Load: {report['endpoint']} | {report['concurrency']} clients"
+          + (f" | {report['rate']:.0f} req/s target" if report["rate"] else ""))
+    print("=" * 60)
+    print(f"  Requests:   {report['requests']} ({report['ok']} OK) in {report['elapsed_seconds']:.1f}s")
+    print(f"  Throughput: {report['throughput_rps']:.1f} req/s")
+    print(f"  Statuses:   {', '.join(f'{s}: {c}' for s, c in report['statuses'].items()) or 'none'}")
+    if report["errors"]:
+        print(f"  Errors:     {', '.join(f'{e}: {c}' for e, c in report['errors'].items())}")
+    rows = list(report["latency"].items())
+    if "stream_first_byte" in report:
+        rows.append(("first byte", report["stream_first_byte"]))
+    for name, stats in rows:
+        print(f"  {name:11s} p50 {stats['p50_ms']:8.1f} ms | p95 {stats['p95_ms']:8.1f} ms "
+              f"| p99 {stats['p99_ms']:8.1f} ms | max {stats['max_ms']:8.1f} ms")
+    print("=" * 60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate HTTP load against the narration server")
+    parser.add_argument("--url", help="Server base URL (default: spawn a local server on a synthetic corpus)")
+    parser.add_argument("--endpoint", choices=sorted(ENDPOINT_PATHS) + ["mix"], default="narrate",
+                        help="Endpoint to load")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent client connections")
+    parser.add_argument("--requests", type=int, default=200, help="Total requests")
+    parser.add_argument("--duration", type=float, help="Run for this many seconds instead")
+    parser.add_argument("--rate", type=float, help="Fixed arrival rate in requests per second")
+    parser.add_argument("--k", type=int, default=5, help="Chunks retrieved per request")
+    parser.add_argument("--size", choices=sorted(PRESETS), default="small",
+                        help="Corpus preset for queries (and the spawned server)")
+    parser.add_argument("--llm-latency-ms", type=float, default=400.0, help="Spawned server's simulated LLM latency")
+    parser.add_argument("--llm-tokens-per-second", type=float, default=50.0,
+                        help="Spawned server's simulated streaming rate")
+    parser.add_argument("--server-concurrency", type=int, default=8, help="Spawned server's max_concurrency")
+    parser.add_argument("--server-queue", type=int, default=64, help="Spawned server's max_queue")
+    parser.add_argument("--output", help="Write the report as JSON to this file")
+    args = parser.parse_args()
+    
+    queries = sample_queries(spec_from_preset(args.size), count=max(50, args.concurrency))
+    work_dir = stop = None
+    url = args.url
+    if url is None:
+        work_dir = tempfile.mkdtemp(prefix="rag-loadgen-")
+        server, stop = spawn_server(work_dir, args.size, args.llm_latency_ms, args.llm_tokens_per_second,
+                                    max_concurrency=args.server_concurrency, max_queue=args.server_queue)
+        url = f"http://127.0.0.1:{server.port}"
+        print(f"✓ Spawned server at {url}")
+    
+    try:
+        generator = LoadGenerator(url, queries, args.endpoint, args.concurrency, args.requests,
+                                  args.duration, args.rate, args.k)
+        report = asyncio.run(generator.run())
+    finally:
+        if stop is not None:
+            stop()
+            shutil.rmtree(work_dir, ignore_errors=True)
+    
+    print_report(report)
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+        print(f"✓ Report saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
+
@@ -0,0 +1,322 @@
+"""
+End-to-end Benchmark Suite
+Generates a synthetic corpus, times every pipeline stage and compares results across runs.
+"""
+
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import argparse
+import json
+import platform
+import shutil
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from benchmarks.corpus import CorpusSpec, PRESETS, generate_corpus, sample_queries, spec_from_preset, spec_to_dict
+from src.pipeline.records import DocumentRecord
+from src.utils.document_processor import DocumentProcessor
+
+
+# Metrics compared between runs (lower is better for all of them)
+COMPARED_METRICS = ("total_seconds", "p50_ms", "p95_ms")
+
+
+def latency_stats(samples: List[float]) -> Dict:
+    """
+    Summarize latency samples given in seconds.
+    
+    Args:
+        samples: Latencies in seconds
+        
+    Returns:
+        Dictionary with count, mean_ms, p50_ms, p95_ms, p99_ms and max_ms
+    """
+    ordered = sorted(samples)
+    
+    def percentile(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+    
+    return {
+        "count": len(ordered),
+        "mean_ms": sum(ordered) / len(ordered) * 1000,
+        "p50_ms": percentile(0.50),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+def time_each(fn: Callable, items: List) -> List[float]:
+    """Call fn on every item and return the durations in seconds."""
+    durations = []
+    for item in items:
+        start = time.perf_counter()
+        fn(item)
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+class BenchmarkRunner:
+    """
+    Times extraction, chunking, embedding, index build, retrieval, cache
+    lookups and end-to-end narration on a synthetic corpus.
+    """
+    
+    def __init__(
+        self,
+        spec: CorpusSpec,
+        work_dir: str,
+        query_count: int = 50,
+        llm_latency_ms: float = 0.0,
+        embedding_model: str = "hashing"
+    ):
+        """
+        Initialize the runner.
+        
+        Args:
+            spec: Synthetic corpus spec
+            work_dir: Scratch directory for the corpus and caches
+            query_count: Queries used by retrieval, cache and narrative stages
+            llm_latency_ms: Median simulated LLM latency (0 measures pipeline overhead only)
+            embedding_model: Embedding model name (hashing runs offline)
+        """
+        self.spec = spec
+        self.work_dir = Path(work_dir)
+        self.queries = sample_queries(spec, query_count)
+        self.llm_latency_ms = llm_latency_ms
+        self.embedding_model = embedding_model
+    
+    def run(self) -> Dict:
+        """
+        Run every stage.
+        
+        Returns:
+            Results with run metadata and per-stage measurements
+        """
+        from src.pipeline.embeddings import create_embedder
+        from src.pipeline.rag_pipeline import RAGPipeline
+        
+        stages = {}
+        corpus_dir = self.work_dir / "corpus"
+        presentations = generate_corpus(str(corpus_dir), self.spec)
+        pipeline = RAGPipeline(documents_path=str(corpus_dir), embedder=create_embedder(self.embedding_model))
+        
+        documents = []
+        
+        def extract(presentation: Dict):
+            # Same document shape as RAGPipeline.load_documents, timed per deck
+            documents.append(DocumentRecord(
+                presentation["id"],
+                presentation["title"],
+                presentation["file_path"],
+                DocumentProcessor.extract_slides(Path(presentation["file_path"]))
+            ))
+        
+        per_deck = time_each(extract, presentations)
+        stages["extraction"] = {
+            "total_seconds": sum(per_deck),
+            "slides": sum(len(document["slides"]) for document in documents),
+            **latency_stats(per_deck),
+        }
+        
+        start = time.perf_counter()
+        chunks = pipeline.chunk_documents(documents)
+        stages["chunking"] = {"total_seconds": time.perf_counter() - start, "chunks": len(chunks)}
+        
+        start = time.perf_counter()
+        vectors = pipeline.embed_chunks(chunks)
+        elapsed = time.perf_counter() - start
+        stages["embedding"] = {
+            "total_seconds": elapsed,
+            "chunks_per_second": len(chunks) / elapsed if elapsed else 0.0,
+        }
+        
+        start = time.perf_counter()
+        pipeline.build_index(chunks, vectors)
+        stages["index_build"] = {"total_seconds": time.perf_counter() - start, "vectors": len(chunks)}
+        
+        stages["retrieval"] = latency_stats(time_each(pipeline.retrieve_context, self.queries))
+        stages.update(self._cache_stages())
+        stages.update(self._narrative_stages(pipeline))
+        
+        return {"meta": self._metadata(), "stages": stages}
+    
+    def _cache_stages(self) -> Dict:
+        """Miss, disk-hit and memory-hit lookup latency."""
+        from src.cache.response_cache import ResponseCache
+        
+        cache = ResponseCache(cache_dir=str(self.work_dir / "cache"), backend="sqlite")
+        narrative = "narrative " * 200
+        misses = time_each(lambda q: cache.get(q, "context"), self.queries)
+        for query in self.queries:
+            cache.set(query, "context", narrative)
+        cache.memory_cache.clear()
+        disk_hits = time_each(lambda q: cache.get(q, "context"), self.queries)
+        memory_hits = time_each(lambda q: cache.get(q, "context"), self.queries)
+        return {
+            "cache_miss": latency_stats(misses),
+            "cache_disk_hit": latency_stats(disk_hits),
+            "cache_memory_hit": latency_stats(memory_hits),
+        }
+    
+    def _narrative_stages(self, pipeline) -> Dict:
+        """End-to-end retrieve-and-narrate latency, cold (LLM) and warm (cached)."""
+        from src.agents.narrative_agent import NarrativeAgent
+        from src.cache.response_cache import ResponseCache
+        
+        llm_options = {"realtime": False, "seed": 0}
+        if self.llm_latency_ms:
+            llm_options = {"latency_ms": self.llm_latency_ms, "latency_p95_ms": self.llm_latency_ms * 2,
+                           "tokens_per_second": 1e6, "seed": 0}
+        pipeline.agent = NarrativeAgent(
+            prompt_template=str(project_root / "src/prompts/narrative_template.txt"),
+            llm_provider="simulated",
+            llm_options=llm_options,
+            cache=ResponseCache(cache_dir=str(self.work_dir / "narratives"), backend="sqlite")
+        )
+        cold = time_each(pipeline.generate_narrative, self.queries)
+        warm = time_each(pipeline.generate_narrative, self.queries)
+        return {"narrative_cold": latency_stats(cold), "narrative_warm": latency_stats(warm)}
+    
+    def _metadata(self) -> Dict:
+        try:
+            commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                    text=True, cwd=project_root, timeout=10).stdout.strip() or None
+        except (OSError, subprocess.SubprocessError):
+            commit = None
+        return {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": commit,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "corpus": spec_to_dict(self.spec),
+            "queries": len(self.queries),
+            "llm_latency_ms": self.llm_latency_ms,
+            "embedding_model": self.embedding_model,
+        }
+
+
+def compare(current: Dict, baseline: Dict, threshold: float = 0.10, min_delta_ms: float = 0.05) -> List[Dict]:
+    """
+    Compare two runs stage by stage.
+    
+    Args:
+        current: Results of this run
+        baseline: Results of an earlier run
+        threshold: Relative slowdown flagged as a regression (0.10 = 10%)
+        min_delta_ms: Absolute slowdowns below this are treated as noise
+        
+    Returns:
+        Rows with stage, metric, baseline, current, change and regression
+    """
+    rows = []
+    for stage, metrics in current["stages"].items():
+        previous = baseline["stages"].get(stage, {})
+        for metric in COMPARED_METRICS:
+            if metric not in metrics or not previous.get(metric):
+                continue
+            change = (metrics[metric] - previous[metric]) / previous[metric]
+            delta_ms = metrics[metric] - previous[metric]
+            if metric == "total_seconds":
+                delta_ms *= 1000
+            rows.append({
+                "stage": stage,
+                "metric": metric,
+                "baseline": previous[metric],
+                "current": metrics[metric],
+                "change": change,
+                "regression": change > threshold and delta_ms >= min_delta_ms,
+            })
+    return rows
+
+
+def find_latest_result(results_dir: Path, exclude: Optional[Path] = None) -> Optional[Path]:
+    """Most recent results file in a directory."""
+    candidates = sorted(path for path in results_dir.glob("*.json") if path != exclude)
+    return candidates[-1] if candidates else None
+
+
+def print_results(results: Dict):
+    print("=" * 60)
+    print("Benchmark Results")
+    print("=" * 60)
+    corpus = results["meta"]["corpus"]
+    print(f"Corpus: {corpus['decks']} decks x {corpus['slides_per_deck']} slides "
+          f"({corpus['words_per_slide']} words/slide)")
+    for stage, metrics in results["stages"].items():
+        if "p50_ms" in metrics:
+            print(f"  {stage:18s} p50 {metrics['p50_ms']:9.3f} ms | p95 {metrics['p95_ms']:9.3f} ms "
+                  f"| p99 {metrics['p99_ms']:9.3f} ms")
+        else:
+            print(f"  {stage:18s} total {metrics['total_seconds'] * 1000:9.1f} ms")
+    print("=" * 60)
+
+
+def print_comparison(rows: List[Dict], baseline_path: Path):
+    print(f"Comparison with {baseline_path.name}")
+    for row in rows:
+        marker = "✗" if row["regression"] else "✓"
+        print(f"  {marker} {row['stage']:18s} {row['metric']:13s} "
+              f"{row['baseline']:10.3f} -> {row['current']:10.3f} ({row['change']:+.1%})")
+    print("=" * 60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline on a synthetic corpus")
+    parser.add_argument("--size", choices=sorted(PRESETS), default="small", help="Corpus size preset")
+    parser.add_argument("--decks", type=int, help="Override the number of decks")
+    parser.add_argument("--slides", type=int, help="Override slides per deck")
+    parser.add_argument("--words", type=int, help="Override words per slide")
+    parser.add_argument("--queries", type=int, default=50, help="Queries per latency stage")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0,
+                        help="Median simulated LLM latency (default 0: pipeline overhead only)")
+    parser.add_argument("--output", default="benchmarks/results", help="Directory for results JSON")
+    parser.add_argument("--baseline", default="latest",
+                        help="Results file to compare against ('latest' for the previous run, 'none' to skip)")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative slowdown flagged as regression")
+    parser.add_argument("--min-delta-ms", type=float, default=0.05,
+                        help="Ignore slowdowns smaller than this many milliseconds")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit with status 1 on regressions")
+    args = parser.parse_args()
+    
+    spec = spec_from_preset(args.size, decks=args.decks, slides_per_deck=args.slides, words_per_slide=args.words)
+    work_dir = tempfile.mkdtemp(prefix="rag-bench-")
+    try:
+        results = BenchmarkRunner(spec, work_dir, args.queries, args.llm_latency_ms).run()
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    
+    output_dir = Path(args.output)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    output_path = output_dir / f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{args.size}.json"
+    output_path.write_text(json.dumps(results, indent=2))
+    print_results(results)
+    print(f"✓ Results saved to {output_path}")
+    
+    if args.baseline == "none":
+        return
+    baseline_path = find_latest_result(output_dir, exclude=output_path) if args.baseline == "latest" \
+        else Path(args.baseline)
+    if baseline_path is None:
+        print("No earlier run to compare against")
+        return
+    rows = compare(results, json.loads(baseline_path.read_text()), args.threshold, args.min_delta_ms)
+    print_comparison(rows, baseline_path)
+    regressions = [row for row in rows if row["regression"]]
+    if regressions:
+        print(f"✗ {len(regressions)} metric(s) regressed by more than {args.threshold:.0%}")
+        if args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
+
@@ -3,28 +3,54 @@ Utility script to manage the response cache.
 Provides functions to view, clear, and analyze cache.
 """
 
-import json
+import sys
 from pathlib import Path
-from typing import Dict, List
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from typing import Dict, List, Optional
 from datetime import datetime
-from collections import defaultdict
+import json
+from src.cache.backends import FileCacheBackend, create_backend
+from src.cache.compression import PayloadCodec, train_dictionary
+from src.cache.metrics import collect_snapshots, histogram_quantile, merge_snapshots, render_prometheus
 
 
 class CacheManager:
     """Manager for cache operations."""
     
-    def __init__(self, cache_dir: str = "cache/responses"):
+    def __init__(
+        self,
+        cache_dir: str = "cache/responses",
+        backend: str = "file",
+        compression: Optional[str] = None,
+        dictionary: Optional[str] = None
+    ):
         """
         Initialize cache manager.
         
         Args:
             cache_dir: Directory containing cache files
+            backend: Disk backend the cache uses (file, sqlite)
+            compression: Compression method the cache uses (zlib, zstd)
+            dictionary: Compression dictionary file the cache uses
         """
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(parents=True, exist_ok=True)
+        dictionary_bytes = Path(dictionary).read_bytes() if dictionary else None
+        codec = PayloadCodec(compression, dictionary=dictionary_bytes)
+        options = {"codec": codec}
+        if backend in ("file", "sqlite"):
+            # Don't clear while a worker process is sweeping
+            options["lock"] = True
+        self.backend = create_backend(backend, cache_dir, **options)
     
     def get_cache_files(self) -> List[Path]:
-        """Get all cache files."""
+        """Get all cache files (file backend only)."""
+        if not isinstance(self.backend, FileCacheBackend):
+            return []
         return list(self.cache_dir.glob("*.json"))
     
     def get_cache_stats(self) -> Dict:
@@ -32,28 +58,26 @@ class CacheManager:
         Get statistics about the cache.
         
         Returns:
-            Dictionary with cache statistics
-        """
-        cache_files = self.get_cache_files()
-        total_size = sum(f.stat().st_size for f in cache_files)
-        
-        # Analyze cache entries
-        entries = []
-        for cache_file in cache_files:
-            try:
-                with open(cache_file, 'r') as f:
-                    data = json.load(f)
-                    entries.append({
-                        'file': cache_file.name,
-                        'timestamp': data.get('timestamp', 0),
-                        'size': cache_file.stat().st_size
-                    })
-            except Exception:
-                pass
-        
+            Dictionary with cache statistics (``total_files`` and ``entries`` are
+            kept for callers of the file-only version)
+        """
+        stats = self.backend.stats()
+        file_backend = isinstance(self.backend, FileCacheBackend)
+        entries = [
+            {
+                'file': f"{entry['key']}.json" if file_backend else entry['key'],
+                'timestamp': entry['timestamp'] or 0,
+                'size': entry['size']
+            }
+            for entry in (self.backend.list_entries(stats['total_entries']) if stats['total_entries'] else [])
+        ]
         return {
-            'total_files': len(cache_files),
-            'total_size_mb': total_size / 1024 / 1024,
+            'total_entries': stats['total_entries'],
+            'total_files': stats['total_entries'],
+            'total_size_mb': stats['total_bytes'] / 1024 / 1024,
+            'payload_size_mb': stats.get('payload_bytes', stats['total_bytes']) / 1024 / 1024,
+            'oldest': stats['oldest'],
+            'newest': stats['newest'],
             'entries': entries
         }
     
@@ -64,34 +88,13 @@ class CacheManager:
         Args:
             older_than_days: If specified, only clear files older than N days
         """
-        cache_files = self.get_cache_files()
-        cleared = 0
-        
+        cutoff_time = None
         if older_than_days:
-            from datetime import timedelta
             cutoff_time = datetime.now().timestamp() - (older_than_days * 24 * 60 * 60)
         
-        for cache_file in cache_files:
-            should_delete = True
-            
-            if older_than_days:
-                try:
-                    with open(cache_file, 'r') as f:
-                        data = json.load(f)
-                        timestamp = data.get('timestamp', 0)
-                        if timestamp > cutoff_time:
-                            should_delete = False
-                except Exception:
-                    pass
-            
-            if should_delete:
-                try:
-                    cache_file.unlink()
-                    cleared += 1
-                except Exception as e:
-                    print(f"Error deleting {cache_file}: {e}")
+        cleared = self.backend.clear(older_than=cutoff_time)
         
-        print(f"✓ Cleared {cleared} cache file(s)")
+        print(f"✓ Cleared {cleared} cache entries")
         return cleared
     
     def show_cache_info(self):
@@ -101,17 +104,15 @@ class CacheManager:
         print("=" * 60)
         print("Cache Statistics")
         print("=" * 60)
-        print(f"Total cache files: {stats['total_files']}")
+        print(f"Total cache entries: {stats['total_entries']}")
         print(f"Total cache size: {stats['total_size_mb']:.2f} MB")
+        print(f"Stored payloads: {stats['payload_size_mb']:.2f} MB")
         
-        if stats['entries']:
-            # Show oldest and newest entries
-            sorted_entries = sorted(stats['entries'], key=lambda x: x['timestamp'])
-            if sorted_entries:
-                oldest = datetime.fromtimestamp(sorted_entries[0]['timestamp'])
-                newest = datetime.fromtimestamp(sorted_entries[-1]['timestamp'])
-                print(f"Oldest entry: {oldest.strftime('%Y-%m-%d %H:%M:%S')}")
-                print(f"Newest entry: {newest.strftime('%Y-%m-%d %H:%M:%S')}")
+        if stats['oldest'] is not None:
+            oldest = datetime.fromtimestamp(stats['oldest'])
+            newest = datetime.fromtimestamp(stats['newest'])
+            print(f"Oldest entry: {oldest.strftime('%Y-%m-%d %H:%M:%S')}")
+            print(f"Newest entry: {newest.strftime('%Y-%m-%d %H:%M:%S')}")
         
         print("=" * 60)
     
@@ -122,47 +123,147 @@ class CacheManager:
         Args:
             limit: Maximum number of entries to display
         """
-        cache_files = self.get_cache_files()
-        
         print("=" * 60)
         print(f"Cache Entries (showing up to {limit})")
         print("=" * 60)
         
-        entries = []
-        for cache_file in cache_files[:limit]:
-            try:
-                with open(cache_file, 'r') as f:
-                    data = json.load(f)
-                    timestamp = datetime.fromtimestamp(data.get('timestamp', 0))
-                    query = data.get('query', 'N/A')[:50]
-                    entries.append({
-                        'file': cache_file.name,
-                        'query': query,
-                        'timestamp': timestamp,
-                        'size': cache_file.stat().st_size
-                    })
-            except Exception as e:
-                entries.append({
-                    'file': cache_file.name,
-                    'query': f'Error: {str(e)[:30]}',
-                    'timestamp': None,
-                    'size': cache_file.stat().st_size
-                })
+        entries = self.backend.list_entries(limit)
         
         for entry in entries:
-            timestamp_str = entry['timestamp'].strftime('%Y-%m-%d %H:%M:%S') if entry['timestamp'] else 'N/A'
-            print(f"{entry['file']:20s} | {timestamp_str:19s} | {entry['query']}")
+            timestamp = datetime.fromtimestamp(entry['timestamp']) if entry['timestamp'] else None
+            timestamp_str = timestamp.strftime('%Y-%m-%d %H:%M:%S') if timestamp else 'N/A'
+            print(f"{entry['key']:20s} | {timestamp_str:19s} | {entry['query'][:50]}")
+        
+        total = self.backend.count()
+        if total > limit:
+            print(f"\n... and {total - limit} more entries")
+        
+        print("=" * 60)
+    
+    def get_metrics(self, max_age: Optional[float] = None) -> Optional[Dict]:
+        """
+        Combine the metrics snapshots written by every running process using the cache.
+        
+        Snapshots of exited processes are pruned (see collect_snapshots).
+        
+        Args:
+            max_age: Ignore snapshots not rewritten for this many seconds
+            
+        Returns:
+            Merged snapshot, or None if no process has written metrics yet
+        """
+        snapshots = collect_snapshots(self.cache_dir / "metrics", max_age)
+        return merge_snapshots(snapshots) if snapshots else None
+    
+    def export_metrics(self, max_age: Optional[float] = None) -> str:
+        """
+        Get cache metrics in the Prometheus text format.
         
-        if len(cache_files) > limit:
-            print(f"\n... and {len(cache_files) - limit} more entries")
+        Args:
+            max_age: Ignore snapshots not rewritten for this many seconds
+            
+        Returns:
+            Exposition text (empty if no metrics were written)
+        """
+        metrics = self.get_metrics(max_age)
+        return render_prometheus(metrics) if metrics else ""
+    
+    def show_metrics(self):
+        """Display hit rates, lookup latency and estimated savings."""
+        metrics = self.get_metrics()
         
         print("=" * 60)
+        print("Cache Effectiveness")
+        print("=" * 60)
+        if metrics is None:
+            print("No metrics yet (written by ResponseCache.write_metrics and the sweeper)")
+            print("=" * 60)
+            return
+        
+        print(f"Requests: {metrics['requests']} | Hit rate: {metrics['hit_rate']:.1%}")
+        for tier, counters in metrics['tiers'].items():
+            lookups = counters['hits'] + counters['misses']
+            rate = counters['hits'] / lookups if lookups else 0.0
+            p95 = histogram_quantile(counters['latency'], 0.95)
+            p95_str = f"{p95 * 1000:.2f} ms" if p95 is not None else "n/a"
+            print(f"  {tier:8s} hits {counters['hits']:7d} | misses {counters['misses']:7d} | "
+                  f"hit rate {rate:6.1%} | evictions {counters['evictions']} | "
+                  f"expired {counters['expired']} | p95 {p95_str}")
+        print(f"LLM calls: {metrics['llm']['latency']['count']}")
+        print(f"Estimated LLM time saved: {metrics['saved_seconds']:.1f}s")
+        print(f"Estimated LLM cost saved: {metrics['saved_cost']:.4f}")
+        print("=" * 60)
+    
+    def serve_metrics(self, port: int = 9108):
+        """
+        Serve merged metrics for Prometheus scraping at /metrics.
+        
+        Args:
+            port: Port to listen on
+        """
+        from http.server import BaseHTTPRequestHandler, HTTPServer
+        
+        manager = self
+        
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != "/metrics":
+                    self.send_error(404)
+                    return
+                body = manager.export_metrics().encode('utf-8')
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+        
+        print(f"✓ Serving cache metrics on http://0.0.0.0:{port}/metrics")
+        HTTPServer(("", port), MetricsHandler).serve_forever()
+    
+    def train_dictionary(
+        self,
+        narrations_file: str = "data/processed/narrations/checkpoint.jsonl",
+        output: str = "cache/dictionary.bin",
+        size: int = 16 * 1024,
+        method: str = "zlib"
+    ) -> Path:
+        """
+        Train a compression dictionary on past narratives.
+        
+        Args:
+            narrations_file: Batch narration checkpoint (JSONL with a narrative field)
+            output: Where to write the dictionary
+            size: Maximum dictionary size in bytes
+            method: Compression method the dictionary is for (zlib, zstd)
+            
+        Returns:
+            Path of the written dictionary
+        """
+        samples = []
+        with open(narrations_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    samples.append(json.loads(line)["narrative"])
+                except (ValueError, KeyError):
+                    continue
+        
+        dictionary = train_dictionary(samples, size, method)
+        output_path = Path(output)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        output_path.write_bytes(dictionary)
+        print(f"✓ Trained {len(dictionary)} byte {method} dictionary on {len(samples)} narratives: {output_path}")
+        return output_path
 
 
 if __name__ == "__main__":
-    import sys
+    options = {"backend": "file", "compression": None, "dictionary": None}
+    for arg in list(sys.argv[1:]):
+        for name in options:
+            if arg.startswith(f"--{name}="):
+                options[name] = arg.split("=", 1)[1]
+                sys.argv.remove(arg)
     
-    manager = CacheManager()
+    manager = CacheManager(**options)
     
     if len(sys.argv) > 1:
         command = sys.argv[1]
@@ -175,9 +276,20 @@ if __name__ == "__main__":
         elif command == "clear":
             older_than = int(sys.argv[2]) if len(sys.argv) > 2 else None
             manager.clear_cache(older_than_days=older_than)
+        elif command == "metrics":
+            if len(sys.argv) > 2 and sys.argv[2] == "prometheus":
+                print(manager.export_metrics(), end="")
+            else:
+                manager.show_metrics()
+        elif command == "serve-metrics":
+            manager.serve_metrics(int(sys.argv[2]) if len(sys.argv) > 2 else 9108)
+        elif command == "train-dict":
+            narrations = sys.argv[2] if len(sys.argv) > 2 else "data/processed/narrations/checkpoint.jsonl"
+            output = sys.argv[3] if len(sys.argv) > 3 else "cache/dictionary.bin"
+            manager.train_dictionary(narrations, output, method=options["compression"] or "zlib")
         else:
             print(f"Unknown command: {command}")
-            print("Usage: python manage_cache.py [stats|list|clear] [args]")
+            print("Usage: python manage_cache.py [stats|list|clear|metrics|serve-metrics|train-dict] [args]")
     else:
         # Default: show stats
         manager.show_cache_info()
@@ -185,4 +297,9 @@ if __name__ == "__main__":
         print("  python manage_cache.py stats     - Show cache statistics")
         print("  python manage_cache.py list [N]  - List cache entries (default: 10)")
         print("  python manage_cache.py clear [N] - Clear cache (or files older than N days)")
+        print("  python manage_cache.py metrics [prometheus] - Show hit rates and savings (or export them)")
+        print("  python manage_cache.py serve-metrics [PORT] - Serve metrics at /metrics (default: 9108)")
+        print("  python manage_cache.py train-dict [NARRATIONS] [OUTPUT] - Train a compression dictionary")
+        print("  Add --backend=sqlite when the cache uses the SQLite store")
+        print("  Add --compression=zlib --dictionary=PATH when entries are compressed with a dictionary")
 
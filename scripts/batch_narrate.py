@@ -0,0 +1,79 @@
+"""
+Batch-narrate presentations and warm the response cache.
+Run this script ahead of a course to narrate every slide of one deck or all indexed decks.
+"""
+
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import argparse
+from src.pipeline.runtime import Runtime
+from src.utils.config import ConfigError, add_config_arguments, config_from_args
+
+
+# Flag attribute -> setting it overrides
+FLAGS = {
+    "metadata": "data.metadata_file",
+    "provider": "llm.provider",
+    "template": "llm.prompt_template",
+    "workers": "performance.narration_workers",
+    "rps": "performance.requests_per_second",
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Narrate every slide of one or more presentations")
+    add_config_arguments(parser)
+    parser.add_argument("--presentation", action="append", dest="presentations",
+                        help="Presentation ID to narrate (repeatable; default: every indexed deck)")
+    parser.add_argument("--metadata", help="Presentations metadata file, used when there is no index (data.metadata_file)")
+    parser.add_argument("--provider", help="LLM provider: openai, anthropic, simulated (llm.provider)")
+    parser.add_argument("--template", help="Prompt template file (llm.prompt_template)")
+    parser.add_argument("--workers", type=int, help="Number of narration threads (performance.narration_workers, default max_workers)")
+    parser.add_argument("--rps", type=float, help="Max requests per second to the provider (performance.requests_per_second)")
+    parser.add_argument("--checkpoint",
+                        help="Checkpoint file used to resume interrupted runs "
+                             "(default: <data.processed_dir>/narrations/checkpoint.jsonl)")
+    args = parser.parse_args()
+    
+    try:
+        runtime = Runtime(config_from_args(args, FLAGS))
+        narrator = runtime.batch_narrator(args.checkpoint)
+    except (ConfigError, ValueError) as e:
+        print(f"✗ {e}")
+        sys.exit(1)
+    
+    print("=" * 60)
+    print("Batch Narration")
+    print("=" * 60)
+    if runtime.pipeline().vector_store is not None:
+        jobs = narrator.jobs_for_index(args.presentations)
+    else:
+        print("  No index or presentations to index; narrating the metadata catalogue")
+        print("  (live lecture sessions will not be served from these narratives)")
+        jobs = narrator.jobs_for_catalogue(runtime.config.data.metadata_file, args.presentations)
+    print(f"Found {len(jobs)} slide(s) to narrate")
+    
+    runtime.start_background(serving=False)
+    try:
+        progress = narrator.run(jobs)
+    finally:
+        runtime.close()
+    
+    print("=" * 60)
+    print(f"✓ Narrated {progress['done']} slide(s) in {progress['elapsed']:.1f}s "
+          f"({progress['slides_per_second']:.2f} slides/s)")
+    if progress["skipped"]:
+        print(f"  Skipped {progress['skipped']} slide(s) already in checkpoint")
+    if progress["failed"]:
+        print(f"✗ {progress['failed']} slide(s) failed; re-run to retry them")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
+
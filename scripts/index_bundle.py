@@ -0,0 +1,99 @@
+"""
+Build, inspect, verify and promote single-file index bundles.
+"""
+
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import argparse
+import json
+import time
+from src.pipeline.dedup import NearDuplicateDetector
+from src.pipeline.index_bundle import BundleError, IndexBundle, promote_bundle
+from src.pipeline.rag_pipeline import RAGPipeline
+
+
+def build(args):
+    deduplicator = NearDuplicateDetector(args.dedup) if args.dedup else None
+    pipeline = RAGPipeline(
+        documents_path=args.documents,
+        chunk_size=args.chunk_size,
+        chunk_overlap=args.chunk_overlap,
+        deduplicator=deduplicator
+    )
+    pipeline.create_vector_store(pipeline.load_documents())
+    if pipeline.vector_store is None:
+        print(f"✗ No documents found in {args.documents}")
+        sys.exit(1)
+    report = pipeline.dedup_report
+    if report is not None:
+        print(f"✓ Collapsed {report.removed} of {report.chunks_in} chunks "
+              f"({report.exact_duplicates} exact, {report.near_duplicates} near): "
+              f"{report.removed_fraction:.1%} fewer vectors, "
+              f"{report.index_bytes_saved(pipeline.vector_store.d) / 1024:.0f} KB index, "
+              f"{report.embedding_bytes_saved_fraction:.1%} less text embedded")
+    metadata = {"course": args.course} if args.course else None
+    path = pipeline.save_bundle(args.bundle, metadata)
+    print(f"✓ Wrote {path} ({len(pipeline.chunks)} chunks, index {pipeline.index_version})")
+
+
+def inspect(args):
+    bundle = IndexBundle(args.bundle, verify=False)
+    print(json.dumps(bundle.describe(), indent=2))
+
+
+def verify(args):
+    start = time.perf_counter()
+    try:
+        IndexBundle(args.bundle, verify=True)
+    except (BundleError, OSError) as e:
+        print(f"✗ {e}")
+        sys.exit(1)
+    print(f"✓ {args.bundle} verified in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+def promote(args):
+    try:
+        path = promote_bundle(args.bundle, args.destination)
+    except (BundleError, OSError) as e:
+        print(f"✗ Not promoted: {e}")
+        sys.exit(1)
+    print(f"✓ Promoted {args.bundle} to {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage single-file index bundles")
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    build_parser = commands.add_parser("build", help="Index a presentations directory into a bundle")
+    build_parser.add_argument("documents", help="Presentations directory")
+    build_parser.add_argument("bundle", help="Output bundle (e.g. models/courses/ml101.ragidx)")
+    build_parser.add_argument("--course", help="Course name recorded in the metadata")
+    build_parser.add_argument("--chunk-size", type=int, default=1000, help="Characters per chunk")
+    build_parser.add_argument("--chunk-overlap", type=int, default=200, help="Characters shared by consecutive chunks")
+    build_parser.add_argument("--dedup", type=float, metavar="THRESHOLD",
+                              help="Collapse chunks with at least this estimated Jaccard similarity (e.g. 0.85)")
+    build_parser.set_defaults(handler=build)
+    
+    for name, handler, help_text in (("inspect", inspect, "Print the bundle header"),
+                                     ("verify", verify, "Check every section checksum")):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("bundle", help="Bundle file")
+        command.set_defaults(handler=handler)
+    
+    promote_parser = commands.add_parser("promote", help="Verify and atomically install a bundle at a serving path")
+    promote_parser.add_argument("bundle", help="Bundle to install")
+    promote_parser.add_argument("destination", help="Serving path (replaced atomically)")
+    promote_parser.set_defaults(handler=promote)
+    
+    args = parser.parse_args()
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
+
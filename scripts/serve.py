@@ -0,0 +1,68 @@
+"""
+Serve the RAG pipeline over HTTP.
+Starts the async server at once and builds the index in the background; /readyz reports when it is loaded.
+"""
+
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import argparse
+from src.pipeline.runtime import Runtime
+from src.server.http_server import serve
+from src.utils.config import ConfigError, add_config_arguments, config_from_args
+
+
+# Flag attribute -> setting it overrides
+FLAGS = {
+    "documents": "data.presentations_dir",
+    "host": "server.host",
+    "port": "server.port",
+    "provider": "llm.provider",
+    "template": "llm.prompt_template",
+    "concurrency": "server.concurrency",
+    "queue": "server.queue",
+    "queue_timeout": "server.queue_timeout",
+    "courses_dir": "server.courses_dir",
+    "index_budget_mb": "server.index_budget_mb",
+    "pin": "server.pin",
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve retrieve and narrate endpoints over HTTP")
+    add_config_arguments(parser)
+    parser.add_argument("--documents", help="Presentations directory to index (data.presentations_dir)")
+    parser.add_argument("--host", help="Interface to bind (server.host, default 127.0.0.1)")
+    parser.add_argument("--port", type=int, help="Port to bind (server.port, default 8080)")
+    parser.add_argument("--provider",
+                        help="LLM provider: openai, anthropic, simulated, none for extractive answers (llm.provider)")
+    parser.add_argument("--template", help="Prompt template file (llm.prompt_template)")
+    parser.add_argument("--concurrency", type=int, help="Requests processed at once (server.concurrency, default 8)")
+    parser.add_argument("--queue", type=int, help="Requests allowed to wait before 503s (server.queue, default 64)")
+    parser.add_argument("--queue-timeout", type=float,
+                        help="Seconds a request may wait for a worker (server.queue_timeout, default 10)")
+    parser.add_argument("--courses-dir", help="Serve per-course indexes saved with save_index/save_bundle from here")
+    parser.add_argument("--index-budget-mb", type=int,
+                        help="Resident memory for course indexes (server.index_budget_mb, default 2048)")
+    parser.add_argument("--pin", action="append", help="Course to preload and keep resident (repeatable)")
+    args = parser.parse_args()
+    
+    try:
+        runtime = Runtime(config_from_args(args, FLAGS))
+    except ConfigError as e:
+        print(f"✗ {e}")
+        sys.exit(1)
+    runtime.start_background()
+    try:
+        serve(runtime.pipeline(), **runtime.server_options())
+    finally:
+        runtime.close()
+
+
+if __name__ == "__main__":
+    main()
+
@@ -0,0 +1,572 @@
+"""
+Pooled, Retrying and Hedged HTTP Client for LLM Providers
+Shared per provider endpoint so connections are kept alive across agents and requests.
+"""
+
+from typing import Dict, Iterator, Optional, Tuple
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from http.client import HTTPConnection, HTTPSConnection, HTTPException
+from urllib.parse import urlsplit
+import json
+import os
+import queue
+import random
+import threading
+import time
+
+from src.agents.llm_providers import LLMProviderError, RateLimitError
+
+
+class HTTPConnectionPool:
+    """
+    Pool of keep-alive HTTP connections to one host.
+    """
+    
+    def __init__(self, base_url: str, max_connections: int = 10, timeout: float = 60.0):
+        """
+        Initialize the pool.
+        
+        Args:
+            base_url: Base URL of the provider API (scheme, host, optional path prefix)
+            max_connections: Maximum concurrent connections to the host
+            timeout: Socket timeout in seconds
+        """
+        parsed = urlsplit(base_url)
+        self.scheme = parsed.scheme or "http"
+        self.host = parsed.hostname
+        self.port = parsed.port
+        self.base_path = parsed.path.rstrip("/")
+        self.timeout = timeout
+        self._idle: "queue.LifoQueue[HTTPConnection]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max_connections)
+    
+    def _new_connection(self) -> HTTPConnection:
+        """Open a new connection to the host."""
+        connection_class = HTTPSConnection if self.scheme == "https" else HTTPConnection
+        return connection_class(self.host, self.port, timeout=self.timeout)
+    
+    @contextmanager
+    def connection(self) -> Iterator[HTTPConnection]:
+        """
+        Borrow a connection, returning it to the pool unless an error occurred.
+        
+        Yields:
+            Connection to the host
+        """
+        self._slots.acquire()
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = self._new_connection()
+        healthy = False
+        try:
+            yield conn
+            healthy = True
+        finally:
+            if healthy:
+                self._idle.put(conn)
+            else:
+                conn.close()
+            self._slots.release()
+    
+    def request(
+        self,
+        method: str,
+        path: str,
+        body: Optional[bytes] = None,
+        headers: Optional[Dict[str, str]] = None
+    ) -> Tuple[int, Dict[str, str], bytes]:
+        """
+        Send a request and read the full response.
+        
+        Args:
+            method: HTTP method
+            path: Path relative to the base URL
+            body: Request body
+            headers: Request headers
+            
+        Returns:
+            Tuple of (status, lower-cased headers, body)
+        """
+        with self.response(method, path, body, headers) as resp:
+            return resp.status, _lower_headers(resp), resp.read()
+    
+    @contextmanager
+    def response(
+        self,
+        method: str,
+        path: str,
+        body: Optional[bytes] = None,
+        headers: Optional[Dict[str, str]] = None
+    ) -> Iterator:
+        """
+        Send a request and yield the response before its body is read (e.g. to stream it).
+        
+        A keep-alive connection closed by the server while idle fails on first
+        use; the request is then retried once on a new connection.
+        
+        Args:
+            method: HTTP method
+            path: Path relative to the base URL
+            body: Request body
+            headers: Request headers
+            
+        Yields:
+            HTTPResponse on a borrowed connection
+        """
+        for attempt in range(2):
+            with self.connection() as conn:
+                try:
+                    conn.request(method, self.base_path + path, body=body, headers=headers or {})
+                    resp = conn.getresponse()
+                except (ConnectionError, HTTPException):
+                    if attempt == 1:
+                        raise
+                    # Reopened on its next request
+                    conn.close()
+                    continue
+                yield resp
+                return
+    
+    def close(self):
+        """Close all idle connections."""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter for retryable responses.
+    """
+    
+    def __init__(
+        self,
+        max_retries: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 20.0,
+        retry_statuses: Tuple[int, ...] = (429, 500, 502, 503, 504)
+    ):
+        """
+        Initialize the policy.
+        
+        Args:
+            max_retries: Retries after the first attempt
+            base_delay: Backoff base in seconds
+            max_delay: Upper bound on a single backoff
+            retry_statuses: HTTP statuses that are retried
+        """
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_statuses = retry_statuses
+    
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        Compute the wait before the next attempt.
+        
+        Args:
+            attempt: Zero-based number of the attempt that just failed
+            retry_after: Server-provided Retry-After in seconds
+            
+        Returns:
+            Seconds to wait
+        """
+        backoff = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        if retry_after is not None:
+            return min(self.max_delay, max(backoff, retry_after))
+        return backoff
+
+
+class LatencyTracker:
+    """
+    Rolling window of request latencies for percentile estimates.
+    """
+    
+    def __init__(self, window: int = 200):
+        """
+        Initialize the tracker.
+        
+        Args:
+            window: Number of recent samples kept
+        """
+        self._samples: deque = deque(maxlen=window)
+        self._lock = threading.Lock()
+    
+    def record(self, seconds: float):
+        """Record one latency sample."""
+        with self._lock:
+            self._samples.append(seconds)
+    
+    def __len__(self) -> int:
+        return len(self._samples)
+    
+    def percentile(self, p: float) -> Optional[float]:
+        """
+        Get a latency percentile.
+        
+        Args:
+            p: Percentile as a fraction (0.95 for p95)
+            
+        Returns:
+            Latency in seconds, or None without samples
+        """
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(p * len(samples)))]
+
+
+class HedgePolicy:
+    """
+    When to fire a duplicate request for a slow call.
+    """
+    
+    def __init__(
+        self,
+        percentile: float = 0.95,
+        min_samples: int = 20,
+        min_delay: float = 0.05,
+        delay: Optional[float] = None
+    ):
+        """
+        Initialize the policy.
+        
+        Args:
+            percentile: Latency percentile after which a hedge is fired
+            min_samples: Samples needed before the percentile is trusted
+            min_delay: Lower bound on the hedge delay in seconds
+            delay: Fixed hedge delay overriding the percentile estimate
+        """
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.delay = delay
+    
+    def hedge_after(self, tracker: LatencyTracker) -> Optional[float]:
+        """
+        Get the hedge delay for the next request.
+        
+        Args:
+            tracker: Latency samples for the endpoint
+            
+        Returns:
+            Seconds to wait before hedging, or None to not hedge
+        """
+        if self.delay is not None:
+            return self.delay
+        if len(tracker) < self.min_samples:
+            return None
+        return max(self.min_delay, tracker.percentile(self.percentile))
+
+
+_hedge_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="llm-hedge")
+
+
+class LLMClient:
+    """
+    JSON-over-HTTP client with connection pooling, retries and optional hedging.
+    """
+    
+    def __init__(
+        self,
+        base_url: str,
+        headers: Optional[Dict[str, str]] = None,
+        max_connections: int = 10,
+        timeout: float = 60.0,
+        retry: Optional[RetryPolicy] = None,
+        hedge: Optional[HedgePolicy] = None
+    ):
+        """
+        Initialize the client.
+        
+        Args:
+            base_url: Base URL of the provider API
+            headers: Headers sent with every request (auth, versioning)
+            max_connections: Connection pool size
+            timeout: Socket timeout in seconds
+            retry: Retry policy (defaults to RetryPolicy())
+            hedge: Hedge policy (None disables hedged requests)
+        """
+        self.base_url = base_url
+        self.headers = {"Content-Type": "application/json", **(headers or {})}
+        self.pool = HTTPConnectionPool(base_url, max_connections, timeout)
+        self.retry = retry or RetryPolicy()
+        self.hedge = hedge
+        self.latency = LatencyTracker()
+        self._stats_lock = threading.Lock()
+        self.stats: Dict[str, int] = {"requests": 0, "retries": 0, "hedges": 0, "hedge_wins": 0}
+    
+    def post_json(self, path: str, payload: Dict) -> Dict:
+        """
+        POST a JSON payload and decode the JSON response.
+        
+        Args:
+            path: Path relative to the base URL
+            payload: Request body
+            
+        Returns:
+            Decoded response body
+        """
+        body = json.dumps(payload).encode("utf-8")
+        for attempt in range(self.retry.max_retries + 1):
+            self._count("requests")
+            status, headers, data = self._send(path, body)
+            if status < 400:
+                return json.loads(data)
+            if status not in self.retry.retry_statuses or attempt == self.retry.max_retries:
+                raise _status_error(status, headers, data)
+            self._count("retries")
+            time.sleep(self.retry.delay(attempt, _retry_after(headers)))
+    
+    def stream_lines(self, path: str, payload: Dict) -> Iterator[str]:
+        """
+        POST a JSON payload and yield response lines as they arrive.
+        
+        Retries apply until the response status is received; streams are not hedged.
+        
+        Args:
+            path: Path relative to the base URL
+            payload: Request body
+            
+        Yields:
+            Decoded, non-empty response lines
+        """
+        body = json.dumps(payload).encode("utf-8")
+        for attempt in range(self.retry.max_retries + 1):
+            self._count("requests")
+            with self.pool.response("POST", path, body, self.headers) as resp:
+                if resp.status < 400:
+                    for raw in resp:
+                        line = raw.decode("utf-8").rstrip("\r\n")
+                        if line:
+                            yield line
+                    return
+                headers, data = _lower_headers(resp), resp.read()
+            if resp.status not in self.retry.retry_statuses or attempt == self.retry.max_retries:
+                raise _status_error(resp.status, headers, data)
+            self._count("retries")
+            time.sleep(self.retry.delay(attempt, _retry_after(headers)))
+    
+    def _send(self, path: str, body: bytes) -> Tuple[int, Dict[str, str], bytes]:
+        """Send one logical attempt, hedging it if the policy says so."""
+        hedge_after = self.hedge.hedge_after(self.latency) if self.hedge else None
+        if hedge_after is None:
+            return self._timed_request(path, body)
+        
+        primary = _hedge_executor.submit(self._timed_request, path, body)
+        done, _ = wait([primary], timeout=hedge_after)
+        if done:
+            return primary.result()
+        
+        self._count("hedges")
+        backup = _hedge_executor.submit(self._timed_request, path, body)
+        pending = {primary, backup}
+        error = None
+        retryable = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    error = e
+                    continue
+                if result[0] in self.retry.retry_statuses:
+                    # The other leg may still succeed
+                    retryable = result
+                    continue
+                if future is backup:
+                    self._count("hedge_wins")
+                return result
+        if retryable is not None:
+            return retryable
+        raise error
+    
+    def _timed_request(self, path: str, body: bytes) -> Tuple[int, Dict[str, str], bytes]:
+        """Send a request and record its latency when successful."""
+        start = time.monotonic()
+        status, headers, data = self.pool.request("POST", path, body, self.headers)
+        if status < 400:
+            self.latency.record(time.monotonic() - start)
+        return status, headers, data
+    
+    def _count(self, name: str):
+        """Increment a stats counter."""
+        with self._stats_lock:
+            self.stats[name] += 1
+
+
+def _lower_headers(resp) -> Dict[str, str]:
+    """Response headers with lower-cased names."""
+    return {name.lower(): value for name, value in resp.getheaders()}
+
+
+def _retry_after(headers: Dict[str, str]) -> Optional[float]:
+    """Parse a Retry-After header given in seconds."""
+    try:
+        return float(headers["retry-after"])
+    except (KeyError, ValueError):
+        return None
+
+
+def _status_error(status: int, headers: Dict[str, str], data: bytes) -> LLMProviderError:
+    """Build the exception for a failed response."""
+    message = f"HTTP {status}: {data[:200].decode('utf-8', 'replace')}"
+    if status == 429:
+        return RateLimitError(message, _retry_after(headers) or 1.0)
+    return LLMProviderError(message)
+
+
+_clients: Dict[str, LLMClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_shared_client(base_url: str, headers: Optional[Dict[str, str]] = None, **options) -> LLMClient:
+    """
+    Get the process-wide client for an endpoint and credentials.
+    
+    Args:
+        base_url: Base URL of the provider API
+        headers: Headers sent with every request
+        **options: LLMClient options; callers with different options get separate clients
+        
+    Returns:
+        Shared LLMClient
+    """
+    key = "|".join((
+        base_url,
+        json.dumps(headers or {}, sort_keys=True),
+        json.dumps(options, sort_keys=True, default=lambda value: [type(value).__name__, vars(value)]),
+    ))
+    with _clients_lock:
+        if key not in _clients:
+            _clients[key] = LLMClient(base_url, headers, **options)
+        return _clients[key]
+
+
+class OpenAIChat:
+    """
+    OpenAI chat completions provider over the shared client layer.
+    """
+    
+    def __init__(
+        self,
+        model: str = "gpt-4",
+        api_key: Optional[str] = None,
+        base_url: str = "https://api.openai.com/v1",
+        temperature: float = 0.7,
+        max_tokens: int = 2000,
+        hedge: bool = False,
+        **client_options
+    ):
+        """
+        Initialize the provider.
+        
+        Args:
+            model: Model name
+            api_key: API key (defaults to OPENAI_API_KEY)
+            base_url: API base URL
+            temperature: Sampling temperature
+            max_tokens: Maximum tokens to generate
+            hedge: Fire a duplicate request past the p95 latency
+            **client_options: Extra LLMClient options
+        """
+        api_key = api_key or os.environ.get("OPENAI_API_KEY", "")
+        if hedge:
+            client_options.setdefault("hedge", HedgePolicy())
+        self.client = get_shared_client(base_url, {"Authorization": f"Bearer {api_key}"}, **client_options)
+        self.model = model
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+    
+    def _payload(self, prompt: str, stream: bool) -> Dict:
+        return {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens,
+            "stream": stream,
+        }
+    
+    def invoke(self, prompt: str) -> str:
+        """Generate a complete response."""
+        response = self.client.post_json("/chat/completions", self._payload(prompt, False))
+        return response["choices"][0]["message"]["content"]
+    
+    def stream(self, prompt: str) -> Iterator[str]:
+        """Stream response text fragments."""
+        for line in self.client.stream_lines("/chat/completions", self._payload(prompt, True)):
+            if not line.startswith("data: ") or line == "data: [DONE]":
+                continue
+            delta = json.loads(line[6:])["choices"][0].get("delta", {})
+            if delta.get("content"):
+                yield delta["content"]
+
+
+class AnthropicChat:
+    """
+    Anthropic messages provider over the shared client layer.
+    """
+    
+    def __init__(
+        self,
+        model: str = "claude-3-sonnet-20240229",
+        api_key: Optional[str] = None,
+        base_url: str = "https://api.anthropic.com/v1",
+        temperature: float = 0.7,
+        max_tokens: int = 2000,
+        hedge: bool = False,
+        **client_options
+    ):
+        """
+        Initialize the provider.
+        
+        Args:
+            model: Model name
+            api_key: API key (defaults to ANTHROPIC_API_KEY)
+            base_url: API base URL
+            temperature: Sampling temperature
+            max_tokens: Maximum tokens to generate
+            hedge: Fire a duplicate request past the p95 latency
+            **client_options: Extra LLMClient options
+        """
+        api_key = api_key or os.environ.get("ANTHROPIC_API_KEY", "")
+        if hedge:
+            client_options.setdefault("hedge", HedgePolicy())
+        headers = {"x-api-key": api_key, "anthropic-version": "2023-06-01"}
+        self.client = get_shared_client(base_url, headers, **client_options)
+        self.model = model
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+    
+    def _payload(self, prompt: str, stream: bool) -> Dict:
+        return {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens,
+            "stream": stream,
+        }
+    
+    def invoke(self, prompt: str) -> str:
+        """Generate a complete response."""
+        response = self.client.post_json("/messages", self._payload(prompt, False))
+        return "".join(block.get("text", "") for block in response["content"])
+    
+    def stream(self, prompt: str) -> Iterator[str]:
+        """Stream response text fragments."""
+        for line in self.client.stream_lines("/messages", self._payload(prompt, True)):
+            if not line.startswith("data: "):
+                continue
+            event = json.loads(line[6:])
+            if event.get("type") == "content_block_delta":
+                text = event["delta"].get("text")
+                if text:
+                    yield text
+
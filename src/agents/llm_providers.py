@@ -0,0 +1,198 @@
+"""
+LLM Provider Factory and Simulated Provider
+The simulated provider lets the pipeline be load-tested offline with reproducible latency.
+"""
+
+from typing import Dict, Iterator, List, Optional
+from collections import deque
+import hashlib
+import math
+import random
+import threading
+import time
+
+
+class LLMProviderError(Exception):
+    """Raised when an LLM provider call fails."""
+
+
+class RateLimitError(LLMProviderError):
+    """Raised when a provider rejects a call because of rate limits."""
+    
+    def __init__(self, message: str, retry_after: float = 1.0):
+        """
+        Initialize the error.
+        
+        Args:
+            message: Error message
+            retry_after: Seconds the caller should wait before retrying
+        """
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+_WORDS = (
+    "the slide shows a diagram describing how the concept connects to the previous "
+    "section with labelled arrows between each stage and a short summary of the key "
+    "idea presented by the speaker in clear accessible language for every learner"
+).split()
+
+
+class SimulatedLLM:
+    """
+    Local stand-in for a chat model with configurable latency and failures.
+    
+    Time to first token is drawn from a log-normal distribution with the given
+    median and p95, followed by streaming at ``tokens_per_second``. Responses are
+    derived from the prompt so repeated prompts produce identical narratives.
+    """
+    
+    def __init__(
+        self,
+        latency_ms: float = 500.0,
+        latency_p95_ms: float = 1500.0,
+        tokens_per_second: float = 50.0,
+        response_tokens: int = 120,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        requests_per_minute: Optional[int] = None,
+        retry_after: float = 1.0,
+        seed: Optional[int] = None,
+        realtime: bool = True
+    ):
+        """
+        Initialize the simulated provider.
+        
+        Args:
+            latency_ms: Median time to first token in milliseconds
+            latency_p95_ms: 95th percentile time to first token in milliseconds
+            tokens_per_second: Streaming rate after the first token (0 for instant)
+            response_tokens: Number of tokens in each response
+            error_rate: Probability a call fails with LLMProviderError
+            rate_limit_rate: Probability a call is rejected with RateLimitError
+            requests_per_minute: Provider-side limit; calls above it are rejected
+            retry_after: Retry-after hint attached to rate limit errors
+            seed: Seed for reproducible latency and failure sequences
+            realtime: Sleep for simulated latency (False only accounts for it)
+        """
+        if latency_p95_ms < latency_ms:
+            raise ValueError("latency_p95_ms must be >= latency_ms")
+        self.latency_ms = latency_ms
+        self.latency_p95_ms = latency_p95_ms
+        self.tokens_per_second = tokens_per_second
+        self.response_tokens = response_tokens
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.requests_per_minute = requests_per_minute
+        self.retry_after = retry_after
+        self.realtime = realtime
+        
+        # log-normal: median = exp(mu), p95 = exp(mu + 1.645 * sigma)
+        self._mu = math.log(max(latency_ms, 1e-3))
+        self._sigma = math.log(max(latency_p95_ms, 1e-3) / max(latency_ms, 1e-3)) / 1.645
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._recent_calls: deque = deque()
+        self.stats: Dict[str, float] = {
+            "calls": 0,
+            "errors": 0,
+            "rate_limited": 0,
+            "tokens": 0,
+            "simulated_seconds": 0.0,
+        }
+    
+    def invoke(self, prompt: str) -> str:
+        """
+        Generate a complete response.
+        
+        Args:
+            prompt: Prompt text
+            
+        Returns:
+            Simulated response text
+        """
+        return "".join(self.stream(prompt))
+    
+    def stream(self, prompt: str) -> Iterator[str]:
+        """
+        Generate a response token by token.
+        
+        Args:
+            prompt: Prompt text
+            
+        Yields:
+            Response tokens (words with trailing spaces)
+        """
+        first_token_delay = self._admit()
+        self._wait(first_token_delay)
+        
+        per_token = 1.0 / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+        tokens = self._response_tokens(prompt)
+        with self._lock:
+            self.stats["tokens"] += len(tokens)
+            self.stats["simulated_seconds"] += per_token * len(tokens)
+        for i, token in enumerate(tokens):
+            if i:
+                self._wait(per_token)
+            yield token
+    
+    def _admit(self) -> float:
+        """Apply simulated failures and return the time to first token."""
+        with self._lock:
+            self.stats["calls"] += 1
+            now = time.monotonic()
+            
+            if self.requests_per_minute is not None:
+                while self._recent_calls and now - self._recent_calls[0] >= 60.0:
+                    self._recent_calls.popleft()
+                if len(self._recent_calls) >= self.requests_per_minute:
+                    self.stats["rate_limited"] += 1
+                    retry_after = 60.0 - (now - self._recent_calls[0])
+                    raise RateLimitError("Simulated requests-per-minute limit exceeded", retry_after)
+                self._recent_calls.append(now)
+            
+            roll = self._rng.random()
+            if roll < self.rate_limit_rate:
+                self.stats["rate_limited"] += 1
+                raise RateLimitError("Simulated rate limit", self.retry_after)
+            if roll < self.rate_limit_rate + self.error_rate:
+                self.stats["errors"] += 1
+                raise LLMProviderError("Simulated provider error")
+            
+            delay = self._rng.lognormvariate(self._mu, self._sigma) / 1000.0
+            self.stats["simulated_seconds"] += delay
+            return delay
+    
+    def _response_tokens(self, prompt: str) -> List[str]:
+        """Build a deterministic response for a prompt."""
+        digest = hashlib.blake2b(prompt.encode("utf-8"), digest_size=8).digest()
+        offset = int.from_bytes(digest, "big")
+        return [f"{_WORDS[(offset + i) % len(_WORDS)]} " for i in range(self.response_tokens)]
+    
+    def _wait(self, seconds: float):
+        """Sleep for simulated time when running in realtime mode."""
+        if self.realtime and seconds > 0:
+            time.sleep(seconds)
+
+
+def create_llm(provider: str, **options):
+    """
+    Create an LLM client for a provider name.
+    
+    Args:
+        provider: Provider name (openai, anthropic, simulated)
+        **options: Provider-specific options
+        
+    Returns:
+        Object exposing ``invoke(prompt)`` and ``stream(prompt)``
+    """
+    if provider == "simulated":
+        return SimulatedLLM(**options)
+    if provider == "openai":
+        from src.agents.llm_client import OpenAIChat
+        return OpenAIChat(**options)
+    if provider == "anthropic":
+        from src.agents.llm_client import AnthropicChat
+        return AnthropicChat(**options)
+    raise ValueError(f"Unknown LLM provider: {provider}")
+
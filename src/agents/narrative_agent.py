@@ -2,10 +2,17 @@
 Narrative Generation Agent using LangChain
 """
 
-from typing import Optional, Dict
+from typing import Optional, Dict, Iterator, Sequence, Tuple
+import time
 from langchain.agents import AgentExecutor
 from langchain.prompts import PromptTemplate
 
+from src.agents.llm_providers import create_llm
+from src.agents.prompt_registry import get_prompt_registry
+from src.cache.response_cache import ResponseCache, version_namespace
+from src.cache.semantic_cache import SemanticCache
+from src.utils.tracing import get_tracer
+
 
 class NarrativeAgent:
     """
@@ -16,7 +23,11 @@ class NarrativeAgent:
         self,
         prompt_template: Optional[str] = None,
         cache_enabled: bool = True,
-        llm_provider: str = "openai"
+        llm_provider: str = "openai",
+        llm_options: Optional[Dict] = None,
+        cache: Optional[ResponseCache] = None,
+        semantic_cache: Optional[SemanticCache] = None,
+        tracer=None
     ):
         """
         Initialize the narrative agent.
@@ -24,27 +35,176 @@ class NarrativeAgent:
         Args:
             prompt_template: Path to prompt template file
             cache_enabled: Enable response caching
-            llm_provider: LLM provider (openai, anthropic)
+            llm_provider: LLM provider (openai, anthropic, simulated)
+            llm_options: Keyword arguments for the provider client
+            cache: Response cache to share (created on demand if caching is enabled)
+            semantic_cache: Optional similarity tier consulted after exact-match misses
+            tracer: Tracer for stage spans (defaults to the process-wide tracer)
         """
         self.prompt_template = prompt_template
         self.cache_enabled = cache_enabled
         self.llm_provider = llm_provider
+        self.llm_options = llm_options or {}
         self.agent = None
         self.prompt = None
+        self.llm = None
+        self.cache = cache
+        if self.cache is None and cache_enabled:
+            self.cache = ResponseCache()
+        self.semantic_cache = semantic_cache
+        self.tracer = tracer or get_tracer()
         
         if prompt_template:
             self._load_prompt_template()
     
     def _load_prompt_template(self):
-        """Load prompt template from file."""
-        # TODO: Implement prompt template loading
-        pass
+        """Load prompt template from the shared registry (parsed once per file)."""
+        self.prompt = get_prompt_registry().get(self.prompt_template)
     
-    def create_narrative(
+    def cache_versions(self) -> Dict[str, str]:
+        """
+        Prompt and model version stamps for this agent's cache entries.
+        
+        Passed on every cache call instead of being set on the cache, so
+        agents with different templates or models can share one cache.
+        
+        Returns:
+            Version stamps (see ResponseCache.namespace_for)
+        """
+        prompt_version = "none"
+        if self.prompt_template:
+            prompt_version = get_prompt_registry().version(self.prompt_template)
+        model = f"{self.llm_provider}:{self.llm_options.get('model', 'default')}"
+        return {"prompt": prompt_version, "model": model}
+    
+    def _get_llm(self):
+        """Create the provider client on first use."""
+        if self.llm is None:
+            self.llm = create_llm(self.llm_provider, **self.llm_options)
+        return self.llm
+    
+    def _build_prompt(
         self,
         presentation_id: str,
         context: str,
         query: Optional[str] = None
+    ) -> str:
+        """
+        Format the prompt for a narrative request.
+        
+        Args:
+            presentation_id: ID of the presentation
+            context: Contextual information
+            query: Optional specific query
+            
+        Returns:
+            Prompt text
+        """
+        variables = ()
+        if self.prompt_template:
+            # Re-fetch so edits to the template file are picked up
+            self.prompt = get_prompt_registry().get(self.prompt_template)
+            variables = self.prompt.input_variables
+            values = {
+                "context": context,
+                "presentation_id": presentation_id,
+                "presentation_title": presentation_id,
+                "topic": "General",
+                "key_concepts": "",
+                "query": query or "",
+            }
+            prompt_text = self.prompt.format(**{name: values.get(name, "") for name in variables})
+        else:
+            prompt_text = f"Presentation: {presentation_id}\n\nContext: {context}\n"
+        
+        if query and "query" not in variables:
+            prompt_text += f"\nQuestion: {query}\n"
+        return prompt_text
+    
+    def _cache_lookup(
+        self,
+        presentation_id: str,
+        context: str,
+        query: Optional[str],
+        chunk_ids: Optional[Sequence[str]] = None,
+        versions: Optional[Dict[str, str]] = None
+    ) -> Optional[str]:
+        """Check the exact-match cache, then the semantic tier."""
+        with self.tracer.span("cache_lookup") as span:
+            cached, outcome = self._lookup_tiers(presentation_id, context, query, chunk_ids, versions)
+            span.set(cache=outcome)
+        return cached
+    
+    def _lookup_tiers(
+        self,
+        presentation_id: str,
+        context: str,
+        query: Optional[str],
+        chunk_ids: Optional[Sequence[str]],
+        versions: Optional[Dict[str, str]] = None
+    ) -> Tuple[Optional[str], str]:
+        """Cached narrative (or None) and the outcome: hit, semantic_hit, miss or disabled."""
+        if not self.cache_enabled:
+            return None, "disabled"
+        # Versions are re-read so prompt template edits take effect
+        versions = {**self.cache_versions(), **(versions or {})}
+        if self.cache is not None:
+            cached = self.cache.get(f"{presentation_id}|{query or ''}", context, chunk_ids, versions=versions)
+            if cached is not None:
+                return cached, "hit"
+        if self.semantic_cache is not None and query:
+            scope = self._semantic_scope(presentation_id, context, chunk_ids, versions)
+            start = time.perf_counter()
+            cached = self.semantic_cache.lookup(query, scope)
+            if self.cache is not None:
+                self.cache.metrics.record_lookup("semantic", cached is not None, time.perf_counter() - start)
+            if cached is not None:
+                return cached, "semantic_hit"
+        return None, "miss"
+    
+    def _record_llm_call(self, seconds: float):
+        """Feed LLM latency into the cache's savings estimate."""
+        if self.cache is not None:
+            self.cache.metrics.record_llm_call(seconds)
+    
+    def _cache_store(
+        self,
+        presentation_id: str,
+        context: str,
+        query: Optional[str],
+        narrative: str,
+        chunk_ids: Optional[Sequence[str]] = None,
+        versions: Optional[Dict[str, str]] = None
+    ):
+        """Store a generated narrative in every enabled cache tier."""
+        if not self.cache_enabled:
+            return
+        versions = {**self.cache_versions(), **(versions or {})}
+        with self.tracer.span("cache_store"):
+            if self.cache is not None:
+                self.cache.set(f"{presentation_id}|{query or ''}", context, narrative, chunk_ids, versions=versions)
+            if self.semantic_cache is not None and query:
+                scope = self._semantic_scope(presentation_id, context, chunk_ids, versions)
+                self.semantic_cache.add(query, scope, narrative)
+    
+    def _semantic_scope(
+        self,
+        presentation_id: str,
+        context: str,
+        chunk_ids: Optional[Sequence[str]],
+        versions: Dict[str, str]
+    ) -> str:
+        """Semantic tier scope, under the same version namespace as exact-match keys."""
+        namespace = self.cache.namespace_for(versions) if self.cache is not None else version_namespace(versions)
+        return SemanticCache.scope_for(presentation_id, context, chunk_ids, namespace)
+    
+    def create_narrative(
+        self,
+        presentation_id: str,
+        context: str,
+        query: Optional[str] = None,
+        chunk_ids: Optional[Sequence[str]] = None,
+        versions: Optional[Dict[str, str]] = None
     ) -> str:
         """
         Create narrative for a presentation.
@@ -53,11 +213,68 @@ class NarrativeAgent:
             presentation_id: ID of the presentation
             context: Contextual information
             query: Optional specific query
+            chunk_ids: IDs of the retrieved chunks in context (cheaper cache keys)
+            versions: Extra cache version stamps, e.g. the index (see cache_versions)
             
         Returns:
             Generated narrative
         """
-        # TODO: Implement narrative creation with agent
-        narrative = f"Narrative for {presentation_id}: {context}"
-        return narrative
+        with self.tracer.request():
+            cached = self._cache_lookup(presentation_id, context, query, chunk_ids, versions)
+            if cached is not None:
+                return cached
+            
+            with self.tracer.span("prompt_build") as span:
+                prompt_text = self._build_prompt(presentation_id, context, query)
+                span.set(prompt_tokens=len(prompt_text.split()))
+            with self.tracer.span("llm", provider=self.llm_provider) as span:
+                start = time.perf_counter()
+                result = self._get_llm().invoke(prompt_text)
+                self._record_llm_call(time.perf_counter() - start)
+                narrative = getattr(result, "content", result)
+                span.set(response_tokens=len(narrative.split()))
+            
+            self._cache_store(presentation_id, context, query, narrative, chunk_ids, versions)
+            return narrative
+    
+    def stream_narrative(
+        self,
+        presentation_id: str,
+        context: str,
+        query: Optional[str] = None,
+        chunk_ids: Optional[Sequence[str]] = None,
+        versions: Optional[Dict[str, str]] = None
+    ) -> Iterator[str]:
+        """
+        Stream a narrative for a presentation as it is generated.
+        
+        Args:
+            presentation_id: ID of the presentation
+            context: Contextual information
+            query: Optional specific query
+            chunk_ids: IDs of the retrieved chunks in context (cheaper cache keys)
+            versions: Extra cache version stamps, e.g. the index (see cache_versions)
+            
+        Yields:
+            Narrative text fragments
+        """
+        cached = self._cache_lookup(presentation_id, context, query, chunk_ids, versions)
+        if cached is not None:
+            yield cached
+            return
+        
+        with self.tracer.span("prompt_build") as span:
+            prompt_text = self._build_prompt(presentation_id, context, query)
+            span.set(prompt_tokens=len(prompt_text.split()))
+        fragments = []
+        with self.tracer.span("llm", provider=self.llm_provider, streamed=True) as span:
+            start = time.perf_counter()
+            for chunk in self._get_llm().stream(prompt_text):
+                fragment = getattr(chunk, "content", chunk)
+                fragments.append(fragment)
+                yield fragment
+            self._record_llm_call(time.perf_counter() - start)
+            span.set(fragments=len(fragments))
+        
+        self._cache_store(presentation_id, context, query, "".join(fragments), chunk_ids, versions)
 
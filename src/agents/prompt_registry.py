@@ -0,0 +1,180 @@
+"""
+Process-wide Prompt Template Registry
+Parses and validates each template file once and reloads it only when it changes on disk.
+"""
+
+from typing import Dict, Iterable, Optional, Tuple
+from dataclasses import dataclass
+from pathlib import Path
+from string import Formatter
+import hashlib
+import os
+import threading
+import time
+
+from langchain.prompts import PromptTemplate
+
+
+@dataclass
+class _TemplateEntry:
+    """Compiled template together with the file state it was built from."""
+    template: PromptTemplate
+    mtime_ns: int
+    size: int
+    version: str
+    checked_at: float
+
+
+class PromptRegistry:
+    """
+    Cache of compiled prompt templates keyed by file path.
+    
+    Lookups are lock-free while an entry is fresh; the file is only stat'ed
+    again once ``check_interval`` seconds have passed, and only re-parsed
+    when its modification time or size changed.
+    """
+    
+    def __init__(
+        self,
+        check_interval: float = 1.0,
+        required_variables: Iterable[str] = ("context",)
+    ):
+        """
+        Initialize the registry.
+        
+        Args:
+            check_interval: Seconds between on-disk change checks per template
+            required_variables: Variables every template must declare
+        """
+        self.check_interval = check_interval
+        self.required_variables = tuple(required_variables)
+        self._entries: Dict[str, _TemplateEntry] = {}
+        self._lock = threading.Lock()
+    
+    def get(self, path: str) -> PromptTemplate:
+        """
+        Get the compiled template for a file, reloading it if it changed.
+        
+        Args:
+            path: Path to prompt template file
+            
+        Returns:
+            Compiled PromptTemplate
+        """
+        return self._get_entry(path).template
+    
+    def version(self, path: str) -> str:
+        """
+        Get the content version of a template.
+        
+        Args:
+            path: Path to prompt template file
+            
+        Returns:
+            Short hash of the template text
+        """
+        return self._get_entry(path).version
+    
+    def invalidate(self, path: Optional[str] = None):
+        """
+        Drop compiled templates so they are re-read on next access.
+        
+        Args:
+            path: Template to drop (all templates if None)
+        """
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(os.fspath(path), None)
+    
+    def _get_entry(self, path: str) -> _TemplateEntry:
+        """Return a fresh entry for path, compiling or reloading as needed."""
+        key = os.fspath(path)
+        entry = self._entries.get(key)
+        now = time.monotonic()
+        if entry is not None and now - entry.checked_at < self.check_interval:
+            return entry
+        
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry.checked_at < self.check_interval:
+                return entry
+            
+            stat = os.stat(key)
+            if entry is not None and (entry.mtime_ns, entry.size) == (stat.st_mtime_ns, stat.st_size):
+                entry.checked_at = now
+                return entry
+            
+            entry = self._compile(key, stat.st_mtime_ns, stat.st_size, now)
+            self._entries[key] = entry
+            return entry
+    
+    def _compile(self, path: str, mtime_ns: int, size: int, now: float) -> _TemplateEntry:
+        """
+        Read, validate and compile a template file.
+        
+        Args:
+            path: Path to prompt template file
+            mtime_ns: Modification time the entry is built from
+            size: File size the entry is built from
+            now: Monotonic timestamp of this check
+            
+        Returns:
+            New registry entry
+        """
+        text = Path(path).read_text(encoding="utf-8")
+        variables = self._parse_variables(path, text)
+        
+        missing = [name for name in self.required_variables if name not in variables]
+        if missing:
+            raise ValueError(f"Prompt template {path} is missing variables: {', '.join(missing)}")
+        
+        template = PromptTemplate(template=text, input_variables=sorted(variables))
+        version = hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest()
+        return _TemplateEntry(template, mtime_ns, size, version, now)
+    
+    @staticmethod
+    def _parse_variables(path: str, text: str) -> Tuple[str, ...]:
+        """
+        Extract format variables, rejecting malformed templates.
+        
+        Args:
+            path: Template path (for error messages)
+            text: Template text
+            
+        Returns:
+            Unique variable names in order of appearance
+        """
+        names = []
+        try:
+            for _, field_name, _, _ in Formatter().parse(text):
+                if field_name is None:
+                    continue
+                if not field_name.isidentifier():
+                    raise ValueError(f"invalid placeholder {{{field_name}}}")
+                if field_name not in names:
+                    names.append(field_name)
+        except ValueError as e:
+            raise ValueError(f"Malformed prompt template {path}: {e}") from e
+        return tuple(names)
+
+
+_registry: Optional[PromptRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_prompt_registry() -> PromptRegistry:
+    """
+    Get the process-wide prompt registry.
+    
+    Returns:
+        Shared PromptRegistry instance
+    """
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = PromptRegistry()
+    return _registry
+
@@ -0,0 +1,829 @@
+"""
+Shared Backends for the Response Cache
+One JSON file per entry (legacy), a single indexed SQLite store, or Redis.
+"""
+
+from typing import Dict, List, Optional
+from contextlib import contextmanager
+from pathlib import Path
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from src.cache.compression import CodecError, PayloadCodec, RAW
+from src.cache.file_lock import InterProcessLock
+
+# Temp files left by writers that crashed are removed after this many seconds
+STALE_TEMP_SECONDS = 60.0
+
+# mtime of file entries that never expire (2100-01-01), so sweeps skip them with stat() alone
+NEVER_EXPIRES = 4102444800.0
+
+
+class _LockedMaintenance:
+    """Mixin guarding sweeps and clears with an optional cross-process lock."""
+    
+    lock: Optional[InterProcessLock] = None
+    
+    @contextmanager
+    def _maintenance(self, blocking: bool = True):
+        """
+        Hold the maintenance lock, if configured.
+        
+        Yields:
+            False when blocking is off and another process holds the lock
+        """
+        if self.lock is None:
+            yield True
+            return
+        acquired = self.lock.acquire(blocking)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                self.lock.release()
+
+
+class FileCacheBackend(_LockedMaintenance):
+    """
+    Stores each entry as ``<key>.json`` in the cache directory.
+    
+    Entries below the codec's threshold stay plain JSON; larger ones are
+    written as tagged compressed payloads. Writes go to a temp file that is
+    renamed into place, so concurrent readers in other processes never see a
+    partial entry, and unreadable entries are treated as misses and removed.
+    """
+    
+    def __init__(
+        self,
+        cache_dir: str = "cache/responses",
+        codec: Optional[PayloadCodec] = None,
+        lock: bool = False
+    ):
+        """
+        Initialize the backend.
+        
+        Args:
+            cache_dir: Directory for cache files
+            codec: Payload codec (entries are stored uncompressed if None)
+            lock: Serialize sweeps and clears across processes with a lock file
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.codec = codec or PayloadCodec(None)
+        self.lock = InterProcessLock(self.cache_dir / ".lock") if lock else None
+    
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+    
+    def _read(self, path: Path) -> Dict:
+        """Read a plain JSON or compressed entry file."""
+        with open(path, 'rb') as f:
+            raw = f.read()
+        if raw[:1] == b"{":
+            return json.loads(raw)
+        return json.loads(self.codec.decode(raw))
+    
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Read an entry.
+        
+        Args:
+            key: Cache key
+            
+        Returns:
+            Entry dictionary or None
+        """
+        path = self._path(key)
+        try:
+            return self._read(path)
+        except FileNotFoundError:
+            return None
+        except CodecError:
+            # Written with another dictionary or codec; leave it to expire as the
+            # other backends do, so rolling out a new dictionary keeps the cache
+            return None
+        except ValueError as e:
+            # Truncated or undecodable entry (e.g. left by a crash before atomic writes)
+            print(f"Skipping corrupt cache entry {key}: {e}")
+            self._discard(path)
+            return None
+    
+    @staticmethod
+    def _discard(path: Path):
+        try:
+            path.unlink()
+        except OSError:
+            pass
+    
+    def set(self, key: str, entry: Dict):
+        """
+        Write an entry.
+        
+        Args:
+            key: Cache key
+            entry: Entry with query, response, timestamp and expires_at
+        """
+        data = json.dumps(entry).encode('utf-8')
+        blob = self.codec.encode(data)
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{key}.", suffix=".tmp", dir=self.cache_dir)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data if blob[:1] == RAW else blob)
+            # Mirror the expiry in the mtime so the sweeper only needs stat()
+            expires_at = entry.get('expires_at')
+            os.utime(tmp_path, (entry['timestamp'], NEVER_EXPIRES if expires_at is None else expires_at))
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            self._discard(Path(tmp_path))
+            raise
+    
+    def get_many(self, keys: List[str]) -> List[Optional[Dict]]:
+        """Read several entries."""
+        return [self.get(key) for key in keys]
+    
+    def set_many(self, entries: Dict[str, Dict]):
+        """Write several entries."""
+        for key, entry in entries.items():
+            self.set(key, entry)
+    
+    def delete(self, key: str):
+        """Remove an entry if present."""
+        try:
+            self._path(key).unlink()
+        except FileNotFoundError:
+            pass
+    
+    def sweep_expired(self, now: float, batch_size: int = 500, pause: float = 0.01,
+                      stop_event: Optional[threading.Event] = None) -> int:
+        """
+        Delete expired entries, pausing between batches.
+        
+        Expiry is read from each file's mtime (NEVER_EXPIRES for entries
+        without one), so only entries that look expired are read: entries
+        written before non-expiring ones were marked keep their write time as
+        mtime, and are re-marked instead of deleted. Temp files abandoned by crashed writers
+        are removed too. With a lock, the sweep is skipped while another
+        process is sweeping.
+        
+        Args:
+            now: Current Unix time
+            batch_size: Entries examined between pauses
+            pause: Seconds to yield between batches
+            stop_event: Abort the sweep early when set
+            
+        Returns:
+            Number of entries deleted
+        """
+        removed = 0
+        examined = 0
+        with self._maintenance(blocking=False) as acquired:
+            if not acquired:
+                return 0
+            with os.scandir(self.cache_dir) as entries:
+                for entry in entries:
+                    is_entry = entry.name.endswith(".json")
+                    if is_entry:
+                        cutoff = now
+                    elif entry.name.endswith(".tmp"):
+                        cutoff = now - STALE_TEMP_SECONDS
+                    else:
+                        continue
+                    try:
+                        if entry.stat().st_mtime <= cutoff and (not is_entry or self._confirm_expired(entry.path, now)):
+                            os.unlink(entry.path)
+                            if is_entry:
+                                removed += 1
+                    except FileNotFoundError:
+                        pass
+                    examined += 1
+                    if examined % batch_size == 0 and _pause(pause, stop_event):
+                        break
+        return removed
+    
+    def _confirm_expired(self, path: str, now: float) -> bool:
+        """Whether an entry whose mtime says expired may go; never-expiring ones are re-marked instead."""
+        try:
+            data = self._read(Path(path))
+        except ValueError:
+            # Unreadable with this codec; go by the mtime
+            return True
+        if data.get('expires_at') is not None:
+            return True
+        os.utime(path, (data.get('timestamp', now), NEVER_EXPIRES))
+        return False
+    
+    def stats(self) -> Dict:
+        """
+        Summarize the store.
+        
+        Returns:
+            Dictionary with total_entries, total_bytes (on disk), payload_bytes
+            (stored entry data), oldest and newest timestamps
+        """
+        total_entries = 0
+        total_bytes = 0
+        timestamps = []
+        for cache_file in self.cache_dir.glob("*.json"):
+            try:
+                total_bytes += cache_file.stat().st_size
+                timestamps.append(self._read(cache_file).get('timestamp', 0))
+                total_entries += 1
+            except (OSError, ValueError):
+                pass
+        return {
+            'total_entries': total_entries,
+            'total_bytes': total_bytes,
+            'payload_bytes': total_bytes,
+            'oldest': min(timestamps) if timestamps else None,
+            'newest': max(timestamps) if timestamps else None,
+        }
+    
+    def list_entries(self, limit: int = 10) -> List[Dict]:
+        """
+        List entries.
+        
+        Args:
+            limit: Maximum number of entries
+            
+        Returns:
+            Entries with key, query, timestamp and size
+        """
+        entries = []
+        for cache_file in self.cache_dir.glob("*.json"):
+            if len(entries) >= limit:
+                break
+            try:
+                data = self._read(cache_file)
+                entries.append({
+                    'key': cache_file.stem,
+                    'query': data.get('query', 'N/A'),
+                    'timestamp': data.get('timestamp'),
+                    'size': cache_file.stat().st_size,
+                })
+            except (OSError, ValueError) as e:
+                entries.append({
+                    'key': cache_file.stem,
+                    'query': f'Error: {str(e)[:30]}',
+                    'timestamp': None,
+                    'size': 0,
+                })
+        return entries
+    
+    def find_keys(self, query_prefix: str, limit: int = 1000) -> List[str]:
+        """
+        Find keys of entries whose query starts with a prefix (reads every file).
+        
+        Args:
+            query_prefix: Query prefix (e.g. ``"<presentation_id>|"``)
+            limit: Maximum number of keys
+            
+        Returns:
+            Matching keys
+        """
+        keys = []
+        for cache_file in self.cache_dir.glob("*.json"):
+            if len(keys) >= limit:
+                break
+            try:
+                if (self._read(cache_file).get('query') or '').startswith(query_prefix):
+                    keys.append(cache_file.stem)
+            except (OSError, ValueError):
+                continue
+        return keys
+    
+    def count(self) -> int:
+        """Number of entries."""
+        return sum(1 for _ in self.cache_dir.glob("*.json"))
+    
+    def clear(self, older_than: Optional[float] = None) -> int:
+        """
+        Delete entries.
+        
+        Args:
+            older_than: Only delete entries written before this Unix time
+            
+        Returns:
+            Number of entries deleted
+        """
+        cleared = 0
+        with self._maintenance():
+            for cache_file in self.cache_dir.glob("*.json"):
+                if older_than is not None:
+                    try:
+                        if self._read(cache_file).get('timestamp', 0) > older_than:
+                            continue
+                    except (OSError, ValueError):
+                        pass
+                try:
+                    cache_file.unlink()
+                    cleared += 1
+                except OSError as e:
+                    print(f"Error deleting {cache_file}: {e}")
+        return cleared
+
+
+class SQLiteCacheBackend(_LockedMaintenance):
+    """
+    Stores all entries in one SQLite database in WAL mode.
+    
+    Lookups go through the primary key; stats, listing, age-based clearing and
+    expiry sweeps are indexed queries instead of directory scans. Responses
+    above the codec's threshold are stored as compressed BLOBs. Every write is
+    a transaction, so processes sharing the database never see partial entries.
+    """
+    
+    def __init__(
+        self,
+        cache_dir: str = "cache/responses",
+        filename: str = "cache.db",
+        codec: Optional[PayloadCodec] = None,
+        lock: bool = False
+    ):
+        """
+        Initialize the backend.
+        
+        Args:
+            cache_dir: Directory holding the database
+            filename: Database file name
+            codec: Payload codec for responses (stored as text if None)
+            lock: Let only one process sweep at a time (others skip their sweep)
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.cache_dir / filename
+        self.codec = codec or PayloadCodec(None)
+        self.lock = InterProcessLock(self.cache_dir / f"{filename}.lock") if lock else None
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY,"
+                " query TEXT,"
+                " response TEXT NOT NULL,"
+                " timestamp REAL NOT NULL,"
+                " expires_at REAL,"
+                " size INTEGER NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_timestamp ON entries(timestamp)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_expires_at ON entries(expires_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_query ON entries(query)")
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Per-thread connection (WAL lets readers and the writer run concurrently)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+    
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Read an entry.
+        
+        Args:
+            key: Cache key
+            
+        Returns:
+            Entry dictionary or None
+        """
+        row = self._connect().execute(
+            "SELECT query, response, timestamp, expires_at FROM entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        return self._entry(row)
+    
+    def _entry(self, row) -> Optional[Dict]:
+        """Build an entry from a (query, response, timestamp, expires_at) row."""
+        response = row[1]
+        if isinstance(response, bytes):
+            try:
+                response = self.codec.decode(response).decode('utf-8')
+            except CodecError:
+                return None
+        return {'query': row[0], 'response': response, 'timestamp': row[2], 'expires_at': row[3]}
+    
+    def get_many(self, keys: List[str]) -> List[Optional[Dict]]:
+        """Read several entries with batched IN queries."""
+        found = {}
+        conn = self._connect()
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            for row in conn.execute(
+                f"SELECT key, query, response, timestamp, expires_at FROM entries WHERE key IN ({placeholders})",
+                batch
+            ):
+                found[row[0]] = self._entry(row[1:])
+        return [found.get(key) for key in keys]
+    
+    def set(self, key: str, entry: Dict):
+        """
+        Write an entry.
+        
+        Args:
+            key: Cache key
+            entry: Entry with query, response, timestamp and expires_at
+        """
+        self.set_many({key: entry})
+    
+    def set_many(self, entries: Dict[str, Dict]):
+        """Write several entries in one transaction."""
+        rows = []
+        for key, entry in entries.items():
+            response = entry['response']
+            blob = self.codec.encode(response.encode('utf-8'))
+            if blob[:1] == RAW:
+                size = len(blob) - 1
+            else:
+                response = blob
+                size = len(blob)
+            size += len((entry.get('query') or '').encode('utf-8'))
+            rows.append((key, entry.get('query'), response, entry['timestamp'],
+                         entry.get('expires_at'), size))
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO entries (key, query, response, timestamp, expires_at, size)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+    
+    def delete(self, key: str):
+        """Remove an entry if present."""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+    
+    def sweep_expired(self, now: float, batch_size: int = 500, pause: float = 0.01,
+                      stop_event: Optional[threading.Event] = None) -> int:
+        """
+        Delete expired entries in short transactions.
+        
+        Args:
+            now: Current Unix time
+            batch_size: Rows deleted per transaction
+            pause: Seconds to yield between batches
+            stop_event: Abort the sweep early when set
+            
+        Returns:
+            Number of entries deleted
+        """
+        removed = 0
+        conn = self._connect()
+        with self._maintenance(blocking=False) as acquired:
+            if not acquired:
+                return 0
+            while True:
+                with conn:
+                    deleted = conn.execute(
+                        "DELETE FROM entries WHERE rowid IN ("
+                        " SELECT rowid FROM entries WHERE expires_at <= ? LIMIT ?)",
+                        (now, batch_size)
+                    ).rowcount
+                removed += deleted
+                if deleted < batch_size or _pause(pause, stop_event):
+                    return removed
+    
+    def stats(self) -> Dict:
+        """
+        Summarize the store.
+        
+        Returns:
+            Dictionary with total_entries, total_bytes (database size), payload_bytes
+            (stored entry data), oldest and newest timestamps
+        """
+        conn = self._connect()
+        total_entries, payload_bytes, oldest, newest = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0), MIN(timestamp), MAX(timestamp) FROM entries"
+        ).fetchone()
+        page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        return {
+            'total_entries': total_entries,
+            'total_bytes': page_count * page_size,
+            'payload_bytes': payload_bytes,
+            'oldest': oldest,
+            'newest': newest,
+        }
+    
+    def list_entries(self, limit: int = 10) -> List[Dict]:
+        """
+        List the most recent entries.
+        
+        Args:
+            limit: Maximum number of entries
+            
+        Returns:
+            Entries with key, query, timestamp and size
+        """
+        rows = self._connect().execute(
+            "SELECT key, query, timestamp, size FROM entries ORDER BY timestamp DESC LIMIT ?", (limit,)
+        ).fetchall()
+        return [{'key': r[0], 'query': r[1] or 'N/A', 'timestamp': r[2], 'size': r[3]} for r in rows]
+    
+    def find_keys(self, query_prefix: str, limit: int = 1000) -> List[str]:
+        """
+        Find keys of entries whose query starts with a prefix (index range scan).
+        
+        Args:
+            query_prefix: Query prefix (e.g. ``"<presentation_id>|"``)
+            limit: Maximum number of keys
+            
+        Returns:
+            Matching keys, most recent first
+        """
+        rows = self._connect().execute(
+            "SELECT key FROM entries WHERE query >= ? AND query < ? ORDER BY timestamp DESC LIMIT ?",
+            (query_prefix, query_prefix + "\uffff", limit)
+        ).fetchall()
+        return [row[0] for row in rows]
+    
+    def count(self) -> int:
+        """Number of entries."""
+        return self._connect().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+    
+    def clear(self, older_than: Optional[float] = None) -> int:
+        """
+        Delete entries.
+        
+        Args:
+            older_than: Only delete entries written before this Unix time
+            
+        Returns:
+            Number of entries deleted
+        """
+        with self._maintenance(), self._connect() as conn:
+            if older_than is None:
+                return conn.execute("DELETE FROM entries").rowcount
+            return conn.execute("DELETE FROM entries WHERE timestamp <= ?", (older_than,)).rowcount
+
+
+class RedisCacheBackend:
+    """
+    Stores entries in Redis so several pipeline replicas share one cache.
+    
+    Values expire through native Redis TTLs. A sorted set indexes keys by write
+    time for listing, stats and age-based clearing; batch operations are pipelined.
+    """
+    
+    def __init__(
+        self,
+        url: str = "redis://localhost:6379/0",
+        prefix: str = "rag:cache:",
+        compress: bool = False,
+        compress_threshold: int = 1024,
+        client=None,
+        codec: Optional[PayloadCodec] = None
+    ):
+        """
+        Initialize the backend.
+        
+        Args:
+            url: Redis connection URL
+            prefix: Key prefix for cache entries
+            compress: zlib-compress entries larger than compress_threshold
+            compress_threshold: Minimum serialized size in bytes to compress
+            client: Existing redis.Redis client to use instead of url
+            codec: Payload codec (overrides compress and compress_threshold)
+        """
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(url, protocol=2)
+        self.client = client
+        self.prefix = prefix
+        self.index_key = f"{prefix}__index__"
+        self.codec = codec or PayloadCodec("zlib" if compress else None, compress_threshold)
+    
+    def _key(self, key: str) -> str:
+        return self.prefix + key
+    
+    def _encode(self, entry: Dict) -> bytes:
+        """Serialize an entry as a tagged, possibly compressed payload."""
+        return self.codec.encode(json.dumps(entry).encode('utf-8'))
+    
+    def _decode(self, raw: Optional[bytes]) -> Optional[Dict]:
+        """Deserialize an entry written by _encode."""
+        if raw is None:
+            return None
+        try:
+            return json.loads(self.codec.decode(raw))
+        except CodecError:
+            return None
+    
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Read an entry.
+        
+        Args:
+            key: Cache key
+            
+        Returns:
+            Entry dictionary or None
+        """
+        return self._decode(self.client.get(self._key(key)))
+    
+    def get_many(self, keys: List[str]) -> List[Optional[Dict]]:
+        """Read several entries with one MGET."""
+        if not keys:
+            return []
+        return [self._decode(raw) for raw in self.client.mget([self._key(key) for key in keys])]
+    
+    def set(self, key: str, entry: Dict):
+        """
+        Write an entry.
+        
+        Args:
+            key: Cache key
+            entry: Entry with query, response, timestamp and expires_at
+        """
+        self.set_many({key: entry})
+    
+    def set_many(self, entries: Dict[str, Dict]):
+        """Write several entries in one pipeline round trip."""
+        now = time.time()
+        pipe = self.client.pipeline(transaction=False)
+        for key, entry in entries.items():
+            expires_at = entry.get('expires_at')
+            px = None
+            if expires_at is not None:
+                px = int((expires_at - now) * 1000)
+                if px <= 0:
+                    continue
+            pipe.set(self._key(key), self._encode(entry), px=px)
+            pipe.zadd(self.index_key, {key: entry['timestamp']})
+        pipe.execute()
+    
+    def delete(self, key: str):
+        """Remove an entry if present."""
+        pipe = self.client.pipeline(transaction=False)
+        pipe.delete(self._key(key))
+        pipe.zrem(self.index_key, key)
+        pipe.execute()
+    
+    def sweep_expired(self, now: float, batch_size: int = 500, pause: float = 0.01,
+                      stop_event: Optional[threading.Event] = None) -> int:
+        """
+        Drop index members whose values Redis has already expired.
+        
+        Args:
+            now: Current Unix time (unused; Redis expires values itself)
+            batch_size: Index members checked per pipeline
+            pause: Seconds to yield between batches
+            stop_event: Abort the sweep early when set
+            
+        Returns:
+            Number of index members removed
+        """
+        removed = 0
+        start = 0
+        while True:
+            members = self.client.zrange(self.index_key, start, start + batch_size - 1)
+            if not members:
+                return removed
+            pipe = self.client.pipeline(transaction=False)
+            for member in members:
+                pipe.exists(self._key(member.decode()))
+            stale = [m for m, exists in zip(members, pipe.execute()) if not exists]
+            if stale:
+                self.client.zrem(self.index_key, *stale)
+                removed += len(stale)
+            start += batch_size - len(stale)
+            if _pause(pause, stop_event):
+                return removed
+    
+    def stats(self) -> Dict:
+        """
+        Summarize the store.
+        
+        Returns:
+            Dictionary with total_entries, total_bytes, payload_bytes, oldest and
+            newest timestamps
+        """
+        total_entries = self.client.zcard(self.index_key)
+        oldest = self.client.zrange(self.index_key, 0, 0, withscores=True)
+        newest = self.client.zrevrange(self.index_key, 0, 0, withscores=True)
+        total_bytes = 0
+        for start in range(0, total_entries, 1000):
+            members = self.client.zrange(self.index_key, start, start + 999)
+            pipe = self.client.pipeline(transaction=False)
+            for member in members:
+                pipe.strlen(self._key(member.decode()))
+            total_bytes += sum(pipe.execute())
+        return {
+            'total_entries': total_entries,
+            'total_bytes': total_bytes,
+            'payload_bytes': total_bytes,
+            'oldest': oldest[0][1] if oldest else None,
+            'newest': newest[0][1] if newest else None,
+        }
+    
+    def list_entries(self, limit: int = 10) -> List[Dict]:
+        """
+        List the most recent entries.
+        
+        Args:
+            limit: Maximum number of entries
+            
+        Returns:
+            Entries with key, query, timestamp and size
+        """
+        members = self.client.zrevrange(self.index_key, 0, limit - 1, withscores=True)
+        if not members:
+            return []
+        raws = self.client.mget([self._key(member.decode()) for member, _ in members])
+        entries = []
+        for (member, timestamp), raw in zip(members, raws):
+            entry = self._decode(raw) or {}
+            entries.append({
+                'key': member.decode(),
+                'query': entry.get('query') or 'N/A',
+                'timestamp': timestamp,
+                'size': len(raw) if raw else 0,
+            })
+        return entries
+    
+    def find_keys(self, query_prefix: str, limit: int = 1000) -> List[str]:
+        """
+        Find keys of entries whose query starts with a prefix.
+        
+        Walks the index newest first, fetching values in MGET batches.
+        
+        Args:
+            query_prefix: Query prefix (e.g. ``"<presentation_id>|"``)
+            limit: Maximum number of keys
+            
+        Returns:
+            Matching keys, most recent first
+        """
+        keys = []
+        start = 0
+        while len(keys) < limit:
+            members = self.client.zrevrange(self.index_key, start, start + 499)
+            if not members:
+                break
+            names = [member.decode() for member in members]
+            for name, raw in zip(names, self.client.mget([self._key(name) for name in names])):
+                entry = self._decode(raw)
+                if entry and (entry.get('query') or '').startswith(query_prefix):
+                    keys.append(name)
+            start += len(members)
+        return keys[:limit]
+    
+    def count(self) -> int:
+        """Number of indexed entries."""
+        return self.client.zcard(self.index_key)
+    
+    def clear(self, older_than: Optional[float] = None) -> int:
+        """
+        Delete entries.
+        
+        Args:
+            older_than: Only delete entries written before this Unix time
+            
+        Returns:
+            Number of entries deleted
+        """
+        high = "+inf" if older_than is None else older_than
+        members = self.client.zrangebyscore(self.index_key, "-inf", high)
+        for start in range(0, len(members), 500):
+            batch = members[start:start + 500]
+            pipe = self.client.pipeline(transaction=False)
+            pipe.delete(*[self._key(member.decode()) for member in batch])
+            pipe.zrem(self.index_key, *batch)
+            pipe.execute()
+        return len(members)
+
+
+def _pause(seconds: float, stop_event: Optional[threading.Event]) -> bool:
+    """Yield between sweep batches; returns True if the sweep should stop."""
+    if stop_event is None:
+        time.sleep(seconds)
+        return False
+    return stop_event.wait(seconds)
+
+
+def create_backend(backend: str = "file", cache_dir: str = "cache/responses", **options):
+    """
+    Create a shared cache backend by name.
+    
+    Args:
+        backend: Backend name (file, sqlite, redis)
+        cache_dir: Cache directory (file and sqlite backends)
+        **options: Backend-specific options (e.g. codec, lock, or url for redis)
+        
+    Returns:
+        Backend instance
+    """
+    if backend == "file":
+        return FileCacheBackend(cache_dir, **options)
+    if backend == "sqlite":
+        return SQLiteCacheBackend(cache_dir, **options)
+    if backend == "redis":
+        return RedisCacheBackend(**options)
+    raise ValueError(f"Unknown cache backend: {backend}")
+
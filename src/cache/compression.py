@@ -0,0 +1,195 @@
+"""
+Compression of Cached Payloads
+Tagged zlib/zstd encoding with optional trained dictionaries, chosen by a size threshold.
+"""
+
+from typing import Dict, Iterable, Optional
+from collections import Counter
+import hashlib
+import zlib
+
+
+# One-byte tags written in front of every encoded payload
+RAW = b"j"
+ZLIB = b"z"
+ZLIB_DICT = b"d"
+ZSTD = b"s"
+ZSTD_DICT = b"t"
+
+
+class CodecError(ValueError):
+    """Raised when a payload cannot be decoded (unknown tag or dictionary)."""
+
+
+def _zstd():
+    """Import the optional zstandard module."""
+    try:
+        import zstandard
+    except ImportError as e:
+        raise ImportError("zstd compression requires the zstandard package: pip install zstandard") from e
+    return zstandard
+
+
+class PayloadCodec:
+    """
+    Encode cache payloads, compressing those at or above a size threshold.
+    
+    Payloads carry a one-byte tag (and a dictionary ID when a dictionary was
+    used), so entries written with different settings stay readable and a
+    dictionary change is detected instead of producing garbage.
+    """
+    
+    def __init__(
+        self,
+        method: Optional[str] = "zlib",
+        threshold: int = 1024,
+        level: int = 6,
+        dictionary: Optional[bytes] = None
+    ):
+        """
+        Initialize the codec.
+        
+        Args:
+            method: Compression method (zlib, zstd, or None to store payloads as-is)
+            threshold: Minimum payload size in bytes worth compressing
+            level: Compression level
+            dictionary: Dictionary trained on typical payloads (see train_dictionary)
+        """
+        if method not in (None, "none", "zlib", "zstd"):
+            raise ValueError(f"Unknown compression method: {method}")
+        self.method = None if method == "none" else method
+        self.threshold = threshold
+        self.level = level
+        self.dictionary = dictionary
+        self.dictionary_id = hashlib.blake2b(dictionary, digest_size=4).digest() if dictionary else b""
+        self._zstd_dict = None
+        if self.method == "zstd":
+            zstandard = _zstd()
+            if dictionary:
+                self._zstd_dict = zstandard.ZstdCompressionDict(dictionary)
+        self.stats: Dict[str, int] = {"encoded": 0, "compressed": 0, "raw_bytes": 0, "stored_bytes": 0}
+    
+    def encode(self, data: bytes) -> bytes:
+        """
+        Encode a payload.
+        
+        Args:
+            data: Serialized payload
+            
+        Returns:
+            Tagged payload (compressed only if that makes it smaller)
+        """
+        encoded = RAW + data
+        if self.method is not None and len(data) >= self.threshold:
+            compressed = self._compress(data)
+            if len(compressed) < len(encoded):
+                encoded = compressed
+                self.stats["compressed"] += 1
+        self.stats["encoded"] += 1
+        self.stats["raw_bytes"] += len(data)
+        self.stats["stored_bytes"] += len(encoded)
+        return encoded
+    
+    def _compress(self, data: bytes) -> bytes:
+        if self.method == "zstd":
+            zstandard = _zstd()
+            if self._zstd_dict is not None:
+                compressor = zstandard.ZstdCompressor(level=self.level, dict_data=self._zstd_dict)
+                return ZSTD_DICT + self.dictionary_id + compressor.compress(data)
+            return ZSTD + zstandard.ZstdCompressor(level=self.level).compress(data)
+        if self.dictionary:
+            compressor = zlib.compressobj(self.level, zdict=self.dictionary)
+            return ZLIB_DICT + self.dictionary_id + compressor.compress(data) + compressor.flush()
+        return ZLIB + zlib.compress(data, self.level)
+    
+    def decode(self, blob: bytes) -> bytes:
+        """
+        Decode a payload written by encode.
+        
+        Args:
+            blob: Tagged payload
+            
+        Returns:
+            Original payload bytes
+            
+        Raises:
+            CodecError: If the tag is unknown, the dictionary differs or the data is corrupt
+        """
+        tag = blob[:1]
+        try:
+            if tag == RAW:
+                return blob[1:]
+            if tag == ZLIB:
+                return zlib.decompress(blob[1:])
+            if tag in (ZLIB_DICT, ZSTD_DICT):
+                if blob[1:5] != self.dictionary_id:
+                    raise CodecError("payload was compressed with a different dictionary")
+                if tag == ZLIB_DICT:
+                    decompressor = zlib.decompressobj(zdict=self.dictionary)
+                    return decompressor.decompress(blob[5:]) + decompressor.flush()
+                return self._zstd_decompress(blob[5:], self.dictionary)
+            if tag == ZSTD:
+                return self._zstd_decompress(blob[1:])
+        except zlib.error as e:
+            raise CodecError(f"corrupt payload: {e}") from e
+        raise CodecError(f"unknown payload tag {tag!r}")
+    
+    @staticmethod
+    def _zstd_decompress(data: bytes, dictionary: Optional[bytes] = None) -> bytes:
+        zstandard = _zstd()
+        try:
+            if dictionary:
+                dict_data = zstandard.ZstdCompressionDict(dictionary)
+                return zstandard.ZstdDecompressor(dict_data=dict_data).decompress(data)
+            return zstandard.ZstdDecompressor().decompress(data)
+        except zstandard.ZstdError as e:
+            raise CodecError(f"corrupt payload: {e}") from e
+    
+    @property
+    def ratio(self) -> float:
+        """Stored bytes as a fraction of raw bytes over everything encoded so far."""
+        if not self.stats["raw_bytes"]:
+            return 1.0
+        return self.stats["stored_bytes"] / self.stats["raw_bytes"]
+
+
+def train_dictionary(samples: Iterable[str], size: int = 16 * 1024, method: str = "zlib") -> bytes:
+    """
+    Train a compression dictionary on sample payloads (e.g. past narratives).
+    
+    zstd uses its own trainer; for zlib the dictionary is built from the most
+    frequent phrases, with the most valuable ones last where zlib finds them
+    at the shortest distance.
+    
+    Args:
+        samples: Sample payload texts
+        size: Maximum dictionary size in bytes
+        method: Compression method the dictionary is for (zlib, zstd)
+        
+    Returns:
+        Dictionary bytes
+    """
+    samples = [sample for sample in samples if sample]
+    if method == "zstd":
+        encoded = [sample.encode('utf-8') for sample in samples]
+        return _zstd().train_dictionary(size, encoded).as_bytes()
+    
+    phrases = Counter()
+    for sample in samples:
+        words = sample.split()
+        for n in (2, 3, 4):
+            for i in range(len(words) - n + 1):
+                phrases[" ".join(words[i:i + n])] += 1
+    
+    chosen = []
+    used = 0
+    for phrase, count in sorted(phrases.items(), key=lambda item: item[1] * len(item[0]), reverse=True):
+        if count < 2:
+            break
+        phrase_bytes = (phrase + " ").encode('utf-8')
+        if used + len(phrase_bytes) > size:
+            break
+        chosen.append(phrase_bytes)
+        used += len(phrase_bytes)
+    return b"".join(reversed(chosen))
+
@@ -0,0 +1,83 @@
+"""
+Cross-process File Lock
+Advisory lock on a lock file so only one worker process sweeps or evicts a shared cache.
+"""
+
+from pathlib import Path
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class InterProcessLock:
+    """
+    Exclusive advisory lock held on a file (flock on POSIX, msvcrt on Windows).
+    
+    Threads of one process are serialized by an in-process lock first, since
+    the file lock itself is only exclusive between processes.
+    """
+    
+    def __init__(self, path: str):
+        """
+        Initialize the lock.
+        
+        Args:
+            path: Lock file path (created if missing)
+        """
+        self.path = Path(path)
+        self._fd = None
+        self._thread_lock = threading.Lock()
+    
+    def acquire(self, blocking: bool = True) -> bool:
+        """
+        Acquire the lock.
+        
+        Args:
+            blocking: Wait for the lock instead of failing immediately
+            
+        Returns:
+            True if the lock was acquired
+        """
+        if not self._thread_lock.acquire(blocking):
+            return False
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(fd, msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK, 1)
+        except OSError:
+            os.close(fd)
+            self._thread_lock.release()
+            if blocking:
+                raise
+            return False
+        self._fd = fd
+        return True
+    
+    def release(self):
+        """Release the lock if held."""
+        if self._fd is None:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            else:
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+            self._thread_lock.release()
+    
+    def __enter__(self) -> "InterProcessLock":
+        self.acquire()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
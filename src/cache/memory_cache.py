@@ -0,0 +1,155 @@
+"""
+Size-bounded In-Memory Cache Tier
+LRU eviction under both an entry-count and a byte-size limit, with per-entry expiry.
+"""
+
+from typing import Dict, List, Optional, Tuple, Union
+from collections import OrderedDict
+import sys
+import threading
+import time
+
+
+class LRUMemoryCache:
+    """
+    Least-recently-used cache bounded by entry count and total bytes.
+    
+    Values are strings or, for compressed entries, bytes; sizes are measured
+    on the stored objects so the byte limit reflects real memory use.
+    """
+    
+    def __init__(self, max_entries: int = 10000, max_bytes: int = 64 * 1024 * 1024):
+        """
+        Initialize the memory tier.
+        
+        Args:
+            max_entries: Maximum number of entries kept
+            max_bytes: Maximum total size of keys and values in bytes
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._data: "OrderedDict[str, Union[str, bytes]]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._expiry: Dict[str, float] = {}
+        self._hits: Dict[str, int] = {}
+        self._last_access: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {"evictions": 0, "evicted_bytes": 0, "expired": 0}
+    
+    @staticmethod
+    def _entry_size(key: str, value: Union[str, bytes]) -> int:
+        """Memory used by one entry's key and value objects."""
+        return sys.getsizeof(key) + sys.getsizeof(value)
+    
+    def get(self, key: str) -> Optional[Union[str, bytes]]:
+        """
+        Get a value and mark it as most recently used.
+        
+        Args:
+            key: Cache key
+            
+        Returns:
+            Cached value or None (also for expired entries)
+        """
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                return None
+            expires_at = self._expiry.get(key)
+            if expires_at is not None and time.time() >= expires_at:
+                self.stats["expired"] += 1
+                self._remove(key)
+                return None
+            self._data.move_to_end(key)
+            self._hits[key] = self._hits.get(key, 0) + 1
+            self._last_access[key] = time.time()
+            return value
+    
+    def set(self, key: str, value: Union[str, bytes], expires_at: Optional[float] = None):
+        """
+        Store a value, evicting least recently used entries if over a limit.
+        
+        Args:
+            key: Cache key
+            value: Value to cache
+            expires_at: Unix time after which the entry is expired (None for never)
+        """
+        size = self._entry_size(key, value)
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            if size > self.max_bytes:
+                # Larger than the whole tier; leave it to the disk tier
+                return
+            self._data[key] = value
+            self._sizes[key] = size
+            self._last_access[key] = time.time()
+            if expires_at is not None:
+                self._expiry[key] = expires_at
+            self.current_bytes += size
+            while len(self._data) > self.max_entries or self.current_bytes > self.max_bytes:
+                oldest = next(iter(self._data))
+                self.stats["evicted_bytes"] += self._sizes[oldest]
+                self.stats["evictions"] += 1
+                self._remove(oldest)
+    
+    def pop(self, key: str) -> Optional[Union[str, bytes]]:
+        """
+        Remove an entry.
+        
+        Args:
+            key: Cache key
+            
+        Returns:
+            Removed value or None
+        """
+        with self._lock:
+            if key not in self._data:
+                return None
+            return self._remove(key)
+    
+    def clear(self):
+        """Remove all entries."""
+        with self._lock:
+            self._data.clear()
+            self._sizes.clear()
+            self._expiry.clear()
+            self._hits.clear()
+            self._last_access.clear()
+            self.current_bytes = 0
+    
+    def hot_keys(self, limit: int = 1000, half_life: float = 3600.0) -> List[Tuple[str, float]]:
+        """
+        Rank entries by access frequency decayed by recency.
+        
+        Args:
+            limit: Maximum number of keys
+            half_life: Seconds after which an access counts half as much
+            
+        Returns:
+            (key, score) pairs, hottest first
+        """
+        now = time.time()
+        with self._lock:
+            scores = [
+                (key, (1 + self._hits.get(key, 0)) * 0.5 ** ((now - last) / half_life))
+                for key, last in self._last_access.items()
+            ]
+        scores.sort(key=lambda item: item[1], reverse=True)
+        return scores[:limit]
+    
+    def _remove(self, key: str) -> Union[str, bytes]:
+        """Remove an entry; caller holds the lock."""
+        self.current_bytes -= self._sizes.pop(key)
+        self._expiry.pop(key, None)
+        self._hits.pop(key, None)
+        self._last_access.pop(key, None)
+        return self._data.pop(key)
+    
+    def __contains__(self, key: str) -> bool:
+        return key in self._data
+    
+    def __len__(self) -> int:
+        return len(self._data)
+
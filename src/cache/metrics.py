@@ -0,0 +1,346 @@
+"""
+Cache Instrumentation
+Per-tier hit/miss/eviction counters, lookup latency histograms and estimated LLM time and cost saved.
+"""
+
+from typing import Dict, List, Optional, Sequence
+from bisect import bisect_left
+from pathlib import Path
+import json
+import os
+import threading
+import time
+
+
+# Upper bounds in seconds (the last bucket is +Inf)
+LOOKUP_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5)
+LLM_BUCKETS = (0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0, 64.0)
+
+TIERS = ("memory", "disk", "semantic")
+
+
+class LatencyHistogram:
+    """
+    Fixed-bucket latency histogram (cumulative counts are computed on export).
+    """
+    
+    def __init__(self, buckets: Sequence[float] = LOOKUP_BUCKETS):
+        """
+        Initialize the histogram.
+        
+        Args:
+            buckets: Increasing bucket upper bounds in seconds
+        """
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+    
+    def observe(self, seconds: float):
+        """Record one observation."""
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+    
+    def snapshot(self) -> Dict:
+        """Serializable copy of the histogram."""
+        return {"buckets": list(self.buckets), "counts": list(self.counts), "count": self.count, "sum": self.sum}
+
+
+def merge_histograms(snapshots: List[Dict]) -> Dict:
+    """
+    Add up histogram snapshots with identical buckets.
+    
+    Args:
+        snapshots: Histogram snapshots
+        
+    Returns:
+        Combined snapshot
+    """
+    merged = {"buckets": snapshots[0]["buckets"], "counts": [0] * len(snapshots[0]["counts"]),
+              "count": 0, "sum": 0.0}
+    for snapshot in snapshots:
+        merged["counts"] = [a + b for a, b in zip(merged["counts"], snapshot["counts"])]
+        merged["count"] += snapshot["count"]
+        merged["sum"] += snapshot["sum"]
+    return merged
+
+
+def histogram_quantile(snapshot: Dict, q: float) -> Optional[float]:
+    """
+    Estimate a quantile as the upper bound of the bucket containing it.
+    
+    Args:
+        snapshot: Histogram snapshot
+        q: Quantile between 0 and 1
+        
+    Returns:
+        Estimated quantile in seconds (None without observations or in the +Inf bucket)
+    """
+    if not snapshot["count"]:
+        return None
+    rank = q * snapshot["count"]
+    seen = 0
+    for bound, count in zip(snapshot["buckets"], snapshot["counts"]):
+        seen += count
+        if seen >= rank:
+            return bound
+    return None
+
+
+class CacheMetrics:
+    """
+    Thread-safe counters and histograms for one process's cache.
+    
+    Time and cost saved are estimated from the number of hits, using the mean
+    latency and cost of LLM calls actually observed (or configured defaults
+    before the first call).
+    """
+    
+    def __init__(self, llm_latency_seconds: float = 2.0, llm_cost_per_call: float = 0.0):
+        """
+        Initialize metrics.
+        
+        Args:
+            llm_latency_seconds: Assumed LLM latency until calls are observed
+            llm_cost_per_call: Assumed cost of one LLM call (e.g. in USD)
+        """
+        self.llm_latency_seconds = llm_latency_seconds
+        self.llm_cost_per_call = llm_cost_per_call
+        self._lock = threading.Lock()
+        self._counters = {tier: {"hits": 0, "misses": 0, "evictions": 0, "expired": 0} for tier in TIERS}
+        self._latency = {tier: LatencyHistogram() for tier in TIERS}
+        self._llm_latency = LatencyHistogram(LLM_BUCKETS)
+        self._llm_cost = 0.0
+    
+    def record_lookup(self, tier: str, hit: bool, seconds: float):
+        """
+        Record one lookup in a tier.
+        
+        Args:
+            tier: Cache tier (memory, disk, semantic)
+            hit: Whether the tier had the entry
+            seconds: Lookup duration
+        """
+        with self._lock:
+            self._counters[tier]["hits" if hit else "misses"] += 1
+            self._latency[tier].observe(seconds)
+    
+    def record_removal(self, tier: str, evictions: int = 0, expired: int = 0):
+        """
+        Record entries removed from a tier.
+        
+        Args:
+            tier: Cache tier
+            evictions: Entries evicted to respect size limits
+            expired: Entries removed after their TTL
+        """
+        with self._lock:
+            self._counters[tier]["evictions"] += evictions
+            self._counters[tier]["expired"] += expired
+    
+    def record_llm_call(self, seconds: float, cost: Optional[float] = None):
+        """
+        Record an LLM call made on a cache miss.
+        
+        Args:
+            seconds: Call duration
+            cost: Call cost (defaults to llm_cost_per_call)
+        """
+        with self._lock:
+            self._llm_latency.observe(seconds)
+            self._llm_cost += self.llm_cost_per_call if cost is None else cost
+    
+    def snapshot(self) -> Dict:
+        """
+        Serializable copy of all metrics, with derived hit rate and savings.
+        
+        Returns:
+            Metrics snapshot
+        """
+        with self._lock:
+            snapshot = {
+                "pid": os.getpid(),
+                "timestamp": time.time(),
+                "tiers": {
+                    tier: {**self._counters[tier], "latency": self._latency[tier].snapshot()}
+                    for tier in TIERS
+                },
+                "llm": {"latency": self._llm_latency.snapshot(), "cost": self._llm_cost},
+                "llm_latency_seconds": self.llm_latency_seconds,
+                "llm_cost_per_call": self.llm_cost_per_call,
+            }
+        return summarize(snapshot)
+
+
+def summarize(snapshot: Dict) -> Dict:
+    """
+    Add derived hit rate and estimated savings to a snapshot.
+    
+    Args:
+        snapshot: Metrics snapshot
+        
+    Returns:
+        The snapshot with requests, hits, hit_rate, saved_seconds and saved_cost
+    """
+    tiers = snapshot["tiers"]
+    hits = sum(tiers[tier]["hits"] for tier in TIERS)
+    # Every request checks the memory tier first, so its lookups count requests
+    requests = tiers["memory"]["hits"] + tiers["memory"]["misses"]
+    llm = snapshot["llm"]
+    calls = llm["latency"]["count"]
+    mean_latency = llm["latency"]["sum"] / calls if calls else snapshot["llm_latency_seconds"]
+    mean_cost = llm["cost"] / calls if calls else snapshot["llm_cost_per_call"]
+    snapshot["requests"] = requests
+    snapshot["hits"] = hits
+    snapshot["hit_rate"] = hits / requests if requests else 0.0
+    snapshot["saved_seconds"] = hits * mean_latency
+    snapshot["saved_cost"] = hits * mean_cost
+    return snapshot
+
+
+def merge_snapshots(snapshots: List[Dict]) -> Dict:
+    """
+    Combine snapshots from several worker processes.
+    
+    Args:
+        snapshots: Metrics snapshots
+        
+    Returns:
+        Combined snapshot
+    """
+    merged = {
+        "pid": None,
+        "timestamp": max(s["timestamp"] for s in snapshots),
+        "tiers": {},
+        "llm": {
+            "latency": merge_histograms([s["llm"]["latency"] for s in snapshots]),
+            "cost": sum(s["llm"]["cost"] for s in snapshots),
+        },
+        "llm_latency_seconds": snapshots[0]["llm_latency_seconds"],
+        "llm_cost_per_call": snapshots[0]["llm_cost_per_call"],
+    }
+    for tier in TIERS:
+        tier_snapshots = [s["tiers"][tier] for s in snapshots]
+        merged["tiers"][tier] = {
+            name: sum(t[name] for t in tier_snapshots) for name in ("hits", "misses", "evictions", "expired")
+        }
+        merged["tiers"][tier]["latency"] = merge_histograms([t["latency"] for t in tier_snapshots])
+    return summarize(merged)
+
+
+def process_alive(pid: int) -> bool:
+    """Whether a local process with this pid is running (always True on Windows)."""
+    if os.name == "nt":
+        # os.kill(pid, 0) would send CTRL_C_EVENT there
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def collect_snapshots(metrics_dir: Path, max_age: Optional[float] = None) -> List[Dict]:
+    """
+    Load the per-process snapshots written by ResponseCache.write_metrics.
+    
+    Files of processes that have exited are deleted, so restarts do not
+    accumulate snapshots forever.
+    
+    Args:
+        metrics_dir: The cache's ``metrics`` directory
+        max_age: Skip snapshots not rewritten for this many seconds (e.g. from
+            another host sharing the directory, or a reused pid)
+        
+    Returns:
+        Snapshots of live processes
+    """
+    snapshots = []
+    now = time.time()
+    for path in Path(metrics_dir).glob("*.json"):
+        try:
+            if path.stem.isdigit() and not process_alive(int(path.stem)):
+                path.unlink()
+                continue
+            if max_age is not None and now - path.stat().st_mtime > max_age:
+                continue
+            snapshots.append(json.loads(path.read_text()))
+        except (OSError, ValueError):
+            continue
+    return snapshots
+
+
+def histogram_lines(name: str, labels: str, snapshot: Dict) -> List[str]:
+    """
+    Prometheus exposition lines for one histogram snapshot.
+    
+    Args:
+        name: Metric name
+        labels: Label string without braces (may be empty)
+        snapshot: Histogram snapshot
+        
+    Returns:
+        Bucket, sum and count lines
+    """
+    lines = []
+    cumulative = 0
+    separator = "," if labels else ""
+    for bound, count in zip(snapshot["buckets"] + ["+Inf"], snapshot["counts"]):
+        cumulative += count
+        lines.append(f'{name}_bucket{{{labels}{separator}le="{bound}"}} {cumulative}')
+    suffix = f"{{{labels}}}" if labels else ""
+    lines.append(f"{name}_sum{suffix} {snapshot['sum']}")
+    lines.append(f"{name}_count{suffix} {snapshot['count']}")
+    return lines
+
+
+def render_prometheus(snapshot: Dict) -> str:
+    """
+    Render a snapshot in the Prometheus text exposition format.
+    
+    Args:
+        snapshot: Metrics snapshot (from CacheMetrics.snapshot or merge_snapshots)
+        
+    Returns:
+        Exposition text
+    """
+    lines = [
+        "# HELP rag_cache_lookups_total Cache lookups by tier and result.",
+        "# TYPE rag_cache_lookups_total counter",
+    ]
+    for tier in TIERS:
+        for result in ("hits", "misses"):
+            lines.append(f'rag_cache_lookups_total{{tier="{tier}",result="{result[:-1]}"}} '
+                         f'{snapshot["tiers"][tier][result]}')
+    for name, help_text in (("evictions", "Entries evicted to respect size limits."),
+                            ("expired", "Entries removed after their TTL.")):
+        lines.append(f"# HELP rag_cache_{name}_total {help_text}")
+        lines.append(f"# TYPE rag_cache_{name}_total counter")
+        for tier in TIERS:
+            lines.append(f'rag_cache_{name}_total{{tier="{tier}"}} {snapshot["tiers"][tier][name]}')
+    
+    lines.append("# HELP rag_cache_lookup_seconds Cache lookup latency by tier.")
+    lines.append("# TYPE rag_cache_lookup_seconds histogram")
+    for tier in TIERS:
+        lines.extend(histogram_lines("rag_cache_lookup_seconds", f'tier="{tier}"',
+                                      snapshot["tiers"][tier]["latency"]))
+    
+    lines.append("# HELP rag_llm_call_seconds LLM call latency on cache misses.")
+    lines.append("# TYPE rag_llm_call_seconds histogram")
+    lines.extend(histogram_lines("rag_llm_call_seconds", "", snapshot["llm"]["latency"]))
+    
+    for name, kind, help_text, value in (
+        ("rag_cache_hit_ratio", "gauge", "Requests answered by any cache tier.", snapshot["hit_rate"]),
+        ("rag_cache_saved_seconds_total", "counter", "Estimated LLM time saved by cache hits.",
+         snapshot["saved_seconds"]),
+        ("rag_cache_saved_cost_total", "counter", "Estimated LLM cost saved by cache hits.",
+         snapshot["saved_cost"]),
+    ):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.append(f"{name} {value}")
+    return "\n".join(lines) + "\n"
+
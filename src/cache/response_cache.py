@@ -3,71 +3,262 @@ LLM Response Caching System
 Optimizes performance by caching frequently requested responses.
 """
 
-from typing import Optional, Dict
+from typing import Callable, Optional, Dict, List, Sequence, Tuple
 import hashlib
 import json
+import os
+import threading
+import time
 from pathlib import Path
 
+from src.cache.backends import create_backend
+from src.cache.compression import PayloadCodec, RAW
+from src.cache.memory_cache import LRUMemoryCache
+from src.cache.metrics import CacheMetrics
+
+
+def version_namespace(versions: Dict[str, str]) -> str:
+    """Short, order-independent hash of a set of version stamps."""
+    material = "|".join(f"{name}={versions[name]}" for name in sorted(versions))
+    return hashlib.blake2b(material.encode(), digest_size=4).hexdigest()
+
 
 class ResponseCache:
     """
     Cache for LLM responses to improve performance.
     """
     
-    def __init__(self, cache_dir: str = "cache/responses", ttl: int = 3600):
+    def __init__(
+        self,
+        cache_dir: str = "cache/responses",
+        ttl: int = 3600,
+        max_memory_entries: int = 10000,
+        max_memory_bytes: int = 64 * 1024 * 1024,
+        backend: str = "file",
+        backend_options: Optional[Dict] = None,
+        versions: Optional[Dict[str, str]] = None,
+        compression: Optional[str] = None,
+        compress_threshold: int = 1024,
+        compression_dictionary: Optional[str] = None,
+        process_lock: bool = False,
+        metrics: Optional[CacheMetrics] = None
+    ):
         """
         Initialize response cache.
         
         Args:
             cache_dir: Directory for cache files
-            ttl: Time to live in seconds
+            ttl: Time to live in seconds (0 or None to never expire)
+            max_memory_entries: Entry limit of the in-memory tier
+            max_memory_bytes: Byte limit of the in-memory tier
+            backend: Shared backend (file: one JSON file per entry, sqlite: single
+                indexed store, redis: shared by several replicas)
+            backend_options: Extra backend options (e.g. url, compress for redis)
+            versions: Version stamps (index, prompt, model) that namespace all keys
+            compression: Compress payloads in every tier (zlib, zstd, or None)
+            compress_threshold: Minimum response size in bytes to compress
+            compression_dictionary: Path to a dictionary from train_dictionary
+            process_lock: Coordinate sweeps with other processes sharing cache_dir
+                (file and sqlite backends; writes are atomic either way)
+            metrics: Metrics collector (created with default LLM cost estimates if None)
         """
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(parents=True, exist_ok=True)
         self.ttl = ttl
-        self.memory_cache: Dict[str, str] = {}
+        dictionary = Path(compression_dictionary).read_bytes() if compression_dictionary else None
+        self.codec = PayloadCodec(compression, compress_threshold, dictionary=dictionary)
+        self.memory_cache = LRUMemoryCache(max_memory_entries, max_memory_bytes)
+        backend_options = dict(backend_options or {})
+        if self.codec.method is not None:
+            backend_options.setdefault("codec", self.codec)
+        if process_lock and backend in ("file", "sqlite"):
+            backend_options.setdefault("lock", True)
+        self.disk_cache = create_backend(backend, cache_dir, **backend_options)
+        self._sweeper: Optional["CacheSweeper"] = None
+        self.metrics = metrics or CacheMetrics()
+        self.versions: Dict[str, str] = {}
+        self.namespace = ""
+        self.set_versions(**(versions or {}))
+    
+    def set_versions(self, **versions: Optional[str]):
+        """
+        Update version stamps (e.g. index=..., prompt=..., model=...).
+        
+        Keys are prefixed with a namespace derived from all stamps, so bumping
+        any of them makes earlier entries unreachable without scanning; they
+        age out through TTL expiry and the sweeper.
+        
+        Args:
+            **versions: Version stamps to set (None values are ignored)
+        """
+        self.versions.update({name: str(value) for name, value in versions.items() if value is not None})
+        self.namespace = version_namespace(self.versions)
+    
+    def namespace_for(self, versions: Optional[Dict[str, str]] = None) -> str:
+        """
+        Namespace of the cache's own stamps overlaid with per-call ones.
+        
+        Callers with their own prompt, model or index versions (e.g. several
+        agents or pipelines sharing one cache) pass them per call rather than
+        calling set_versions, which would move every other caller to their
+        namespace.
+        
+        Args:
+            versions: Per-call version stamps (None values are ignored)
+            
+        Returns:
+            Key namespace
+        """
+        if not versions:
+            return self.namespace
+        merged = dict(self.versions)
+        merged.update({name: str(value) for name, value in versions.items() if value is not None})
+        return version_namespace(merged)
     
-    def _generate_key(self, query: str, context: str) -> str:
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        """Case-fold and collapse whitespace so trivially different queries share a key."""
+        return " ".join(query.casefold().split())
+    
+    def _generate_key(
+        self,
+        query: str,
+        context: str = "",
+        chunk_ids: Optional[Sequence[str]] = None,
+        versions: Optional[Dict[str, str]] = None
+    ) -> str:
         """
-        Generate cache key from query and context.
+        Generate cache key from the normalized query and retrieved chunk IDs.
         
         Args:
             query: User query
-            context: Context string
+            context: Context string (hashed only when chunk_ids is not given)
+            chunk_ids: IDs of the retrieved chunks the response is based on
+            versions: Per-call version stamps (see namespace_for)
             
         Returns:
-            Cache key (hash)
+            Cache key (namespace and hash)
         """
-        combined = f"{query}|||{context}"
-        return hashlib.md5(combined.encode()).hexdigest()
+        if chunk_ids is not None:
+            material = "\x1f".join(chunk_ids)
+        else:
+            material = context
+        combined = f"{self.normalize_query(query)}\x1e{material}"
+        digest = hashlib.blake2b(combined.encode(), digest_size=16).hexdigest()
+        return f"{self.namespace_for(versions)}_{digest}"
     
-    def get(self, query: str, context: str) -> Optional[str]:
+    def get(
+        self,
+        query: str,
+        context: str = "",
+        chunk_ids: Optional[Sequence[str]] = None,
+        versions: Optional[Dict[str, str]] = None
+    ) -> Optional[str]:
         """
         Get cached response if available.
         
         Args:
             query: User query
             context: Context string
+            chunk_ids: IDs of the retrieved chunks (preferred over hashing context)
+            versions: Per-call version stamps (see namespace_for)
             
         Returns:
             Cached response or None
         """
-        key = self._generate_key(query, context)
+        key = self._generate_key(query, context, chunk_ids, versions)
         
         # Check memory cache first
-        if key in self.memory_cache:
-            return self.memory_cache[key]
+        start = time.perf_counter()
+        response = self._memory_get(key)
+        self.metrics.record_lookup("memory", response is not None, time.perf_counter() - start)
+        if response is not None:
+            return response
         
         # Check disk cache
-        cache_file = self.cache_dir / f"{key}.json"
-        if cache_file.exists():
-            with open(cache_file, 'r') as f:
-                data = json.load(f)
-                return data.get('response')
+        start = time.perf_counter()
+        response = self._promote(key, self.disk_cache.get(key))
+        self.metrics.record_lookup("disk", response is not None, time.perf_counter() - start)
+        return response
+    
+    def get_many(
+        self,
+        items: List[Tuple[str, str]],
+        chunk_ids: Optional[Sequence[Optional[Sequence[str]]]] = None,
+        versions: Optional[Dict[str, str]] = None
+    ) -> List[Optional[str]]:
+        """
+        Get cached responses for several (query, context) pairs.
         
-        return None
+        Memory misses are fetched from the backend in one batched call.
+        
+        Args:
+            items: List of (query, context) pairs
+            chunk_ids: Retrieved chunk IDs per item, as for get (None entries hash context)
+            versions: Per-call version stamps (see namespace_for)
+            
+        Returns:
+            Cached responses (None for misses), in input order
+        """
+        keys = [
+            self._generate_key(query, context, ids, versions)
+            for (query, context), ids in zip(items, self._per_item(chunk_ids, len(items)))
+        ]
+        results = []
+        for key in keys:
+            start = time.perf_counter()
+            results.append(self._memory_get(key))
+            self.metrics.record_lookup("memory", results[-1] is not None, time.perf_counter() - start)
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing:
+            start = time.perf_counter()
+            entries = self.disk_cache.get_many([keys[i] for i in missing])
+            for i, data in zip(missing, entries):
+                results[i] = self._promote(keys[i], data)
+            # One batched round trip; attribute an equal share to each key
+            share = (time.perf_counter() - start) / len(missing)
+            for i in missing:
+                self.metrics.record_lookup("disk", results[i] is not None, share)
+        return results
+    
+    def _promote(self, key: str, data: Optional[Dict]) -> Optional[str]:
+        """Return a backend entry's response if unexpired, copying it into memory."""
+        if data is None:
+            return None
+        expires_at = self._expires_at(data)
+        if expires_at is not None and time.time() >= expires_at:
+            # Expired; the sweeper reclaims the entry off the request path
+            return None
+        response = data.get('response')
+        if response is not None:
+            # Promote disk hits so repeated lookups stay in memory
+            self._memory_set(key, response, expires_at)
+        return response
+    
+    def _memory_get(self, key: str) -> Optional[str]:
+        """Read the memory tier, decompressing compressed values."""
+        value = self.memory_cache.get(key)
+        if isinstance(value, bytes):
+            return self.codec.decode(value).decode('utf-8')
+        return value
+    
+    def _memory_set(self, key: str, response: str, expires_at: Optional[float]):
+        """Store in the memory tier, compressed when over the threshold."""
+        value = response
+        if self.codec.method is not None:
+            blob = self.codec.encode(response.encode('utf-8'))
+            if blob[:1] != RAW:
+                value = blob
+        self.memory_cache.set(key, value, expires_at)
     
-    def set(self, query: str, context: str, response: str):
+    def set(
+        self,
+        query: str,
+        context: str,
+        response: str,
+        chunk_ids: Optional[Sequence[str]] = None,
+        versions: Optional[Dict[str, str]] = None
+    ):
         """
         Cache a response.
         
@@ -75,18 +266,394 @@ class ResponseCache:
             query: User query
             context: Context string
             response: LLM response to cache
+            chunk_ids: IDs of the retrieved chunks (preferred over hashing context)
+            versions: Per-call version stamps (see namespace_for)
         """
-        key = self._generate_key(query, context)
+        key = self._generate_key(query, context, chunk_ids, versions)
+        now = time.time()
+        expires_at = now + self.ttl if self.ttl else None
         
         # Store in memory cache
-        self.memory_cache[key] = response
+        self._memory_set(key, response, expires_at)
         
         # Store in disk cache
-        cache_file = self.cache_dir / f"{key}.json"
-        with open(cache_file, 'w') as f:
-            json.dump({
+        self.disk_cache.set(key, {
+            'query': query,
+            'response': response,
+            'timestamp': now,
+            'expires_at': expires_at
+        })
+    
+    def set_many(
+        self,
+        items: List[Tuple[str, str, str]],
+        chunk_ids: Optional[Sequence[Optional[Sequence[str]]]] = None,
+        versions: Optional[Dict[str, str]] = None
+    ):
+        """
+        Cache several responses with one batched backend write.
+        
+        Args:
+            items: List of (query, context, response) triples
+            chunk_ids: Retrieved chunk IDs per item, as for set (None entries hash context)
+            versions: Per-call version stamps (see namespace_for)
+        """
+        now = time.time()
+        expires_at = now + self.ttl if self.ttl else None
+        entries = {}
+        for (query, context, response), ids in zip(items, self._per_item(chunk_ids, len(items))):
+            key = self._generate_key(query, context, ids, versions)
+            self._memory_set(key, response, expires_at)
+            entries[key] = {
                 'query': query,
                 'response': response,
-                'timestamp': Path(cache_file).stat().st_mtime
-            }, f)
+                'timestamp': now,
+                'expires_at': expires_at
+            }
+        self.disk_cache.set_many(entries)
+    
+    @staticmethod
+    def _per_item(chunk_ids: Optional[Sequence], count: int) -> Sequence:
+        """Per-item chunk IDs for the batch calls, checked against the item count."""
+        if chunk_ids is None:
+            return [None] * count
+        if len(chunk_ids) != count:
+            raise ValueError(f"Expected chunk_ids for {count} items, got {len(chunk_ids)}")
+        return chunk_ids
+    
+    def stats(self) -> Dict:
+        """
+        Report stored bytes for every tier.
+        
+        Returns:
+            Dictionary with memory, disk and compression statistics
+        """
+        return {
+            'memory': {
+                'entries': len(self.memory_cache),
+                'bytes': self.memory_cache.current_bytes,
+                'max_bytes': self.memory_cache.max_bytes,
+                **self.memory_cache.stats,
+            },
+            'disk': self.disk_cache.stats(),
+            'compression': {
+                'method': self.codec.method,
+                'ratio': self.codec.ratio,
+                **self.codec.stats,
+            },
+        }
+    
+    def _expires_at(self, data: Dict) -> Optional[float]:
+        """Expiry time of a disk entry (entries written before TTL support use timestamp + ttl)."""
+        if 'expires_at' in data:
+            return data['expires_at']
+        if self.ttl and 'timestamp' in data:
+            return data['timestamp'] + self.ttl
+        return None
+    
+    def sweep_expired(self, batch_size: int = 500, pause: float = 0.01,
+                      stop_event: Optional[threading.Event] = None) -> int:
+        """
+        Delete expired disk entries in small batches.
+        
+        Args:
+            batch_size: Entries examined between pauses
+            pause: Seconds to yield between batches
+            stop_event: Abort the sweep early when set
+            
+        Returns:
+            Number of entries deleted
+        """
+        if not self.ttl:
+            return 0
+        removed = self.disk_cache.sweep_expired(time.time(), batch_size, pause, stop_event)
+        self.metrics.record_removal("disk", expired=removed)
+        return removed
+    
+    def snapshot_hot_set(self, limit: int = 1000, half_life: float = 3600.0) -> Path:
+        """
+        Persist the hottest memory-tier keys for warm starts after a restart.
+        
+        Keys are ranked by access frequency decayed by recency, and saved with
+        their queries so a warm start can be limited to one presentation.
+        
+        Args:
+            limit: Maximum number of keys
+            half_life: Seconds after which an access counts half as much
+            
+        Returns:
+            Path of the snapshot (``_meta/hotset.json`` in the cache directory, outside
+            the backend's entry files so sweeps and clears leave it alone)
+        """
+        hot = self.memory_cache.hot_keys(limit, half_life)
+        if not hot:
+            # Nothing read yet (e.g. just restarted); keep the previous snapshot
+            return self.hot_set_path
+        entries = self.disk_cache.get_many([key for key, _ in hot])
+        snapshot = {
+            'namespace': self.namespace,
+            'created': time.time(),
+            'entries': [
+                {'key': key, 'score': score, 'query': data.get('query')}
+                for (key, score), data in zip(hot, entries)
+                if data is not None
+            ],
+        }
+        path = self.hot_set_path
+        path.parent.mkdir(exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(snapshot))
+        os.replace(tmp_path, path)
+        # Snapshots used to sit among the file backend's entries
+        try:
+            (self.cache_dir / "hotset.json").unlink()
+        except FileNotFoundError:
+            pass
+        return path
+    
+    @property
+    def hot_set_path(self) -> Path:
+        """Where snapshot_hot_set writes and warm starts read the hot set."""
+        return self.cache_dir / "_meta" / "hotset.json"
+    
+    def warm_start(
+        self,
+        max_bytes: Optional[int] = None,
+        max_entries: Optional[int] = None,
+        presentation_id: Optional[str] = None,
+        background: bool = True,
+        batch_size: int = 100,
+        versions: Optional[Dict[str, str]] = None
+    ):
+        """
+        Preload the persisted hot set into the memory tier.
+        
+        Args:
+            max_bytes: Memory budget for preloaded entries (default: half the memory tier)
+            max_entries: Maximum number of entries to preload
+            presentation_id: Only preload entries of this presentation, adding its
+                other stored entries after its hot ones (e.g. ahead of a class)
+            background: Load in a daemon thread instead of blocking
+            batch_size: Keys fetched per backend round trip
+            versions: Per-call version stamps the entries were stored under
+                (e.g. NarrativeAgent.cache_versions())
+                
+        Returns:
+            The running CacheWarmer if background, else the number of entries loaded
+        """
+        warmer = CacheWarmer(self, max_bytes, max_entries, presentation_id, batch_size, versions)
+        if background:
+            warmer.start()
+            return warmer
+        warmer.run()
+        return warmer.loaded
+    
+    def _warm_keys(
+        self,
+        presentation_id: Optional[str] = None,
+        versions: Optional[Dict[str, str]] = None
+    ) -> List[str]:
+        """Keys to preload: the hot set (current namespace only), hottest first."""
+        namespace = self.namespace_for(versions)
+        try:
+            snapshot = json.loads(self.hot_set_path.read_text())
+        except (OSError, ValueError):
+            snapshot = {'entries': []}
+        prefix = f"{presentation_id}|" if presentation_id is not None else None
+        keys = [
+            entry['key'] for entry in snapshot['entries']
+            if entry['key'].startswith(f"{namespace}_")
+            and (prefix is None or (entry.get('query') or '').startswith(prefix))
+        ]
+        if prefix is not None:
+            seen = set(keys)
+            keys.extend(
+                key for key in self.disk_cache.find_keys(prefix)
+                if key.startswith(f"{namespace}_") and key not in seen
+            )
+        return keys
+    
+    def metrics_snapshot(self) -> Dict:
+        """
+        Current metrics, including memory-tier evictions and expiries.
+        
+        Returns:
+            Metrics snapshot (see src.cache.metrics)
+        """
+        snapshot = self.metrics.snapshot()
+        memory = snapshot["tiers"]["memory"]
+        memory["evictions"] += self.memory_cache.stats["evictions"]
+        memory["expired"] += self.memory_cache.stats["expired"]
+        return snapshot
+    
+    def write_metrics(self) -> Path:
+        """
+        Write this process's metrics snapshot for CacheManager to collect.
+        
+        Each process writes ``metrics/<pid>.json`` under the cache directory.
+        
+        Returns:
+            Path of the snapshot file
+        """
+        metrics_dir = self.cache_dir / "metrics"
+        metrics_dir.mkdir(exist_ok=True)
+        path = metrics_dir / f"{os.getpid()}.json"
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(self.metrics_snapshot()))
+        os.replace(tmp_path, path)
+        return path
+    
+    def start_sweeper(self, interval: float = 300.0, batch_size: int = 500) -> "CacheSweeper":
+        """
+        Start the background thread that reclaims expired disk entries.
+        
+        Args:
+            interval: Seconds between sweeps
+            batch_size: Entries examined between pauses
+            
+        Returns:
+            The running sweeper
+        """
+        if self._sweeper is None or not self._sweeper.is_alive():
+            self._sweeper = CacheSweeper(self, interval, batch_size)
+            self._sweeper.start()
+        return self._sweeper
+    
+    def stop_sweeper(self):
+        """Stop the background sweeper if running."""
+        if self._sweeper is not None:
+            self._sweeper.stop()
+            self._sweeper = None
+
+
+class CacheSweeper(threading.Thread):
+    """
+    Daemon thread that periodically sweeps expired entries from the disk tier.
+    """
+    
+    def __init__(self, cache: ResponseCache, interval: float = 300.0, batch_size: int = 500):
+        """
+        Initialize the sweeper.
+        
+        Args:
+            cache: Cache to sweep
+            interval: Seconds between sweeps
+            batch_size: Entries examined between pauses
+        """
+        super().__init__(name="cache-sweeper", daemon=True)
+        self.cache = cache
+        self.interval = interval
+        self.batch_size = batch_size
+        self.removed = 0
+        self._stop_event = threading.Event()
+    
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.removed += self.cache.sweep_expired(self.batch_size, stop_event=self._stop_event)
+            except Exception as e:
+                # Keep sweeping; one bad pass must not end the thread
+                print(f"✗ Cache sweep failed: {type(e).__name__}: {e}")
+    
+    def stop(self, timeout: float = 5.0):
+        """Signal the sweeper to stop and wait for it."""
+        self._stop_event.set()
+        self.join(timeout)
+
+
+class CacheTask(threading.Thread):
+    """
+    Daemon thread running a cache action on a timer, and once more when stopped.
+    
+    Used for work that must not depend on TTL sweeping, such as publishing
+    metrics for CacheManager and snapshotting the hot set for warm starts.
+    """
+    
+    def __init__(self, name: str, action: Callable[[], object], interval: float, run_on_stop: bool = True):
+        """
+        Initialize the task.
+        
+        Args:
+            name: Thread name
+            action: Callable to run
+            interval: Seconds between runs (0: only when stopped)
+            run_on_stop: Run the action a last time in stop()
+        """
+        super().__init__(name=name, daemon=True)
+        self.action = action
+        self.interval = interval
+        self.run_on_stop = run_on_stop
+        self._stop_event = threading.Event()
+    
+    def run(self):
+        if not self.interval:
+            self._stop_event.wait()
+            return
+        while not self._stop_event.wait(self.interval):
+            self._run_action()
+    
+    def _run_action(self):
+        try:
+            self.action()
+        except Exception as e:
+            print(f"✗ {self.name} failed: {type(e).__name__}: {e}")
+    
+    def stop(self, timeout: float = 5.0):
+        """Signal the task to stop, wait for it, then run the action a last time."""
+        self._stop_event.set()
+        self.join(timeout)
+        if self.run_on_stop:
+            self._run_action()
+
+
+class CacheWarmer(threading.Thread):
+    """
+    Daemon thread that preloads hot entries into the memory tier after startup.
+    """
+    
+    def __init__(
+        self,
+        cache: ResponseCache,
+        max_bytes: Optional[int] = None,
+        max_entries: Optional[int] = None,
+        presentation_id: Optional[str] = None,
+        batch_size: int = 100,
+        versions: Optional[Dict[str, str]] = None
+    ):
+        """
+        Initialize the warmer.
+        
+        Args:
+            cache: Cache to warm
+            max_bytes: Memory budget for preloaded entries (default: half the memory tier)
+            max_entries: Maximum number of entries to preload
+            presentation_id: Only preload entries of this presentation
+            batch_size: Keys fetched per backend round trip
+            versions: Per-call version stamps the entries were stored under
+        """
+        super().__init__(name="cache-warmer", daemon=True)
+        self.cache = cache
+        self.max_bytes = max_bytes if max_bytes is not None else cache.memory_cache.max_bytes // 2
+        self.max_entries = max_entries
+        self.presentation_id = presentation_id
+        self.batch_size = batch_size
+        self.versions = versions
+        self.loaded = 0
+    
+    def run(self):
+        memory = self.cache.memory_cache
+        start_bytes = memory.current_bytes
+        keys = [key for key in self.cache._warm_keys(self.presentation_id, self.versions) if key not in memory]
+        if self.max_entries is not None:
+            keys = keys[:self.max_entries]
+        try:
+            for start in range(0, len(keys), self.batch_size):
+                batch = keys[start:start + self.batch_size]
+                for key, data in zip(batch, self.cache.disk_cache.get_many(batch)):
+                    if memory.current_bytes - start_bytes >= self.max_bytes:
+                        return
+                    if self.cache._promote(key, data) is not None:
+                        self.loaded += 1
+        except OSError as e:
+            print(f"Cache warm start failed: {e}")
 
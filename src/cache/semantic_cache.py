@@ -0,0 +1,196 @@
+"""
+Semantic Response Cache
+Serves cached narratives for paraphrased queries using query-embedding similarity.
+"""
+
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import hashlib
+import threading
+import time
+
+import numpy as np
+
+
+class _ScopeIndex:
+    """Fixed-capacity matrix of unit query embeddings for one scope."""
+    
+    def __init__(self, dim: int, capacity: int):
+        self.vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self.queries: List[Optional[str]] = [None] * capacity
+        self.responses: List[Optional[str]] = [None] * capacity
+        self.expires: List[Optional[float]] = [None] * capacity
+        self.count = 0
+        self.next_slot = 0
+    
+    def add(self, vector: np.ndarray, query: str, response: str, expires_at: Optional[float]):
+        """Insert an entry, overwriting the oldest once full."""
+        slot = self.next_slot
+        self.vectors[slot] = vector
+        self.queries[slot] = query
+        self.responses[slot] = response
+        self.expires[slot] = expires_at
+        self.next_slot = (slot + 1) % len(self.queries)
+        self.count = min(self.count + 1, len(self.queries))
+    
+    def search(self, vector: np.ndarray) -> Tuple[int, float]:
+        """Return the slot and cosine similarity of the nearest entry."""
+        scores = self.vectors[:self.count] @ vector
+        slot = int(np.argmax(scores))
+        return slot, float(scores[slot])
+    
+    def remove(self, slot: int):
+        """Disable an entry without compacting the matrix."""
+        self.vectors[slot] = 0.0
+        self.responses[slot] = None
+
+
+class SemanticCache:
+    """
+    Similarity-based cache tier, scoped per presentation and context.
+    
+    Each scope holds a small embedding matrix; a lookup returns the cached
+    narrative of the most similar earlier query when its cosine similarity
+    reaches ``threshold``.
+    """
+    
+    def __init__(
+        self,
+        embed_fn: Callable[[str], Sequence[float]],
+        threshold: float = 0.92,
+        max_entries_per_scope: int = 256,
+        max_scopes: int = 1024,
+        ttl: Optional[int] = 3600
+    ):
+        """
+        Initialize the semantic cache.
+        
+        Args:
+            embed_fn: Function returning the embedding of a query
+                (e.g. ``embeddings.embed_query``)
+            threshold: Minimum cosine similarity for a hit
+            max_entries_per_scope: Entries kept per scope (oldest replaced first)
+            max_scopes: Scopes kept before the least recently used is dropped
+            ttl: Time to live in seconds (0 or None to never expire)
+        """
+        self.embed_fn = embed_fn
+        self.threshold = threshold
+        self.max_entries_per_scope = max_entries_per_scope
+        self.max_scopes = max_scopes
+        self.ttl = ttl
+        self._scopes: Dict[str, _ScopeIndex] = {}
+        self._last_hits: Dict[Tuple[str, str], Tuple[int, str]] = {}
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {"lookups": 0, "hits": 0, "misses": 0, "false_hits": 0}
+    
+    @staticmethod
+    def scope_for(
+        presentation_id: str,
+        context: str,
+        chunk_ids: Optional[Sequence[str]] = None,
+        namespace: str = ""
+    ) -> str:
+        """
+        Build the scope identifier for a presentation and context.
+        
+        Args:
+            presentation_id: ID of the presentation
+            context: Context string the narrative was generated from
+            chunk_ids: IDs of the retrieved chunks (hashed instead of context when given)
+            namespace: Version namespace (see ResponseCache.namespace_for), so a
+                prompt, model or index change also invalidates this tier
+            
+        Returns:
+            Scope identifier
+        """
+        material = "\x1f".join(chunk_ids) if chunk_ids is not None else context
+        digest = hashlib.blake2b(material.encode("utf-8"), digest_size=8).hexdigest()
+        scope = f"{presentation_id}:{digest}"
+        return f"{namespace}:{scope}" if namespace else scope
+    
+    def _embed(self, query: str) -> np.ndarray:
+        """Embed and L2-normalize a query."""
+        vector = np.asarray(self.embed_fn(query), dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm > 0 else vector
+    
+    def lookup(self, query: str, scope: str) -> Optional[str]:
+        """
+        Find a cached response for a similar query in the same scope.
+        
+        Args:
+            query: User query
+            scope: Scope identifier from ``scope_for``
+            
+        Returns:
+            Cached response or None
+        """
+        with self._lock:
+            self.stats["lookups"] += 1
+            index = self._scopes.get(scope)
+            if index is None or index.count == 0:
+                self.stats["misses"] += 1
+                return None
+            # Keep recently used scopes at the end for LRU dropping
+            self._scopes[scope] = self._scopes.pop(scope)
+        
+        vector = self._embed(query)
+        with self._lock:
+            slot, score = index.search(vector)
+            response = index.responses[slot]
+            expires_at = index.expires[slot]
+            if response is None or score < self.threshold:
+                self.stats["misses"] += 1
+                return None
+            if expires_at is not None and time.time() >= expires_at:
+                index.remove(slot)
+                self.stats["misses"] += 1
+                return None
+            self.stats["hits"] += 1
+            self._last_hits[(query, scope)] = (slot, index.queries[slot])
+            if len(self._last_hits) > 4096:
+                self._last_hits.pop(next(iter(self._last_hits)))
+            return response
+    
+    def add(self, query: str, scope: str, response: str):
+        """
+        Store a response under the query's embedding.
+        
+        Args:
+            query: User query
+            scope: Scope identifier from ``scope_for``
+            response: Response to cache
+        """
+        vector = self._embed(query)
+        expires_at = time.time() + self.ttl if self.ttl else None
+        with self._lock:
+            index = self._scopes.get(scope)
+            if index is None:
+                if len(self._scopes) >= self.max_scopes:
+                    self._scopes.pop(next(iter(self._scopes)))
+                index = _ScopeIndex(len(vector), self.max_entries_per_scope)
+                self._scopes[scope] = index
+            index.add(vector, query, response, expires_at)
+    
+    def report_false_hit(self, query: str, scope: str):
+        """
+        Record that the last hit for a query was wrong and drop the matched entry.
+        
+        Args:
+            query: Query that received the wrong response
+            scope: Scope identifier of that lookup
+        """
+        with self._lock:
+            last_hit = self._last_hits.pop((query, scope), None)
+            if last_hit is None:
+                return
+            self.stats["false_hits"] += 1
+            slot, matched_query = last_hit
+            index = self._scopes.get(scope)
+            # The slot may have been reused since the hit
+            if index is not None and index.queries[slot] == matched_query:
+                index.remove(slot)
+    
+    def hit_rate(self) -> float:
+        """Fraction of lookups served from the semantic tier."""
+        return self.stats["hits"] / self.stats["lookups"] if self.stats["lookups"] else 0.0
+
@@ -0,0 +1,379 @@
+"""
+Batch Narration of Whole Presentations
+Narrates every slide of the indexed decks or the metadata catalogue through a worker pool.
+"""
+
+from typing import Callable, Dict, Iterable, List, Optional, Set
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+import json
+import random
+import threading
+import time
+
+from src.agents.llm_providers import LLMProviderError, RateLimitError
+from src.utils.profiling import get_profiler
+
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter shared by all workers calling one provider.
+    """
+    
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        Initialize the bucket.
+        
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum burst size (defaults to one second of tokens)
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def set_rate(self, rate: float, capacity: Optional[float] = None):
+        """
+        Change the rate and burst size, keeping the tokens accrued so far.
+        
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum burst size (defaults to one second of tokens)
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self.rate = rate
+            self.capacity = capacity if capacity is not None else max(rate, 1.0)
+            self._tokens = min(self._tokens, self.capacity)
+    
+    def acquire(self, tokens: float = 1.0) -> float:
+        """
+        Block until tokens are available and take them.
+        
+        Args:
+            tokens: Number of tokens to take
+            
+        Returns:
+            Seconds spent waiting
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                delay = (tokens - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+_rate_limiters: Dict[str, TokenBucket] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(provider: str, rate: float, capacity: Optional[float] = None) -> TokenBucket:
+    """
+    Get the process-wide rate limiter for a provider.
+    
+    One bucket is kept per provider so concurrent narrators share its limit;
+    asking for a different rate or capacity updates that bucket.
+    
+    Args:
+        provider: LLM provider name
+        rate: Requests per second
+        capacity: Burst size (defaults to one second of tokens)
+        
+    Returns:
+        Shared TokenBucket for the provider
+    """
+    with _rate_limiters_lock:
+        limiter = _rate_limiters.get(provider)
+        if limiter is None:
+            limiter = _rate_limiters[provider] = TokenBucket(rate, capacity)
+        else:
+            limiter.set_rate(rate, capacity)
+        return limiter
+
+
+@dataclass
+class NarrationJob:
+    """A single slide to narrate."""
+    presentation_id: str
+    slide_number: int
+    context: str
+    # Index chunks behind context; set, the slide is narrated through the pipeline
+    hits: Optional[List] = None
+    
+    @property
+    def key(self) -> str:
+        """Checkpoint key for the job."""
+        return f"{self.presentation_id}#{self.slide_number}"
+
+
+class BatchNarrator:
+    """
+    Narrate many slides concurrently with rate limiting and checkpoint/resume.
+    
+    Completed slides are appended to a JSONL checkpoint as they finish, so an
+    interrupted run resumes where it stopped. Jobs built from the index
+    (jobs_for_index) are narrated exactly as a lecture session would narrate
+    them, so the response cache is left warm for live serving afterwards.
+    """
+    
+    def __init__(
+        self,
+        agent,
+        max_workers: int = 4,
+        requests_per_second: Optional[float] = None,
+        checkpoint_path: str = "data/processed/narrations/checkpoint.jsonl",
+        max_retries: int = 3,
+        progress_interval: float = 5.0,
+        progress_callback: Optional[Callable[[Dict], None]] = None,
+        profiler=None,
+        pipeline=None
+    ):
+        """
+        Initialize the batch narrator.
+        
+        Args:
+            agent: NarrativeAgent used to create narratives
+            max_workers: Number of worker threads
+            requests_per_second: Rate limit for the agent's provider (None for unlimited)
+            checkpoint_path: JSONL file recording completed slides
+            max_retries: Retries per slide on provider errors
+            progress_interval: Seconds between progress reports
+            progress_callback: Called with each progress report (prints if None)
+            profiler: Profiler for sampled per-slide profiles (defaults to the process-wide profiler)
+            pipeline: RAGPipeline whose index jobs_for_index reads (its agent should be agent)
+        """
+        self.agent = agent
+        self.pipeline = pipeline
+        self.max_workers = max_workers
+        self.checkpoint_path = Path(checkpoint_path)
+        self.max_retries = max_retries
+        self.progress_interval = progress_interval
+        self.progress_callback = progress_callback or self._print_progress
+        self.profiler = profiler or get_profiler()
+        self.rate_limiter = None
+        if requests_per_second:
+            provider = getattr(agent, "llm_provider", "default")
+            self.rate_limiter = get_rate_limiter(provider, requests_per_second)
+    
+    def jobs_for_presentation(self, presentation: Dict) -> List[NarrationJob]:
+        """
+        Build one job per slide of a presentation.
+        
+        Args:
+            presentation: Metadata entry with ``id`` and ``file_path``
+            
+        Returns:
+            List of narration jobs
+        """
+        from src.utils.document_processor import DocumentProcessor
+        
+        slides = DocumentProcessor.extract_slides(Path(presentation["file_path"]))
+        return [
+            NarrationJob(presentation["id"], number, text)
+            for number, text in enumerate(slides, start=1)
+            if text.strip()
+        ]
+    
+    def jobs_for_index(
+        self,
+        presentation_ids: Optional[Iterable[str]] = None,
+        window_slides: int = 2,
+        k: int = 5
+    ) -> List[NarrationJob]:
+        """
+        Build one job per slide of the decks in the pipeline's index.
+        
+        Each job carries the chunks LectureSession.narrate_slide sends for the
+        slide, so its narrative is cached under the key a live session looks up.
+        
+        Args:
+            presentation_ids: Restrict to these presentation IDs (default: every indexed deck)
+            window_slides: Earlier slides sent as background (match the serving sessions)
+            k: Chunks per prompt (match the serving sessions)
+            
+        Returns:
+            List of narration jobs
+            
+        Raises:
+            ValueError: If there is no pipeline or it has no index
+        """
+        if self.pipeline is None or self.pipeline.vector_store is None:
+            raise ValueError("Jobs from the index need a pipeline with a built or loaded index")
+        
+        wanted = set(presentation_ids) if presentation_ids else None
+        jobs = []
+        for presentation_id in self.pipeline.chunks.presentation_ids:
+            if wanted is not None and presentation_id not in wanted:
+                continue
+            with self.pipeline.start_session(presentation_id, window_slides=window_slides, k=k) as session:
+                for slide_number in session.slides:
+                    session.goto(slide_number)
+                    hits = session.slide_context()
+                    context = "\n\n".join(hit["text"] for hit in hits)
+                    jobs.append(NarrationJob(presentation_id, slide_number, context, hits))
+        return jobs
+    
+    def jobs_for_catalogue(
+        self,
+        metadata_file: str = "data/metadata/presentations_metadata.json",
+        presentation_ids: Optional[Iterable[str]] = None
+    ) -> List[NarrationJob]:
+        """
+        Build jobs for every presentation in the metadata catalogue.
+        
+        Args:
+            metadata_file: Path to presentations metadata JSON
+            presentation_ids: Restrict to these presentation IDs
+            
+        Returns:
+            List of narration jobs
+        """
+        with open(metadata_file, 'r', encoding='utf-8') as f:
+            metadata = json.load(f)
+        
+        wanted = set(presentation_ids) if presentation_ids else None
+        jobs = []
+        for presentation in metadata.get("presentations", []):
+            if wanted is None or presentation["id"] in wanted:
+                jobs.extend(self.jobs_for_presentation(presentation))
+        return jobs
+    
+    def load_checkpoint(self) -> Set[str]:
+        """
+        Read keys of slides completed by earlier runs.
+        
+        Returns:
+            Set of completed job keys
+        """
+        completed = set()
+        if not self.checkpoint_path.exists():
+            return completed
+        with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    completed.add(json.loads(line)["key"])
+                except (ValueError, KeyError):
+                    # Partial line from an interrupted write
+                    continue
+        return completed
+    
+    def run(self, jobs: List[NarrationJob]) -> Dict:
+        """
+        Narrate all jobs not already in the checkpoint.
+        
+        Args:
+            jobs: Narration jobs
+            
+        Returns:
+            Final progress report
+        """
+        completed = self.load_checkpoint()
+        pending = [job for job in jobs if job.key not in completed]
+        self.checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        progress = {
+            "total": len(jobs),
+            "skipped": len(jobs) - len(pending),
+            "done": 0,
+            "failed": 0,
+            "elapsed": 0.0,
+            "slides_per_second": 0.0,
+            "eta_seconds": None,
+        }
+        start = time.monotonic()
+        last_report = start
+        
+        with open(self.checkpoint_path, 'a', encoding='utf-8') as checkpoint, \
+                ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self._narrate, job): job for job in pending}
+            for future in as_completed(futures):
+                job = futures[future]
+                try:
+                    narrative = future.result()
+                except Exception as e:
+                    progress["failed"] += 1
+                    print(f"✗ {job.key}: {e}")
+                else:
+                    progress["done"] += 1
+                    checkpoint.write(json.dumps({
+                        "key": job.key,
+                        "presentation_id": job.presentation_id,
+                        "slide_number": job.slide_number,
+                        "narrative": narrative,
+                    }, ensure_ascii=False) + "\n")
+                    checkpoint.flush()
+                
+                now = time.monotonic()
+                if now - last_report >= self.progress_interval:
+                    self._update_progress(progress, start, now, len(pending))
+                    self.progress_callback(dict(progress))
+                    last_report = now
+        
+        self._update_progress(progress, start, time.monotonic(), len(pending))
+        self.progress_callback(dict(progress))
+        return progress
+    
+    def _narrate(self, job: NarrationJob) -> str:
+        """Narrate one slide (profiled in its worker thread if sampled)."""
+        with self.profiler.profile("batch"):
+            return self._narrate_with_retries(job)
+    
+    def _narrate_with_retries(self, job: NarrationJob) -> str:
+        """Narrate one slide, retrying on provider errors."""
+        query = f"Narrate slide {job.slide_number}"
+        for attempt in range(self.max_retries + 1):
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            try:
+                if job.hits is not None:
+                    # Same call as LectureSession.narrate_slide, so the cache keys match
+                    return self.pipeline.generate_narrative(query, job.hits, job.presentation_id)
+                return self.agent.create_narrative(job.presentation_id, job.context, query)
+            except RateLimitError as e:
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(e.retry_after)
+            except LLMProviderError:
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(min(30.0, 2 ** attempt) * random.uniform(0.5, 1.0))
+    
+    @staticmethod
+    def _update_progress(progress: Dict, start: float, now: float, pending: int):
+        """Refresh elapsed time, throughput and ETA."""
+        elapsed = now - start
+        finished = progress["done"] + progress["failed"]
+        progress["elapsed"] = elapsed
+        progress["slides_per_second"] = finished / elapsed if elapsed > 0 else 0.0
+        remaining = pending - finished
+        if progress["slides_per_second"] > 0:
+            progress["eta_seconds"] = remaining / progress["slides_per_second"]
+    
+    @staticmethod
+    def _print_progress(progress: Dict):
+        """Default progress reporter."""
+        finished = progress["done"] + progress["failed"] + progress["skipped"]
+        eta = progress["eta_seconds"]
+        eta_str = f"{eta:.0f}s" if eta is not None else "n/a"
+        print(
+            f"  {finished}/{progress['total']} slides "
+            f"({progress['failed']} failed, {progress['skipped']} from checkpoint) | "
+            f"{progress['slides_per_second']:.2f} slides/s | ETA {eta_str}"
+        )
+
@@ -0,0 +1,283 @@
+"""
+Near-Duplicate Chunk Detection with MinHash and LSH
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+import hashlib
+import re
+import zlib
+
+import numpy as np
+
+from src.pipeline.records import ChunkStore, ChunkStoreBuilder
+
+
+_SHIFT = np.uint64(32)
+# Odd 64-bit multiplier that mixes consecutive word hashes into a shingle hash
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+_TOKEN = re.compile(r"\w+")
+
+
+def lsh_bands(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """
+    Pick the LSH band count and rows per band for a similarity threshold.
+    
+    Pairs at the threshold become candidates with probability about one
+    half; the S-curve rises steeply around it.
+    
+    Args:
+        threshold: Jaccard similarity that should collide
+        num_perm: Signature length
+        
+    Returns:
+        (bands, rows) with bands * rows <= num_perm
+    """
+    best = None
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        error = abs((1.0 / bands) ** (1.0 / rows) - threshold)
+        if best is None or error < best[0]:
+            best = (error, bands, rows)
+    return best[1], best[2]
+
+
+class MinHasher:
+    """MinHash signatures over word shingles."""
+    
+    def __init__(self, num_perm: int = 128, shingle_size: int = 3, seed: int = 1):
+        """
+        Initialize the hasher.
+        
+        Args:
+            num_perm: Signature length (more is more accurate and slower)
+            shingle_size: Words per shingle
+            seed: Seed for the permutation coefficients
+        """
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        # Multiply-shift hashing: (a * h + b) wraps mod 2**64 and the high 32 bits are kept
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(0, 2 ** 63, num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._b = rng.integers(0, 2 ** 63, num_perm, dtype=np.uint64)
+    
+    @staticmethod
+    def words(text: str) -> List[str]:
+        """Lowercased word tokens."""
+        return _TOKEN.findall(text.lower())
+    
+    def shingle_hashes(self, words: Sequence[str]) -> np.ndarray:
+        """32-bit hashes of the distinct word shingles; fewer words than a shingle give one shingle."""
+        if not words:
+            words = [""]
+        word_hashes = np.fromiter(
+            (zlib.crc32(word.encode("utf-8")) for word in words), dtype=np.uint64, count=len(words)
+        )
+        size = min(self.shingle_size, len(words))
+        count = len(words) - size + 1
+        # Combined in numpy rather than joining shingle strings
+        hashes = word_hashes[:count].copy()
+        for offset in range(1, size):
+            hashes = hashes * _MIX + word_hashes[offset:offset + count]
+        return np.unique(hashes >> _SHIFT)
+    
+    def signature(self, text: str, words: Optional[Sequence[str]] = None) -> np.ndarray:
+        """
+        MinHash signature of a text.
+        
+        Args:
+            text: Text to hash
+            words: Tokens of text, if already split (see words)
+            
+        Returns:
+            uint64 vector of num_perm minimum hash values
+        """
+        hashes = self.shingle_hashes(self.words(text) if words is None else words)
+        return ((np.outer(self._a, hashes) + self._b[:, None]) >> _SHIFT).min(axis=1)
+
+
+class DedupReport:
+    """What near-duplicate collapsing removed from a chunk store."""
+    
+    def __init__(
+        self,
+        chunks_in: int,
+        chunks_out: int,
+        exact_duplicates: int,
+        near_duplicates: int,
+        text_bytes_in: int,
+        text_bytes_out: int
+    ):
+        self.chunks_in = chunks_in
+        self.chunks_out = chunks_out
+        self.exact_duplicates = exact_duplicates
+        self.near_duplicates = near_duplicates
+        self.text_bytes_in = text_bytes_in
+        self.text_bytes_out = text_bytes_out
+    
+    @property
+    def removed(self) -> int:
+        return self.chunks_in - self.chunks_out
+    
+    @property
+    def removed_fraction(self) -> float:
+        """Fraction of chunks (and so of index vectors and embedding calls) removed."""
+        return self.removed / self.chunks_in if self.chunks_in else 0.0
+    
+    @property
+    def embedding_bytes_saved_fraction(self) -> float:
+        """Fraction of chunk text no longer sent to the embedder (a proxy for token cost)."""
+        if not self.text_bytes_in:
+            return 0.0
+        return 1.0 - self.text_bytes_out / self.text_bytes_in
+    
+    def index_bytes_saved(self, dimension: int) -> int:
+        """Float32 vector storage saved in a flat index of the given dimension."""
+        return self.removed * dimension * 4
+    
+    def to_dict(self) -> Dict:
+        return {
+            "chunks_in": self.chunks_in,
+            "chunks_out": self.chunks_out,
+            "exact_duplicates": self.exact_duplicates,
+            "near_duplicates": self.near_duplicates,
+            "removed_fraction": round(self.removed_fraction, 4),
+            "text_bytes_in": self.text_bytes_in,
+            "text_bytes_out": self.text_bytes_out,
+            "embedding_bytes_saved_fraction": round(self.embedding_bytes_saved_fraction, 4),
+        }
+
+
+class NearDuplicateDetector:
+    """
+    Collapses repeated chunks (title slides, agendas, boilerplate, revised decks).
+    
+    Identical texts (ignoring case and whitespace) are caught by a content
+    hash. Other candidates come from LSH buckets over MinHash signatures and
+    are kept as duplicates only if their estimated Jaccard similarity
+    reaches the threshold. The first occurrence of a chunk is canonical;
+    later copies become provenance links on it.
+    """
+    
+    def __init__(
+        self,
+        threshold: float = 0.85,
+        num_perm: int = 128,
+        shingle_size: int = 3,
+        min_words: int = 0,
+        seed: int = 1
+    ):
+        """
+        Initialize the detector.
+        
+        Args:
+            threshold: Estimated Jaccard similarity of word shingles to count as a duplicate
+            num_perm: MinHash signature length
+            shingle_size: Words per shingle
+            min_words: Chunks with fewer words are only collapsed when identical
+            seed: Seed for the MinHash permutations
+        """
+        if not 0.0 < threshold <= 1.0:
+            raise ValueError("threshold must be in (0, 1]")
+        self.threshold = threshold
+        self.min_words = min_words
+        self.hasher = MinHasher(num_perm, shingle_size, seed)
+        self.bands, self.rows = lsh_bands(threshold, num_perm)
+    
+    def find_duplicates(self, texts: Sequence[str]) -> Tuple[List[Optional[int]], int]:
+        """
+        Map each text to the earlier text it duplicates.
+        
+        Args:
+            texts: Texts in order (earlier texts are canonical)
+            
+        Returns:
+            (canonical index or None per text, number of exact duplicates)
+        """
+        canonical: List[Optional[int]] = []
+        exact: Dict[bytes, int] = {}
+        buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(self.bands)]
+        signatures: Dict[int, np.ndarray] = {}
+        exact_count = 0
+        for i, text in enumerate(texts):
+            normalized = " ".join(text.lower().split())
+            digest = hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).digest()
+            if digest in exact:
+                first = exact[digest]
+                canonical.append(first if canonical[first] is None else canonical[first])
+                exact_count += 1
+                continue
+            exact[digest] = i
+            canonical.append(None)
+            words = self.hasher.words(normalized)
+            if len(words) < self.min_words:
+                continue
+            
+            signature = self.hasher.signature(normalized, words)
+            keys = [
+                signature[band * self.rows:(band + 1) * self.rows].tobytes()
+                for band in range(self.bands)
+            ]
+            match = self._match(signature, keys, buckets, signatures)
+            if match is not None:
+                canonical[i] = match
+                continue
+            signatures[i] = signature
+            for band, key in enumerate(keys):
+                buckets[band].setdefault(key, []).append(i)
+        return canonical, exact_count
+    
+    def _match(
+        self,
+        signature: np.ndarray,
+        keys: List[bytes],
+        buckets: List[Dict[bytes, List[int]]],
+        signatures: Dict[int, np.ndarray]
+    ) -> Optional[int]:
+        """Earliest canonical text in a shared bucket that is similar enough."""
+        candidates = set()
+        for band, key in enumerate(keys):
+            candidates.update(buckets[band].get(key, ()))
+        for candidate in sorted(candidates):
+            if np.mean(signatures[candidate] == signature) >= self.threshold:
+                return candidate
+        return None
+    
+    def collapse(self, chunks: ChunkStore) -> Tuple[ChunkStore, DedupReport]:
+        """
+        Drop duplicate chunks, recording their locations on the canonical chunk.
+        
+        Args:
+            chunks: Chunk store from chunking
+            
+        Returns:
+            (store with one row per canonical chunk, report)
+        """
+        texts = chunks.texts()
+        canonical, exact_count = self.find_duplicates(texts)
+        builder = ChunkStoreBuilder()
+        new_rows: Dict[int, int] = {}
+        duplicates: Dict[int, List[Tuple[str, int, int]]] = {}
+        for row, match in enumerate(canonical):
+            chunk = chunks[row]
+            if match is None:
+                new_rows[row] = len(builder)
+                builder.add(chunk.presentation_id, chunk.slide_number, chunks.chunk_numbers[row], texts[row])
+                # Keep locations collapsed by an earlier pass
+                if chunks.duplicates and row in chunks.duplicates:
+                    duplicates[new_rows[row]] = list(chunks.duplicates[row])
+            else:
+                duplicates.setdefault(new_rows[match], []).extend(chunk.provenance)
+        store = builder.build()
+        if chunks.ids is not None:
+            store.ids = [chunks.ids[row] for row, match in enumerate(canonical) if match is None]
+        store.duplicates = duplicates or None
+        report = DedupReport(
+            chunks_in=len(chunks),
+            chunks_out=len(store),
+            exact_duplicates=exact_count,
+            near_duplicates=len(chunks) - len(store) - exact_count,
+            text_bytes_in=len(chunks.buffer),
+            text_bytes_out=len(store.buffer)
+        )
+        return store, report
+
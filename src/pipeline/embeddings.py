@@ -0,0 +1,103 @@
+"""
+Embedding Models for the RAG Pipeline
+Offline feature-hashing embedder, plus a factory for hosted embedding models.
+"""
+
+from typing import List
+import hashlib
+import re
+
+import numpy as np
+
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+class HashingEmbedder:
+    """
+    Deterministic bag-of-words embedder using the hashing trick.
+    
+    Needs no model download or API key, which makes it suitable for tests,
+    benchmarks and offline development. Unigrams and bigrams are hashed into
+    ``dim`` signed buckets and the vector is L2-normalized, so inner product
+    equals cosine similarity.
+    """
+    
+    def __init__(self, dim: int = 384):
+        """
+        Initialize the embedder.
+        
+        Args:
+            dim: Embedding dimension
+        """
+        self.dim = dim
+    
+    def _embed(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        tokens = _TOKEN_RE.findall(text.lower())
+        features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        for feature in features:
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dim
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed several texts.
+        
+        Args:
+            texts: Texts to embed
+            
+        Returns:
+            One vector per text
+        """
+        return [self._embed(text).tolist() for text in texts]
+    
+    def embed_query(self, text: str) -> List[float]:
+        """
+        Embed a query.
+        
+        Args:
+            text: Query text
+            
+        Returns:
+            Query vector
+        """
+        return self._embed(text).tolist()
+
+
+def create_embedder(model: str = "hashing", **options):
+    """
+    Create an embedding model by name.
+    
+    Args:
+        model: ``hashing`` for the offline embedder, otherwise an OpenAI
+            embedding model name (e.g. text-embedding-ada-002)
+        **options: Extra options for the embedder
+        
+    Returns:
+        Object with embed_documents and embed_query methods
+    """
+    if model == "hashing":
+        return HashingEmbedder(**options)
+    from langchain_openai import OpenAIEmbeddings
+    
+    return OpenAIEmbeddings(model=model, **options)
+
+
+def embedder_id(embedder) -> str:
+    """
+    Identify an embedding model, so indexes are only queried with the model that built them.
+    
+    Args:
+        embedder: Embedding model
+        
+    Returns:
+        Identifier such as ``hashing-384`` or ``text-embedding-ada-002``
+    """
+    if isinstance(embedder, HashingEmbedder):
+        return f"hashing-{embedder.dim}"
+    return str(getattr(embedder, "model", None) or type(embedder).__name__)
+
@@ -0,0 +1,342 @@
+"""
+Single-file Index Bundles
+Packs the vector index, chunk store, embedding model ID and config into one versioned,
+checksummed file that is memory-mapped on load and promoted with an atomic rename.
+"""
+
+from typing import Dict, Optional
+from array import array
+from datetime import datetime, timezone
+from pathlib import Path
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+import threading
+
+from src.pipeline.records import ChunkStore
+
+
+MAGIC = b"RAGIDX\x00\x01"
+FORMAT_VERSION = 1
+BUNDLE_SUFFIX = ".ragidx"
+
+# magic, format version, header length, header digest
+_PREAMBLE = struct.Struct("<8sII32s")
+_ALIGNMENT = 64
+
+# ChunkStore columns stored as raw little-endian arrays
+_COLUMNS = (
+    ("chunk_offsets", "offsets", "q"),
+    ("chunk_presentations", "presentation_codes", "i"),
+    ("chunk_slides", "slide_numbers", "i"),
+    ("chunk_numbers", "chunk_numbers", "i"),
+)
+
+
+class BundleError(ValueError):
+    """A bundle is unreadable, corrupt or does not match the pipeline."""
+
+
+def _digest(data) -> str:
+    return hashlib.blake2b(data, digest_size=32).hexdigest()
+
+
+def _column_bytes(column, typecode: str) -> bytes:
+    if isinstance(column, memoryview):
+        return column.tobytes()
+    data = array(typecode, column)
+    if data.itemsize != struct.calcsize(typecode):
+        raise BundleError(f"Unexpected item size for array type {typecode!r}")
+    return data.tobytes()
+
+
+def write_bundle(
+    path: str,
+    index,
+    chunks: ChunkStore,
+    index_version: Optional[str],
+    embedding_model: str,
+    config: Optional[Dict] = None,
+    metadata: Optional[Dict] = None
+) -> Path:
+    """
+    Write an index bundle atomically (temp file, fsync, rename).
+    
+    Args:
+        path: Bundle path (conventionally ending in .ragidx)
+        index: FAISS index
+        chunks: Chunks in index row order
+        index_version: Content hash of the index
+        embedding_model: ID of the embedding model that built the index (see embedder_id)
+        config: Settings the index was built with (chunk size, overlap, ...)
+        metadata: Free-form metadata (course, source commit, ...)
+        
+    Returns:
+        Path to the bundle
+    """
+    import faiss
+    
+    chunks = ChunkStore.from_dicts(chunks)
+    sections = {"faiss": faiss.serialize_index(index).tobytes(), "chunk_text": bytes(chunks.buffer)}
+    formats = {}
+    for section, attribute, typecode in _COLUMNS:
+        sections[section] = _column_bytes(getattr(chunks, attribute), typecode)
+        formats[section] = typecode
+    sections["presentation_ids"] = json.dumps(chunks.presentation_ids).encode("utf-8")
+    if chunks.ids is not None:
+        sections["chunk_ids"] = json.dumps(chunks.ids).encode("utf-8")
+    if chunks.duplicates:
+        sections["chunk_duplicates"] = json.dumps(
+            {str(row): locations for row, locations in chunks.duplicates.items()}
+        ).encode("utf-8")
+    
+    header = {
+        "format_version": FORMAT_VERSION,
+        "created": datetime.now(timezone.utc).isoformat(),
+        "index_version": index_version,
+        "embedding_model": embedding_model,
+        "config": config or {},
+        "metadata": metadata or {},
+        "index": {"type": type(index).__name__, "ntotal": int(index.ntotal), "d": int(index.d)},
+        "chunk_count": len(chunks),
+        "sections": {},
+    }
+    digests = {name: _digest(data) for name, data in sections.items()}
+    # Offsets depend on the header size, which depends on the offsets; settle on a fixed point
+    header_bytes = b""
+    while True:
+        offset = _PREAMBLE.size + len(header_bytes)
+        layout = {}
+        for name, data in sections.items():
+            offset += -offset % _ALIGNMENT
+            layout[name] = {"offset": offset, "length": len(data), "blake2b": digests[name], "format": formats.get(name)}
+            offset += len(data)
+        header["sections"] = layout
+        encoded = json.dumps(header, sort_keys=True).encode("utf-8")
+        if len(encoded) == len(header_bytes):
+            header_bytes = encoded
+            break
+        header_bytes = encoded
+    
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header_bytes), bytes.fromhex(_digest(header_bytes))))
+            f.write(header_bytes)
+            for name, data in sections.items():
+                f.write(b"\0" * (layout[name]["offset"] - f.tell()))
+                f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates 0600 files; serving processes may run as another user
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return path
+
+
+class LazyIndex:
+    """
+    FAISS index deserialized from the bundle on first search.
+    
+    ntotal and d come from the header, so size estimates need no load.
+    """
+    
+    def __init__(self, bundle: "IndexBundle", ntotal: int, d: int):
+        self.bundle = bundle
+        self.ntotal = ntotal
+        self.d = d
+        self._index = None
+        self._lock = threading.Lock()
+    
+    def load(self):
+        """Deserialize the index now (e.g. to move the cost out of the first request)."""
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    import faiss
+                    import numpy as np
+                    
+                    data = np.frombuffer(self.bundle.section("faiss"), dtype=np.uint8)
+                    self._index = faiss.deserialize_index(data)
+        return self._index
+    
+    @property
+    def loaded(self) -> bool:
+        return self._index is not None
+    
+    def search(self, vectors, k: int):
+        return self.load().search(vectors, k)
+
+
+class IndexBundle:
+    """
+    Read-only view of a bundle file.
+    
+    The file is memory-mapped: chunk texts and columns are zero-copy views of
+    the mapping, and the FAISS index is deserialized on first search. Replacing
+    the file on disk (see promote_bundle) does not affect open bundles.
+    """
+    
+    def __init__(self, path: str, verify: bool = True):
+        """
+        Open a bundle.
+        
+        Args:
+            path: Bundle file
+            verify: Check every section's checksum now (the header is always checked)
+        """
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            try:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise BundleError(f"Empty bundle file: {self.path}")
+        self._view = memoryview(self._map)
+        if len(self._view) < _PREAMBLE.size:
+            raise BundleError(f"Truncated bundle: {self.path}")
+        magic, version, header_length, header_digest = _PREAMBLE.unpack_from(self._view)
+        if magic != MAGIC:
+            raise BundleError(f"Not an index bundle: {self.path}")
+        if version > FORMAT_VERSION:
+            raise BundleError(f"Bundle format {version} is newer than supported ({FORMAT_VERSION})")
+        header_bytes = self._view[_PREAMBLE.size:_PREAMBLE.size + header_length]
+        if len(header_bytes) != header_length or hashlib.blake2b(header_bytes, digest_size=32).digest() != header_digest:
+            raise BundleError(f"Corrupt bundle header: {self.path}")
+        self.header = json.loads(bytes(header_bytes))
+        for name, section in self.header["sections"].items():
+            if section["offset"] + section["length"] > len(self._view):
+                raise BundleError(f"Truncated bundle section {name}: {self.path}")
+        if verify:
+            self.verify()
+        
+        self.index = LazyIndex(self, self.header["index"]["ntotal"], self.header["index"]["d"])
+        self.chunks = self._chunk_store()
+    
+    @property
+    def index_version(self) -> Optional[str]:
+        return self.header["index_version"]
+    
+    @property
+    def embedding_model(self) -> str:
+        return self.header["embedding_model"]
+    
+    @property
+    def config(self) -> Dict:
+        return self.header["config"]
+    
+    @property
+    def metadata(self) -> Dict:
+        return self.header["metadata"]
+    
+    def section(self, name: str) -> memoryview:
+        """
+        Zero-copy view of a section.
+        
+        Args:
+            name: Section name
+            
+        Returns:
+            Read-only memoryview into the mapping
+        """
+        section = self.header["sections"][name]
+        return self._view[section["offset"]:section["offset"] + section["length"]]
+    
+    def verify(self):
+        """
+        Check every section's checksum.
+        
+        Raises:
+            BundleError: If a section does not match its checksum
+        """
+        for name, section in self.header["sections"].items():
+            if _digest(self.section(name)) != section["blake2b"]:
+                raise BundleError(f"Checksum mismatch in section {name}: {self.path}")
+    
+    def _chunk_store(self) -> ChunkStore:
+        sections = self.header["sections"]
+        try:
+            columns = {
+                attribute: self.section(name).cast(sections[name]["format"])
+                for name, attribute, _ in _COLUMNS
+            }
+            ids = json.loads(bytes(self.section("chunk_ids"))) if "chunk_ids" in sections else None
+            presentation_ids = json.loads(bytes(self.section("presentation_ids")))
+            duplicates = None
+            if "chunk_duplicates" in sections:
+                duplicates = {
+                    int(row): [tuple(location) for location in locations]
+                    for row, locations in json.loads(bytes(self.section("chunk_duplicates"))).items()
+                }
+        except (KeyError, TypeError, ValueError) as e:
+            raise BundleError(f"Corrupt chunk sections in {self.path}: {e}")
+        return ChunkStore(
+            self.section("chunk_text"),
+            columns["offsets"],
+            presentation_ids,
+            columns["presentation_codes"],
+            columns["slide_numbers"],
+            columns["chunk_numbers"],
+            ids,
+            duplicates
+        )
+    
+    def describe(self) -> Dict:
+        """
+        Summarize the bundle for inspection.
+        
+        Returns:
+            Header fields plus the file size
+        """
+        return {
+            "path": str(self.path),
+            "size_bytes": len(self._view),
+            **{key: value for key, value in self.header.items() if key != "sections"},
+            "sections": {name: section["length"] for name, section in self.header["sections"].items()},
+        }
+
+
+def promote_bundle(source: str, destination: str, verify: bool = True) -> Path:
+    """
+    Install a bundle at a serving path with a single atomic rename.
+    
+    The bundle is copied next to the destination, verified, fsynced and then
+    renamed over it, so readers see either the old or the new file, never a
+    partial one. Processes that already opened the old bundle keep using it
+    until they reopen (e.g. IndexRegistry.unload).
+    
+    Args:
+        source: Bundle to install
+        destination: Serving path
+        verify: Verify the copied file before the swap
+        
+    Returns:
+        Destination path
+    """
+    destination = Path(destination)
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{destination.name}.", suffix=".tmp", dir=destination.parent)
+    try:
+        with os.fdopen(fd, 'wb') as target, open(source, 'rb') as f:
+            shutil.copyfileobj(f, target, 1024 * 1024)
+            target.flush()
+            os.fsync(target.fileno())
+        if verify:
+            IndexBundle(tmp_path, verify=True)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, destination)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return destination
+
@@ -0,0 +1,329 @@
+"""
+Memory-bounded Registry of Course Indexes
+Loads course indexes on demand and keeps them within a resident-memory budget by LRU eviction.
+"""
+
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Sequence
+from collections import OrderedDict
+from pathlib import Path
+import pickle
+import threading
+import time
+
+from src.pipeline.index_bundle import BUNDLE_SUFFIX, IndexBundle
+from src.pipeline.records import ChunkStore
+
+
+class CourseIndex:
+    """A loaded vector index with the chunks its rows belong to."""
+    
+    def __init__(
+        self,
+        name: str,
+        index,
+        chunks: Sequence[Mapping],
+        index_version: Optional[str] = None,
+        embedding_model: Optional[str] = None
+    ):
+        """
+        Initialize a course index.
+        
+        Args:
+            name: Course name
+            index: FAISS index over normalized chunk embeddings
+            chunks: Chunks in index row order (a ChunkStore, or dictionaries from older saves)
+            index_version: Content hash of the index (see RAGPipeline.build_index)
+            embedding_model: Embedding model that built the index, if recorded
+        """
+        self.name = name
+        self.index = index
+        self.chunks = ChunkStore.from_dicts(chunks)
+        self.index_version = index_version or "unversioned"
+        self.embedding_model = embedding_model
+        self.nbytes = self._estimate_bytes()
+    
+    def _estimate_bytes(self) -> int:
+        """Resident size: float32 vectors plus the chunk store."""
+        return self.index.ntotal * self.index.d * 4 + self.chunks.nbytes
+
+
+class IndexFileLoader:
+    """
+    Loads ``<name>.ragidx`` bundles (see index_bundle), falling back to
+    ``<name>.index`` and ``<name>_metadata.pkl`` (the layout written by
+    RAGPipeline.save_index and VectorStoreManager) from a models directory.
+    """
+    
+    def __init__(self, models_dir: str = "models", verify: bool = True):
+        """
+        Initialize the loader.
+        
+        Args:
+            models_dir: Directory holding the index files
+            verify: Check bundle checksums on load
+        """
+        self.models_dir = Path(models_dir)
+        self.verify = verify
+    
+    def __call__(self, name: str) -> CourseIndex:
+        import faiss
+        
+        bundle_path = self.models_dir / f"{name}{BUNDLE_SUFFIX}"
+        if bundle_path.exists():
+            bundle = IndexBundle(str(bundle_path), verify=self.verify)
+            return CourseIndex(name, bundle.index, bundle.chunks, bundle.index_version, bundle.embedding_model)
+        
+        index_path = self.models_dir / f"{name}.index"
+        if not index_path.exists():
+            raise FileNotFoundError(f"Index file not found: {index_path}")
+        index = faiss.read_index(str(index_path))
+        metadata = {}
+        metadata_path = self.models_dir / f"{name}_metadata.pkl"
+        if metadata_path.exists():
+            with open(metadata_path, 'rb') as f:
+                metadata = pickle.load(f)
+        return CourseIndex(name, index, metadata.get("chunks", []), metadata.get("index_version"))
+
+
+class _Entry:
+    """Registry bookkeeping for one loaded index."""
+    
+    __slots__ = ("course", "refs", "pinned_until", "last_used")
+    
+    def __init__(self, course: CourseIndex):
+        self.course = course
+        self.refs = 0
+        self.pinned_until: Optional[float] = None
+        self.last_used = time.time()
+    
+    def pinned(self, now: float) -> bool:
+        return self.pinned_until is not None and now < self.pinned_until
+
+
+class IndexLease:
+    """Reference to a loaded index; the index is not evicted until released."""
+    
+    def __init__(self, registry: "IndexRegistry", entry: _Entry):
+        self.registry = registry
+        self.course = entry.course
+        self._entry = entry
+        self._released = False
+    
+    def release(self):
+        if not self._released:
+            self._released = True
+            self.registry._release(self._entry)
+    
+    def __enter__(self) -> CourseIndex:
+        return self.course
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+class IndexRegistry:
+    """
+    On-demand course indexes under a resident-memory budget.
+    
+    Least recently used indexes are evicted when a load would exceed
+    max_bytes. Indexes that are pinned (e.g. ahead of a scheduled lecture) or
+    held by an in-flight search are never evicted; if nothing else can go,
+    the registry goes over budget and evicts as soon as leases are released.
+    Concurrent requests for the same unloaded course share a single load.
+    """
+    
+    def __init__(
+        self,
+        loader: Optional[Callable[[str], CourseIndex]] = None,
+        max_bytes: int = 2 * 1024 * 1024 * 1024,
+        max_indexes: Optional[int] = None
+    ):
+        """
+        Initialize the registry.
+        
+        Args:
+            loader: Loads a course index by name (defaults to IndexFileLoader("models"))
+            max_bytes: Resident-memory budget for loaded indexes
+            max_indexes: Optional cap on the number of loaded indexes
+        """
+        self.loader = loader or IndexFileLoader()
+        self.max_bytes = max_bytes
+        self.max_indexes = max_indexes
+        self.current_bytes = 0
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._loading: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+        self.stats: Dict[str, float] = {
+            "hits": 0,
+            "loads": 0,
+            "load_failures": 0,
+            "load_seconds": 0.0,
+            "evictions": 0,
+            "evicted_bytes": 0,
+        }
+    
+    def acquire(self, name: str) -> IndexLease:
+        """
+        Get a course index, loading it if needed, and hold it until released.
+        
+        Args:
+            name: Course name
+            
+        Returns:
+            Lease usable as a context manager yielding the CourseIndex
+        """
+        while True:
+            with self._lock:
+                entry = self._entries.get(name)
+                if entry is not None:
+                    entry.refs += 1
+                    entry.last_used = time.time()
+                    self._entries.move_to_end(name)
+                    self.stats["hits"] += 1
+                    return IndexLease(self, entry)
+                loading = self._loading.get(name)
+                if loading is None:
+                    loading = self._loading[name] = threading.Event()
+                    break
+            # Another thread is loading this course; wait and look again
+            loading.wait()
+        
+        start = time.perf_counter()
+        try:
+            course = self.loader(name)
+        except Exception:
+            with self._lock:
+                self.stats["load_failures"] += 1
+                self._loading.pop(name).set()
+            raise
+        
+        with self._lock:
+            self.stats["loads"] += 1
+            self.stats["load_seconds"] += time.perf_counter() - start
+            entry = _Entry(course)
+            entry.refs = 1
+            self._entries[name] = entry
+            self.current_bytes += course.nbytes
+            self._evict()
+            self._loading.pop(name).set()
+        return IndexLease(self, entry)
+    
+    def _release(self, entry: _Entry):
+        with self._lock:
+            entry.refs -= 1
+            # An unloaded entry is no longer accounted for; nothing to evict
+            if self._entries.get(entry.course.name) is entry:
+                self._evict()
+    
+    def _over_budget(self) -> bool:
+        if self.max_indexes is not None and len(self._entries) > self.max_indexes:
+            return True
+        return self.current_bytes > self.max_bytes
+    
+    def _evict(self):
+        """Evict idle, unpinned indexes in LRU order; caller holds the lock."""
+        if not self._over_budget():
+            return
+        now = time.time()
+        for name in list(self._entries):
+            entry = self._entries[name]
+            if entry.refs > 0 or entry.pinned(now):
+                continue
+            self._remove(name)
+            self.stats["evictions"] += 1
+            self.stats["evicted_bytes"] += entry.course.nbytes
+            if not self._over_budget():
+                return
+    
+    def _remove(self, name: str) -> _Entry:
+        entry = self._entries.pop(name)
+        self.current_bytes -= entry.course.nbytes
+        return entry
+    
+    def preload(self, names: Iterable[str], pin_until: Optional[float] = None):
+        """
+        Load courses ahead of use, e.g. before a scheduled lecture.
+        
+        Args:
+            names: Course names
+            pin_until: Unix time until which they are pinned (None to leave unpinned)
+        """
+        for name in names:
+            with self.acquire(name):
+                if pin_until is not None:
+                    self.pin(name, pin_until)
+    
+    def pin(self, name: str, until: float = float("inf")) -> bool:
+        """
+        Keep a loaded course resident until a time.
+        
+        Args:
+            name: Course name
+            until: Unix time the pin expires (forever by default)
+            
+        Returns:
+            False if the course is not loaded
+        """
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                return False
+            entry.pinned_until = until
+            return True
+    
+    def unpin(self, name: str):
+        """
+        Make a course evictable again.
+        
+        Args:
+            name: Course name
+        """
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None:
+                entry.pinned_until = None
+                self._evict()
+    
+    def unload(self, name: str) -> bool:
+        """
+        Drop a course regardless of pins (e.g. after it was re-indexed).
+        
+        In-flight searches keep their reference and finish normally.
+        
+        Args:
+            name: Course name
+            
+        Returns:
+            True if the course was loaded
+        """
+        with self._lock:
+            if name not in self._entries:
+                return False
+            self._remove(name)
+            return True
+    
+    def loaded(self) -> List[Dict]:
+        """
+        Describe the loaded courses, least recently used first.
+        
+        Returns:
+            Dictionaries with name, bytes, refs, pinned_until and last_used
+        """
+        with self._lock:
+            return [
+                {
+                    "name": name,
+                    "bytes": entry.course.nbytes,
+                    "refs": entry.refs,
+                    "pinned_until": entry.pinned_until,
+                    "last_used": entry.last_used,
+                }
+                for name, entry in self._entries.items()
+            ]
+    
+    def __contains__(self, name: str) -> bool:
+        return name in self._entries
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
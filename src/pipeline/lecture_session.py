@@ -0,0 +1,310 @@
+"""
+Live-lecture sessions with incremental context
+"""
+
+from collections import OrderedDict, deque
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from src.pipeline.index_bundle import LazyIndex
+from src.pipeline.records import SearchHit
+
+
+class LectureSession:
+    """
+    Context for a lecture that moves through a presentation one slide at a time.
+    
+    The session keeps a rolling window of chunks around the current slide,
+    with their vectors. Moving to another slide fetches only the slides
+    that enter the window. Questions are scored against the window
+    first. Only when nothing in it is close enough does the session search
+    the index, and the chunks it finds stay for later questions. Prompts
+    carry the best-matching chunks rather than the whole window.
+    
+    Not thread-safe: use one session per lecture.
+    """
+    
+    def __init__(
+        self,
+        pipeline,
+        presentation_id: str,
+        course: Optional[str] = None,
+        window_slides: int = 2,
+        lookahead_slides: int = 1,
+        question_chunks: int = 8,
+        k: int = 5,
+        reuse_threshold: float = 0.3,
+        repeat_threshold: float = 0.9
+    ):
+        """
+        Initialize the session.
+        
+        Args:
+            pipeline: RAGPipeline with a built index (or an index_registry when course is set)
+            presentation_id: Presentation being lectured
+            course: Course index holding the presentation (kept resident until close)
+            window_slides: Slides before the current one kept in the window
+            lookahead_slides: Slides after the current one fetched ahead of time
+            question_chunks: Chunks found by index searches that are kept for follow-ups
+            k: Chunks sent with each prompt
+            reuse_threshold: Minimum window similarity to answer a question without a search
+            repeat_threshold: Similarity above which a question repeats a recently searched one
+        """
+        self.pipeline = pipeline
+        self.presentation_id = presentation_id
+        self.course = course
+        self.window_slides = window_slides
+        self.lookahead_slides = lookahead_slides
+        self.question_chunks = question_chunks
+        self.k = k
+        self.reuse_threshold = reuse_threshold
+        self.repeat_threshold = repeat_threshold
+        self.current_slide: Optional[int] = None
+        self.stats = {
+            "chunks_fetched": 0,
+            "chunks_reused": 0,
+            "window_answers": 0,
+            "retrievals": 0,
+            "prompt_chunks": 0,
+        }
+        
+        self._lease = None
+        if course is None:
+            if pipeline.vector_store is None:
+                raise ValueError("The pipeline has no index; create or load one first")
+            index, chunks, self.index_version = pipeline.vector_store, pipeline.chunks, None
+        else:
+            if pipeline.index_registry is None:
+                raise ValueError("Sessions on a course require an index_registry")
+            # Held for the whole lecture so the course is never evicted mid-session
+            self._lease = pipeline.index_registry.acquire(course)
+            course_index = self._lease.course
+            index, chunks = course_index.index, course_index.chunks
+            self.index_version = course_index.index_version
+        try:
+            if course is not None:
+                pipeline._check_embedding_model(course_index.embedding_model, course)
+            self._slide_rows = chunks.slide_rows(presentation_id)
+            if not self._slide_rows:
+                raise ValueError(f"No chunks for presentation {presentation_id!r}")
+            self._index = index.load() if isinstance(index, LazyIndex) else index
+        except Exception:
+            self.close()
+            raise
+        self._chunks = chunks
+        # Includes chunks of other decks that this deck's duplicates were collapsed into
+        self._rows = {row for rows in self._slide_rows.values() for row in rows}
+        self.slides = sorted(self._slide_rows)
+        self._window: Dict[int, List[int]] = {}
+        self._found: "OrderedDict[int, None]" = OrderedDict()
+        self._vectors: Dict[int, np.ndarray] = {}
+        # Recently searched questions; rephrasings of them reuse the found chunks
+        self._searched: deque = deque(maxlen=question_chunks)
+    
+    def close(self):
+        """Release the course index (idempotent)."""
+        if self._lease is not None:
+            self._lease.release()
+    
+    def __enter__(self) -> "LectureSession":
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+    
+    def goto(self, slide_number: int) -> int:
+        """
+        Make a slide current and move the window to it.
+        
+        Args:
+            slide_number: Slide to show
+            
+        Returns:
+            Number of chunks fetched (slides already in the window are reused)
+        """
+        if slide_number not in self._slide_rows:
+            raise ValueError(f"Presentation {self.presentation_id!r} has no slide {slide_number}")
+        position = self.slides.index(slide_number)
+        wanted = self.slides[max(0, position - self.window_slides):position + self.lookahead_slides + 1]
+        with self.pipeline.tracer.span("session_window", slide=slide_number) as span:
+            for slide in list(self._window):
+                if slide not in wanted:
+                    self._forget(self._window.pop(slide))
+            new_rows = []
+            for slide in wanted:
+                if slide in self._window:
+                    self.stats["chunks_reused"] += len(self._window[slide])
+                else:
+                    self._window[slide] = self._slide_rows[slide]
+                    new_rows.extend(row for row in self._slide_rows[slide] if row not in self._vectors)
+            self._fetch(new_rows)
+            span.set(fetched=len(new_rows), window_chunks=len(self._vectors))
+        self.current_slide = slide_number
+        return len(new_rows)
+    
+    def advance(self, steps: int = 1) -> int:
+        """
+        Move forward (or back, with negative steps) through the slides.
+        
+        Args:
+            steps: Slides to move; the first call starts at the first slide
+            
+        Returns:
+            The new current slide number
+        """
+        if self.current_slide is None:
+            position = 0
+        else:
+            position = self.slides.index(self.current_slide) + steps
+        position = min(max(position, 0), len(self.slides) - 1)
+        self.goto(self.slides[position])
+        return self.current_slide
+    
+    def narrate_slide(self, query: Optional[str] = None, request_id: Optional[str] = None) -> str:
+        """
+        Narrate the current slide, with the preceding slides in the window as background.
+        
+        Args:
+            query: Instruction for the narrative (defaults to "Narrate slide <n>")
+            request_id: ID that groups this request's spans
+            
+        Returns:
+            Generated narrative text
+        """
+        context = self.slide_context()
+        query = query or f"Narrate slide {self.current_slide}"
+        return self.pipeline.generate_narrative(query, context, self.presentation_id, request_id)
+    
+    def ask(self, question: str, request_id: Optional[str] = None) -> str:
+        """
+        Answer a question about the lecture so far.
+        
+        Args:
+            question: The question
+            request_id: ID that groups this request's spans
+            
+        Returns:
+            Generated answer text
+        """
+        context = self.context_for(question)
+        return self.pipeline.generate_narrative(question, context, self.presentation_id, request_id)
+    
+    def stream_ask(self, question: str, request_id: Optional[str] = None) -> Iterator[str]:
+        """
+        Stream the answer to a question (see ask).
+        
+        Yields:
+            Answer text fragments
+        """
+        context = self.context_for(question)
+        yield from self.pipeline.stream_narrative(question, context, self.presentation_id, request_id)
+    
+    def context_for(self, question: str) -> List[SearchHit]:
+        """
+        Best chunks for a question, searching the index only if the window falls short.
+        
+        Args:
+            question: The question
+            
+        Returns:
+            Up to k chunks of this presentation, best first
+        """
+        if self.current_slide is None:
+            self.advance()
+        vector = self.pipeline.embed_query(question)
+        with self.pipeline.tracer.span("session_context") as span:
+            rows, scores = self._score(vector[0])
+            source = "window"
+            if not self._covered(vector[0], scores):
+                source = "index"
+                self._retrieve(vector)
+                rows, scores = self._score(vector[0])
+            else:
+                self.stats["window_answers"] += 1
+            order = np.argsort(-scores, kind="stable")[:self.k]
+            for i in order:
+                if rows[i] in self._found:
+                    self._found.move_to_end(rows[i])
+            span.set(source=source, chunk_count=len(order))
+        return self._hits([rows[i] for i in order], [float(scores[i]) for i in order])
+    
+    def slide_context(self) -> List[SearchHit]:
+        """
+        Context narrate_slide sends for the current slide.
+        
+        Returns:
+            The current slide's chunks, then earlier window slides, newest first, up to k
+        """
+        if self.current_slide is None:
+            self.advance()
+        rows = list(self._window[self.current_slide])
+        for slide in sorted(self._window, reverse=True):
+            if slide < self.current_slide and len(rows) < self.k:
+                rows.extend(self._window[slide][:self.k - len(rows)])
+        return self._hits(rows, [1.0] * len(rows))
+    
+    def _covered(self, vector: np.ndarray, scores: np.ndarray) -> bool:
+        """Whether the session already holds good context for a question."""
+        if len(scores) and scores.max() >= self.reuse_threshold:
+            return True
+        return any(float(previous @ vector) >= self.repeat_threshold for previous in self._searched)
+    
+    def _hits(self, rows: Sequence[int], scores: Sequence[float]) -> List[SearchHit]:
+        self.stats["prompt_chunks"] += len(rows)
+        return [
+            SearchHit(self._chunks[row], score, self.index_version)
+            for row, score in zip(rows, scores)
+        ]
+    
+    def _score(self, vector: np.ndarray):
+        """Similarity of every chunk held by the session to a query vector."""
+        rows = list(self._vectors)
+        if not rows:
+            return rows, np.zeros(0, dtype=np.float32)
+        return rows, np.vstack([self._vectors[row] for row in rows]) @ vector
+    
+    def _retrieve(self, vector: np.ndarray):
+        """Search the index and keep this presentation's new hits for follow-ups."""
+        self.stats["retrievals"] += 1
+        self._searched.append(vector[0])
+        # Over-fetch: hits from other presentations are dropped
+        count = min(self.k * 4, len(self._chunks))
+        with self.pipeline.tracer.span("search", k=count):
+            _, indices = self._index.search(vector, count)
+        new_rows = []
+        for row in indices[0]:
+            row = int(row)
+            if row < 0 or row not in self._rows:
+                continue
+            if row not in self._vectors:
+                new_rows.append(row)
+            self._found[row] = None
+            self._found.move_to_end(row)
+            if len(new_rows) == self.k:
+                break
+        self._fetch(new_rows)
+        while len(self._found) > self.question_chunks:
+            row, _ = self._found.popitem(last=False)
+            self._forget([row])
+    
+    def _fetch(self, rows: List[int]):
+        """Load vectors for rows entering the session."""
+        if not rows:
+            return
+        try:
+            vectors = np.vstack([self._index.reconstruct(row) for row in rows])
+        except RuntimeError:
+            # Indexes without stored vectors (e.g. IVF without a direct map)
+            vectors = self.pipeline.embed_chunks([self._chunks[row] for row in rows])
+        for row, row_vector in zip(rows, vectors):
+            self._vectors[row] = np.asarray(row_vector, dtype=np.float32)
+        self.stats["chunks_fetched"] += len(rows)
+    
+    def _forget(self, rows: Sequence[int]):
+        """Drop vectors no longer referenced by the window or the found set."""
+        in_window = {row for slide_rows in self._window.values() for row in slide_rows}
+        for row in rows:
+            if row not in in_window and row not in self._found:
+                self._vectors.pop(row, None)
+
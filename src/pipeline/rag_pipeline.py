@@ -2,10 +2,27 @@
 RAG Pipeline for Presentation Document Processing
 """
 
-from typing import List, Optional, Dict
+from typing import Dict, Iterator, List, Mapping, Optional, Sequence
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
 import os
+import pickle
 from pathlib import Path
 
+import numpy as np
+
+from src.pipeline.dedup import DedupReport
+from src.pipeline.embeddings import create_embedder, embedder_id
+from src.pipeline.index_bundle import BundleError, IndexBundle, LazyIndex, write_bundle
+from src.pipeline.lecture_session import LectureSession
+from src.pipeline.records import ChunkStore, ChunkStoreBuilder, DocumentRecord, SearchHit
+from src.utils.document_processor import DocumentProcessor
+from src.utils.profiling import get_profiler
+from src.utils.tracing import get_tracer
+
+
+SUPPORTED_EXTENSIONS = {'.pdf', '.pptx'}
+
 
 class RAGPipeline:
     """
@@ -16,7 +33,17 @@ class RAGPipeline:
         self,
         documents_path: str = "data/presentations/",
         cache_enabled: bool = True,
-        vector_store_type: str = "faiss"
+        vector_store_type: str = "faiss",
+        embedder=None,
+        chunk_size: int = 1000,
+        chunk_overlap: int = 200,
+        agent=None,
+        tracer=None,
+        profiler=None,
+        index_registry=None,
+        deduplicator=None,
+        max_workers: int = 1,
+        embedding_batch_size: Optional[int] = None
     ):
         """
         Initialize the RAG pipeline.
@@ -24,53 +51,327 @@ class RAGPipeline:
         Args:
             documents_path: Path to presentation documents
             cache_enabled: Enable LLM response caching
-            vector_store_type: Type of vector store (faiss, chroma, etc.)
+            vector_store_type: Type of vector store (only faiss is supported)
+            embedder: Embedding model (defaults to the offline hashing embedder)
+            chunk_size: Characters per chunk
+            chunk_overlap: Characters shared by consecutive chunks of a slide
+            agent: NarrativeAgent used by generate_narrative (extractive fallback if None)
+            tracer: Tracer for stage spans (defaults to the process-wide tracer)
+            profiler: Profiler for sampled CPU/memory profiles (defaults to the process-wide profiler)
+            index_registry: IndexRegistry serving per-course indexes (see retrieve_context's course)
+            deduplicator: NearDuplicateDetector that collapses repeated chunks before embedding
+            max_workers: Processes extracting documents in parallel (1 extracts in this process)
+            embedding_batch_size: Chunks per embed_documents call (None embeds all at once)
         """
         self.documents_path = Path(documents_path)
         self.cache_enabled = cache_enabled
         self.vector_store_type = vector_store_type
         self.vector_store = None
-        self.embeddings = None
-        
-    def load_documents(self) -> List[Dict]:
+        self.embeddings = embedder
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.agent = agent
+        self.chunks: ChunkStore = ChunkStore.from_dicts([])
+        self.index_version: Optional[str] = None
+        self.tracer = tracer or get_tracer()
+        self.profiler = profiler or get_profiler()
+        self.index_registry = index_registry
+        self.deduplicator = deduplicator
+        self.dedup_report: Optional[DedupReport] = None
+        self.max_workers = max_workers
+        self.embedding_batch_size = embedding_batch_size
+    
+    def load_documents(self) -> List[DocumentRecord]:
         """
         Load and preprocess presentation documents.
         
         Returns:
-            List of processed document dictionaries
+            List of processed documents (records that also support dict-style access)
         """
-        # TODO: Implement document loading
         documents = []
+        if not self.documents_path.exists():
+            return documents
+        with self.profiler.profile("ingestion"), self.tracer.span("extraction", workers=self.max_workers) as span:
+            paths = [
+                file_path for file_path in sorted(self.documents_path.iterdir())
+                if file_path.is_file() and file_path.suffix.lower() in SUPPORTED_EXTENSIONS
+            ]
+            if self.max_workers > 1 and len(paths) > 1:
+                # Extraction is CPU-bound pure Python, so threads would serialize on the GIL
+                with ProcessPoolExecutor(max_workers=min(self.max_workers, len(paths))) as executor:
+                    slides = list(executor.map(DocumentProcessor.extract_slides, paths))
+            else:
+                slides = [DocumentProcessor.extract_slides(file_path) for file_path in paths]
+            for file_path, document_slides in zip(paths, slides):
+                documents.append(DocumentRecord(
+                    file_path.stem,
+                    file_path.stem.replace('_', ' ').title(),
+                    str(file_path),
+                    document_slides
+                ))
+            span.set(documents=len(documents), slides=sum(len(d.slides) for d in documents))
         return documents
     
-    def create_vector_store(self, documents: List[Dict]):
+    def chunk_documents(self, documents: Sequence[Mapping]) -> ChunkStore:
+        """
+        Split every slide into overlapping chunks.
+        
+        Args:
+            documents: Documents from load_documents (or dictionaries of the same shape)
+            
+        Returns:
+            Chunk store; each chunk has id, presentation_id, slide_number and text
+            (one chunk per group of near-duplicates when a deduplicator is set)
+        """
+        builder = ChunkStoreBuilder()
+        with self.tracer.span("chunking") as span:
+            for document in documents:
+                for slide_number, slide_text in enumerate(document["slides"], start=1):
+                    if not slide_text.strip():
+                        continue
+                    pieces = DocumentProcessor.chunk_text(slide_text, self.chunk_size, self.chunk_overlap)
+                    for i, text in enumerate(pieces):
+                        builder.add(document["id"], slide_number, i, text)
+            chunks = builder.build()
+            span.set(chunk_count=len(chunks))
+        if self.deduplicator is not None:
+            with self.tracer.span("dedup", chunk_count=len(chunks)) as span:
+                chunks, self.dedup_report = self.deduplicator.collapse(chunks)
+                span.set(removed=self.dedup_report.removed)
+        return chunks
+    
+    def _get_embedder(self):
+        if self.embeddings is None:
+            self.embeddings = create_embedder("hashing")
+        return self.embeddings
+    
+    def embed_chunks(self, chunks: Sequence[Mapping]) -> np.ndarray:
+        """
+        Embed chunk texts.
+        
+        Args:
+            chunks: Chunks from chunk_documents
+            
+        Returns:
+            Float32 matrix with one L2-normalized row per chunk
+        """
+        texts = ChunkStore.from_dicts(chunks).texts()
+        size = self.embedding_batch_size or max(len(texts), 1)
+        batches = [texts[i:i + size] for i in range(0, len(texts), size)] or [texts]
+        with self.tracer.span("embedding", chunk_count=len(chunks), batches=len(batches)):
+            embedder = self._get_embedder()
+            vectors = np.vstack([
+                np.asarray(embedder.embed_documents(batch), dtype=np.float32)
+                for batch in batches
+            ])
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+    
+    def build_index(self, chunks: Sequence[Mapping], vectors: np.ndarray):
+        """
+        Build the vector index over embedded chunks.
+        
+        Args:
+            chunks: Chunks the rows of vectors belong to
+            vectors: Normalized chunk embeddings
+        """
+        if self.vector_store_type != "faiss":
+            raise ValueError(f"Unsupported vector store type: {self.vector_store_type}")
+        import faiss
+        
+        with self.tracer.span("index_build", vectors=len(chunks)):
+            index = faiss.IndexFlatIP(vectors.shape[1])
+            index.add(vectors)
+        chunks = ChunkStore.from_dicts(chunks)
+        self.vector_store = index
+        self.chunks = chunks
+        
+        digest = hashlib.blake2b(digest_size=8)
+        for row in range(len(chunks)):
+            digest.update(chunks.chunk_id(row).encode("utf-8"))
+            digest.update(chunks.text_view(row))
+        self.index_version = digest.hexdigest()
+    
+    def cache_versions(self) -> Optional[Dict[str, str]]:
+        """Index stamp passed with every cache call (per call, so pipelines can share a cache)."""
+        # Narratives cached against an older index must not be served
+        return {"index": self.index_version} if self.index_version else None
+    
+    def create_vector_store(self, documents: Sequence[Mapping]):
         """
         Create FAISS vector store from documents.
         
         Args:
             documents: List of processed documents
         """
-        # TODO: Implement vector store creation
-        pass
+        with self.profiler.profile("index_build"):
+            chunks = self.chunk_documents(documents)
+            if not chunks:
+                return
+            self.build_index(chunks, self.embed_chunks(chunks))
+    
+    def save_index(self, name: str, models_dir: str = "models") -> Path:
+        """
+        Save the index and its chunks for loading by an IndexRegistry.
+        
+        Args:
+            name: Course name (file stem)
+            models_dir: Directory for the index files
+            
+        Returns:
+            Path to the saved index file
+        """
+        import faiss
+        
+        if self.vector_store is None:
+            raise ValueError("No index to save; call create_vector_store first")
+        models_path = Path(models_dir)
+        models_path.mkdir(parents=True, exist_ok=True)
+        index_path = models_path / f"{name}.index"
+        index = self.vector_store.load() if isinstance(self.vector_store, LazyIndex) else self.vector_store
+        faiss.write_index(index, str(index_path))
+        with open(models_path / f"{name}_metadata.pkl", 'wb') as f:
+            pickle.dump({"chunks": self.chunks, "index_version": self.index_version}, f)
+        return index_path
+    
+    def save_bundle(self, path: str, metadata: Optional[Dict] = None) -> Path:
+        """
+        Save the index, chunks, embedding model ID and chunking config as one checksummed bundle.
+        
+        Args:
+            path: Bundle file (e.g. models/ml101.ragidx)
+            metadata: Free-form metadata stored in the header
+            
+        Returns:
+            Path to the bundle
+        """
+        if self.vector_store is None:
+            raise ValueError("No index to save; call create_vector_store first")
+        index = self.vector_store.load() if isinstance(self.vector_store, LazyIndex) else self.vector_store
+        config = {
+            "chunk_size": self.chunk_size,
+            "chunk_overlap": self.chunk_overlap,
+            "vector_store_type": self.vector_store_type,
+        }
+        if self.deduplicator is not None:
+            config["dedup_threshold"] = self.deduplicator.threshold
+        return write_bundle(
+            path, index, self.chunks, self.index_version, embedder_id(self._get_embedder()), config, metadata
+        )
     
-    def retrieve_context(self, query: str, k: int = 5) -> List[Dict]:
+    def load_bundle(self, path: str, verify: bool = True) -> IndexBundle:
+        """
+        Serve the index from a bundle (memory-mapped; the index loads on first search).
+        
+        Args:
+            path: Bundle file
+            verify: Check section checksums before use
+            
+        Returns:
+            The opened bundle
+        """
+        bundle = IndexBundle(path, verify=verify)
+        self._check_embedding_model(bundle.embedding_model, path)
+        self.vector_store = bundle.index
+        self.chunks = bundle.chunks
+        self.index_version = bundle.index_version
+        return bundle
+    
+    def _check_embedding_model(self, model: Optional[str], source: str):
+        """Refuse indexes built with another embedding model; their scores would be meaningless."""
+        current = embedder_id(self._get_embedder())
+        if model is not None and model != current:
+            raise BundleError(f"{source} was built with embedding model {model}, not {current}")
+    
+    def retrieve_context(self, query: str, k: int = 5, course: Optional[str] = None) -> List[SearchHit]:
         """
         Retrieve relevant context for a query.
         
         Args:
             query: User query
             k: Number of documents to retrieve
+            course: Course whose index to search, from the index registry (None for this pipeline's index)
+            
+        Returns:
+            Relevant chunks with scores (records that also support dict-style access)
+        """
+        if course is None and self.vector_store is None:
+            return []
+        if course is not None and self.index_registry is None:
+            raise ValueError("Retrieving by course requires an index_registry")
+        with self.tracer.span("retrieval", k=k) as span:
+            vector = self.embed_query(query)
+            if course is None:
+                results = self._search(self.vector_store, self.chunks, vector, k)
+            else:
+                # The lease keeps the index resident until the search finishes
+                with self.index_registry.acquire(course) as course_index:
+                    self._check_embedding_model(course_index.embedding_model, course)
+                    results = self._search(
+                        course_index.index, course_index.chunks, vector, k, course_index.index_version
+                    )
+            span.set(chunk_count=len(results))
+        return results
+    
+    def embed_query(self, query: str) -> np.ndarray:
+        """
+        Embed a query for search.
+        
+        Args:
+            query: Query text
+            
+        Returns:
+            Float32 matrix with one L2-normalized row
+        """
+        with self.tracer.span("embed_query"):
+            vector = np.asarray([self._get_embedder().embed_query(query)], dtype=np.float32)
+            norm = np.linalg.norm(vector)
+            if norm:
+                vector /= norm
+        return vector
+    
+    def start_session(self, presentation_id: str, course: Optional[str] = None, **options) -> LectureSession:
+        """
+        Start a live-lecture session that keeps context between slides and questions.
+        
+        Args:
+            presentation_id: Presentation being lectured
+            course: Course index holding the presentation (None for this pipeline's index)
+            **options: LectureSession options (window_slides, lookahead_slides, k, ...)
             
         Returns:
-            List of relevant document chunks
+            LectureSession (close it when the lecture ends)
         """
-        # TODO: Implement retrieval
-        return []
+        return LectureSession(self, presentation_id, course, **options)
+    
+    def _search(
+        self,
+        index,
+        chunks: ChunkStore,
+        vector: np.ndarray,
+        k: int,
+        index_version: Optional[str] = None
+    ) -> List[SearchHit]:
+        """Nearest chunks to a normalized query vector."""
+        if not len(chunks):
+            return []
+        with self.tracer.span("search", k=k):
+            scores, indices = index.search(vector, min(k, len(chunks)))
+        return [
+            SearchHit(chunks[int(i)], float(score), index_version)
+            for score, i in zip(scores[0], indices[0])
+            if i >= 0
+        ]
     
     def generate_narrative(
         self,
         query: str,
-        context: Optional[List[Dict]] = None
+        context: Optional[Sequence[Mapping]] = None,
+        presentation_id: Optional[str] = None,
+        request_id: Optional[str] = None,
+        k: int = 5,
+        course: Optional[str] = None
     ) -> str:
         """
         Generate narrative from query and context.
@@ -78,14 +379,90 @@ class RAGPipeline:
         Args:
             query: User query
             context: Optional pre-retrieved context
+            presentation_id: Presentation the query is about (defaults to the top chunk's)
+            request_id: ID that groups this request's spans (generated if None)
+            k: Number of chunks to retrieve when context is None
+            course: Course index to retrieve from (see retrieve_context)
             
         Returns:
             Generated narrative text
         """
-        if context is None:
-            context = self.retrieve_context(query)
+        with self.tracer.request(request_id), self.profiler.profile("request"):
+            if context is None:
+                context = self.retrieve_context(query, k, course)
+            
+            context_text = self._assemble_context(context)
+            if self.agent is None:
+                # No LLM configured: answer with the retrieved slide text
+                return f"Narrative for query: {query}\n\n{context_text}".rstrip()
+            
+            if presentation_id is None:
+                presentation_id = context[0]["presentation_id"] if context else "general"
+            return self.agent.create_narrative(
+                presentation_id,
+                context_text,
+                query,
+                chunk_ids=[self._chunk_key(chunk) for chunk in context],
+                versions=self.cache_versions()
+            )
+    
+    def stream_narrative(
+        self,
+        query: str,
+        context: Optional[Sequence[Mapping]] = None,
+        presentation_id: Optional[str] = None,
+        request_id: Optional[str] = None,
+        k: int = 5,
+        course: Optional[str] = None
+    ) -> Iterator[str]:
+        """
+        Stream a narrative from query and context as it is generated.
         
-        # TODO: Implement narrative generation
-        narrative = f"Narrative for query: {query}"
-        return narrative
+        Consume the iterator from a single thread; the request's spans are
+        scoped to it.
+        
+        Args:
+            query: User query
+            context: Optional pre-retrieved context
+            presentation_id: Presentation the query is about (defaults to the top chunk's)
+            request_id: ID that groups this request's spans (generated if None)
+            k: Number of chunks to retrieve when context is None
+            course: Course index to retrieve from (see retrieve_context)
+            
+        Yields:
+            Narrative text fragments
+        """
+        with self.tracer.request(request_id):
+            if context is None:
+                context = self.retrieve_context(query, k, course)
+            
+            context_text = self._assemble_context(context)
+            if self.agent is None:
+                yield f"Narrative for query: {query}\n\n{context_text}".rstrip()
+                return
+            
+            if presentation_id is None:
+                presentation_id = context[0]["presentation_id"] if context else "general"
+            yield from self.agent.stream_narrative(
+                presentation_id,
+                context_text,
+                query,
+                chunk_ids=[self._chunk_key(chunk) for chunk in context],
+                versions=self.cache_versions()
+            )
+    
+    @staticmethod
+    def _chunk_key(chunk: Mapping) -> str:
+        """Cache key part for a chunk; course chunks carry their index version."""
+        if "index_version" in chunk:
+            # The cache's index stamp only covers this pipeline's own index
+            return f"{chunk['index_version']}/{chunk['id']}"
+        return chunk["id"]
+    
+    def _assemble_context(self, context: Sequence[Mapping]) -> str:
+        """Join retrieved chunks into the prompt context."""
+        with self.tracer.span("context_assembly", chunk_count=len(context)) as span:
+            context_text = "\n\n".join(chunk["text"] for chunk in context)
+            span.set(context_tokens=len(context_text.split()))
+        return context_text
 
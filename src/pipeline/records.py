@@ -0,0 +1,300 @@
+"""
+Compact Document, Chunk and Search Hit Records
+Chunks live in a struct-of-arrays store over one shared UTF-8 buffer; records are slotted views
+that also behave as read-only mappings, so dict-style call sites keep working.
+"""
+
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+from array import array
+from collections.abc import Mapping
+import sys
+
+
+CHUNK_FIELDS = ("id", "presentation_id", "slide_number", "text")
+DOCUMENT_FIELDS = ("id", "title", "file_path", "slides")
+
+
+class _RecordMapping(Mapping):
+    """Read-only dict adapter over a record's fields."""
+    
+    __slots__ = ()
+    _fields: Sequence[str] = ()
+    
+    def __getitem__(self, key: str):
+        if key not in self._fields:
+            raise KeyError(key)
+        return getattr(self, key)
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._fields)
+    
+    def __len__(self) -> int:
+        return len(self._fields)
+    
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({dict(self)!r})"
+
+
+class DocumentRecord(_RecordMapping):
+    """One loaded presentation with its slide texts."""
+    
+    __slots__ = ("id", "title", "file_path", "slides")
+    _fields = DOCUMENT_FIELDS
+    
+    def __init__(self, id: str, title: str, file_path: str, slides: List[str]):
+        self.id = id
+        self.title = title
+        self.file_path = file_path
+        self.slides = slides
+
+
+class Chunk(_RecordMapping):
+    """View of one row of a ChunkStore; the text is decoded on access."""
+    
+    __slots__ = ("_store", "_row")
+    _fields = CHUNK_FIELDS
+    
+    def __init__(self, store: "ChunkStore", row: int):
+        self._store = store
+        self._row = row
+    
+    @property
+    def id(self) -> str:
+        return self._store.chunk_id(self._row)
+    
+    @property
+    def presentation_id(self) -> str:
+        return self._store.presentation_ids[self._store.presentation_codes[self._row]]
+    
+    @property
+    def slide_number(self) -> int:
+        return self._store.slide_numbers[self._row]
+    
+    @property
+    def text(self) -> str:
+        return str(self.text_view, "utf-8")
+    
+    @property
+    def text_view(self) -> memoryview:
+        """UTF-8 bytes of the text, without copying the shared buffer."""
+        return self._store.text_view(self._row)
+    
+    @property
+    def provenance(self) -> List[Tuple[str, int, int]]:
+        """(presentation_id, slide_number, chunk_number) of this chunk and of duplicates collapsed into it."""
+        store, row = self._store, self._row
+        own = (self.presentation_id, store.slide_numbers[row], store.chunk_numbers[row])
+        return [own] + list((store.duplicates or {}).get(row, ()))
+
+
+class SearchHit(_RecordMapping):
+    """A retrieved chunk with its similarity score."""
+    
+    __slots__ = ("chunk", "score", "index_version")
+    
+    def __init__(self, chunk: Mapping, score: float, index_version: Optional[str] = None):
+        self.chunk = chunk
+        self.score = score
+        self.index_version = index_version
+    
+    @property
+    def _fields(self) -> Sequence[str]:
+        if self.index_version is None:
+            return CHUNK_FIELDS + ("score",)
+        return CHUNK_FIELDS + ("score", "index_version")
+    
+    def __getitem__(self, key: str):
+        if key == "score":
+            return self.score
+        if key == "index_version" and self.index_version is not None:
+            return self.index_version
+        return self.chunk[key]
+    
+    @property
+    def id(self) -> str:
+        return self.chunk["id"]
+    
+    @property
+    def presentation_id(self) -> str:
+        return self.chunk["presentation_id"]
+    
+    @property
+    def text(self) -> str:
+        return self.chunk["text"]
+
+
+class ChunkStore(Sequence):
+    """
+    Struct-of-arrays chunk table.
+    
+    Texts are concatenated into one immutable UTF-8 buffer addressed by
+    offsets; presentation IDs are interned; slide and chunk numbers are
+    typed arrays. Indexing returns a Chunk view, so the store can stand in
+    for the former list of chunk dictionaries.
+    """
+    
+    def __init__(
+        self,
+        buffer: Union[bytes, memoryview],
+        offsets: Union[array, memoryview],
+        presentation_ids: List[str],
+        presentation_codes: Union[array, memoryview],
+        slide_numbers: Union[array, memoryview],
+        chunk_numbers: Union[array, memoryview],
+        ids: Optional[List[str]] = None,
+        duplicates: Optional[Dict[int, List[Tuple[str, int, int]]]] = None
+    ):
+        """
+        Initialize the store from its columns (see ChunkStoreBuilder and from_dicts).
+        
+        Columns may be memoryviews over a memory-mapped file (see index_bundle).
+        
+        Args:
+            buffer: Concatenated UTF-8 chunk texts
+            offsets: Start of each text in buffer, plus the end of the last one
+            presentation_ids: Distinct presentation IDs
+            presentation_codes: Index into presentation_ids per chunk
+            slide_numbers: Slide number per chunk
+            chunk_numbers: Position of each chunk within its slide
+            ids: Explicit chunk IDs when they don't follow "<presentation>:<slide>:<n>"
+            duplicates: Locations of near-duplicate chunks collapsed into each row (see dedup)
+        """
+        self.buffer = buffer
+        self.offsets = offsets
+        self.presentation_ids = presentation_ids
+        self.presentation_codes = presentation_codes
+        self.slide_numbers = slide_numbers
+        self.chunk_numbers = chunk_numbers
+        self.ids = ids
+        self.duplicates = duplicates
+    
+    @classmethod
+    def from_dicts(cls, chunks: Iterable[Mapping]) -> "ChunkStore":
+        """
+        Build a store from chunk dictionaries (e.g. an index saved before records existed).
+        
+        Args:
+            chunks: Mappings with id, presentation_id, slide_number and text
+            
+        Returns:
+            ChunkStore
+        """
+        if isinstance(chunks, ChunkStore):
+            return chunks
+        builder = ChunkStoreBuilder()
+        ids = []
+        for chunk in chunks:
+            ids.append(chunk["id"])
+            builder.add(chunk["presentation_id"], chunk["slide_number"], 0, chunk["text"])
+        store = builder.build()
+        # Keep the original IDs verbatim
+        store.ids = ids or None
+        return store
+    
+    def __getstate__(self) -> Dict:
+        # Copy memory-mapped columns so the store can be pickled
+        state = dict(self.__dict__)
+        state["buffer"] = bytes(self.buffer)
+        for name in ("offsets", "presentation_codes", "slide_numbers", "chunk_numbers"):
+            column = state[name]
+            if isinstance(column, memoryview):
+                state[name] = array(column.format, column.tobytes())
+        return state
+    
+    def chunk_id(self, row: int) -> str:
+        if self.ids is not None:
+            return self.ids[row]
+        presentation = self.presentation_ids[self.presentation_codes[row]]
+        return f"{presentation}:{self.slide_numbers[row]}:{self.chunk_numbers[row]}"
+    
+    def text_view(self, row: int) -> memoryview:
+        return memoryview(self.buffer)[self.offsets[row]:self.offsets[row + 1]]
+    
+    def slide_rows(self, presentation_id: str) -> Dict[int, List[int]]:
+        """Rows of a presentation's chunks, grouped by slide number (including collapsed duplicates)."""
+        rows: Dict[int, List[int]] = {}
+        if presentation_id in self.presentation_ids:
+            code = self.presentation_ids.index(presentation_id)
+            for row, (row_code, slide) in enumerate(zip(self.presentation_codes, self.slide_numbers)):
+                if row_code == code:
+                    rows.setdefault(slide, []).append(row)
+        for row, locations in (self.duplicates or {}).items():
+            for duplicate_presentation, slide, _ in locations:
+                if duplicate_presentation == presentation_id and row not in rows.get(slide, ()):
+                    rows.setdefault(slide, []).append(row)
+        return rows
+    
+    def texts(self) -> List[str]:
+        """All chunk texts, in row order."""
+        view, offsets = memoryview(self.buffer), self.offsets
+        return [str(view[offsets[i]:offsets[i + 1]], "utf-8") for i in range(len(self))]
+    
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the store."""
+        columns = (self.offsets, self.presentation_codes, self.slide_numbers, self.chunk_numbers)
+        size = len(self.buffer) + sum(column.itemsize * len(column) for column in columns)
+        size += sum(sys.getsizeof(name) for name in self.presentation_ids)
+        if self.ids is not None:
+            size += sum(sys.getsizeof(chunk_id) for chunk_id in self.ids)
+        if self.duplicates:
+            size += sys.getsizeof(self.duplicates)
+            size += sum(sys.getsizeof(locations) for locations in self.duplicates.values())
+        return size
+    
+    def __len__(self) -> int:
+        return len(self.slide_numbers)
+    
+    def __getitem__(self, row: Union[int, slice]):
+        if isinstance(row, slice):
+            return [Chunk(self, i) for i in range(*row.indices(len(self)))]
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError("chunk index out of range")
+        return Chunk(self, row)
+
+
+class ChunkStoreBuilder:
+    """Accumulates chunks and builds an immutable ChunkStore."""
+    
+    def __init__(self):
+        self._texts: List[bytes] = []
+        self._offsets = array("q", [0])
+        self._codes: Dict[str, int] = {}
+        self._presentation_codes = array("i")
+        self._slide_numbers = array("i")
+        self._chunk_numbers = array("i")
+    
+    def add(self, presentation_id: str, slide_number: int, chunk_number: int, text: str):
+        """
+        Append one chunk.
+        
+        Args:
+            presentation_id: Presentation the chunk belongs to
+            slide_number: 1-based slide number
+            chunk_number: Position of the chunk within its slide
+            text: Chunk text
+        """
+        encoded = text.encode("utf-8")
+        self._texts.append(encoded)
+        self._offsets.append(self._offsets[-1] + len(encoded))
+        code = self._codes.setdefault(presentation_id, len(self._codes))
+        self._presentation_codes.append(code)
+        self._slide_numbers.append(slide_number)
+        self._chunk_numbers.append(chunk_number)
+    
+    def __len__(self) -> int:
+        return len(self._slide_numbers)
+    
+    def build(self) -> ChunkStore:
+        """Join the texts into one buffer and return the store."""
+        return ChunkStore(
+            b"".join(self._texts),
+            self._offsets,
+            list(self._codes),
+            self._presentation_codes,
+            self._slide_numbers,
+            self._chunk_numbers
+        )
+
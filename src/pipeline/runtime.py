@@ -0,0 +1,318 @@
+"""
+Runtime Components Built from the Configuration
+"""
+
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from src.pipeline.index_bundle import BUNDLE_SUFFIX
+from src.utils.config import Config, ConfigError
+from src.utils.profiling import configure_profiling
+from src.utils.tracing import configure_tracing
+
+
+class Runtime:
+    """
+    Builds the cache, agent, pipeline, registry and executors described by a Config.
+    
+    Components are created on first use and shared, so the agent and the
+    pipeline use the same response cache. Tracing and profiling are enabled
+    when the config asks for them; RAG_TRACING and RAG_PROFILE still switch
+    them on otherwise. Long-running entry points call start_background() and
+    close() for the cache's background threads.
+    """
+    
+    def __init__(self, config: Config):
+        """
+        Initialize the runtime.
+        
+        Args:
+            config: Validated configuration (see load_config)
+        """
+        self.config = config
+        self._components: Dict[str, object] = {}
+        self._tasks: List = []
+        
+        observability = config.observability
+        if observability.tracing:
+            configure_tracing(True)
+        if observability.profiling.enabled:
+            profiling = observability.profiling
+            configure_profiling(
+                True,
+                output_dir=profiling.output_dir,
+                sample_rate=profiling.sample_rate,
+                stages=profiling.stages,
+                memory=profiling.memory
+            )
+    
+    def _component(self, name: str, factory: Callable[[], object]):
+        if name not in self._components:
+            self._components[name] = factory()
+        return self._components[name]
+    
+    @property
+    def max_workers(self) -> int:
+        """Extraction processes (1 when parallel_processing is off)."""
+        performance = self.config.performance
+        return performance.max_workers if performance.parallel_processing else 1
+    
+    @property
+    def narration_workers(self) -> int:
+        """
+        Batch narration threads: performance.narration_workers, else max_workers.
+        
+        Raises:
+            ConfigError: If narration_workers asks for several threads while
+                parallel_processing is off
+        """
+        performance = self.config.performance
+        if performance.narration_workers is None:
+            return self.max_workers
+        if performance.narration_workers > 1 and not performance.parallel_processing:
+            raise ConfigError(
+                f"performance.narration_workers: {performance.narration_workers} threads "
+                "need performance.parallel_processing (it is false)"
+            )
+        return performance.narration_workers
+    
+    def response_cache(self):
+        """Shared ResponseCache, or None when caching is disabled."""
+        return self._component("response_cache", self._build_response_cache)
+    
+    def _build_response_cache(self):
+        from src.cache.response_cache import ResponseCache
+        
+        cache = self.config.cache
+        if not cache.enabled:
+            return None
+        # The LRU memory tier always sits in front of the shared store
+        backend, backend_options = cache.disk_backend, {}
+        if cache.type == "redis":
+            backend, backend_options = "redis", {"url": cache.redis_url, "compress": cache.redis_compress}
+        return ResponseCache(
+            cache_dir=cache.cache_dir,
+            ttl=cache.ttl,
+            max_memory_entries=cache.max_memory_entries,
+            max_memory_bytes=cache.max_memory_mb * 1024 * 1024,
+            backend=backend,
+            backend_options=backend_options,
+            compression=cache.compression,
+            compress_threshold=cache.compress_threshold,
+            compression_dictionary=cache.compression_dictionary,
+            process_lock=True
+        )
+    
+    def start_background(self, serving: bool = True):
+        """
+        Start the response cache's background threads.
+        
+        The sweeper runs when cache.ttl and cache.sweep_interval are set, and
+        metrics are written every cache.metrics_interval seconds and on close().
+        When serving, the hot set is also snapshotted every cache.hot_set_interval
+        seconds and on close(), and without an index to load (see index_loader)
+        the warm start begins here.
+        
+        Args:
+            serving: False for batch runs, whose writes would replace the
+                serving processes' hot set
+        """
+        from src.cache.response_cache import CacheTask
+        
+        cache = self.response_cache()
+        if cache is None or self._tasks:
+            return
+        settings = self.config.cache
+        if settings.ttl and settings.sweep_interval:
+            cache.start_sweeper(settings.sweep_interval)
+        self._tasks.append(CacheTask("cache-metrics", cache.write_metrics, settings.metrics_interval))
+        if serving:
+            self._tasks.append(CacheTask(
+                "cache-hot-set", lambda: cache.snapshot_hot_set(settings.hot_set_size), settings.hot_set_interval
+            ))
+        for task in self._tasks:
+            task.start()
+        if serving and self.index_loader() is None:
+            self.warm_start()
+    
+    def warm_start(self):
+        """
+        Preload the hot set saved by the last run into the memory tier, in the background.
+        
+        Entries are matched under the agent's and the loaded index's versions, so
+        call this once the index is loaded (index_loader does).
+        
+        Returns:
+            The running CacheWarmer, or None when cache.warm_start is off or nothing is cached
+        """
+        cache, agent = self.response_cache(), self.agent()
+        settings = self.config.cache
+        if cache is None or agent is None or not settings.warm_start:
+            return None
+        versions = {**agent.cache_versions(), **(self.pipeline().cache_versions() or {})}
+        max_bytes = settings.warm_max_mb * 1024 * 1024 if settings.warm_max_mb is not None else None
+        return cache.warm_start(max_bytes=max_bytes, presentation_id=settings.warm_presentation, versions=versions)
+    
+    def close(self):
+        """Stop the background threads started by start_background, writing final metrics."""
+        cache = self._components.get("response_cache")
+        if cache is not None:
+            cache.stop_sweeper()
+        for task in self._tasks:
+            task.stop()
+        self._tasks = []
+    
+    def agent(self):
+        """Shared NarrativeAgent, or None for provider "none" (extractive answers)."""
+        return self._component("agent", self._build_agent)
+    
+    def _build_agent(self):
+        from src.agents.narrative_agent import NarrativeAgent
+        
+        llm = self.config.llm
+        if llm.provider == "none":
+            return None
+        options = dict(llm.options)
+        if llm.provider != "simulated":
+            options.setdefault("model", llm.model)
+            options.setdefault("temperature", llm.temperature)
+            options.setdefault("max_tokens", llm.max_tokens)
+            options.setdefault("hedge", llm.hedge)
+        return NarrativeAgent(
+            prompt_template=llm.prompt_template,
+            cache_enabled=self.config.cache.enabled,
+            llm_provider=llm.provider,
+            llm_options=options,
+            cache=self.response_cache()
+        )
+    
+    def embedder(self):
+        """Shared embedding model."""
+        from src.pipeline.embeddings import create_embedder
+        
+        return self._component("embedder", lambda: create_embedder(self.config.vector_store.embedding_model))
+    
+    def deduplicator(self):
+        """NearDuplicateDetector, or None when vector_store.dedup_threshold is unset."""
+        from src.pipeline.dedup import NearDuplicateDetector
+        
+        threshold = self.config.vector_store.dedup_threshold
+        return self._component(
+            "deduplicator",
+            lambda: NearDuplicateDetector(threshold) if threshold is not None else None
+        )
+    
+    def index_registry(self):
+        """Shared IndexRegistry over server.courses_dir, or None when it is unset."""
+        return self._component("index_registry", self._build_index_registry)
+    
+    def _build_index_registry(self):
+        from src.pipeline.index_registry import IndexFileLoader, IndexRegistry
+        
+        server = self.config.server
+        if not server.courses_dir:
+            return None
+        registry = IndexRegistry(IndexFileLoader(server.courses_dir), max_bytes=server.index_budget_mb * 1024 * 1024)
+        registry.preload(server.pin, pin_until=float("inf"))
+        return registry
+    
+    def pipeline(self):
+        """Shared RAGPipeline wired to the agent, embedder, deduplicator and registry."""
+        return self._component("pipeline", self._build_pipeline)
+    
+    def _build_pipeline(self):
+        from src.pipeline.rag_pipeline import RAGPipeline
+        
+        vector_store = self.config.vector_store
+        return RAGPipeline(
+            documents_path=self.config.data.presentations_dir,
+            cache_enabled=self.config.cache.enabled,
+            vector_store_type=vector_store.type,
+            embedder=self.embedder(),
+            chunk_size=vector_store.chunk_size,
+            chunk_overlap=vector_store.chunk_overlap,
+            agent=self.agent(),
+            index_registry=self.index_registry(),
+            deduplicator=self.deduplicator(),
+            max_workers=self.max_workers,
+            embedding_batch_size=self.config.performance.batch_size
+        )
+    
+    @property
+    def bundle_path(self) -> Path:
+        """Bundle for vector_store.index_path (".ragidx" is appended if missing)."""
+        path = Path(self.config.vector_store.index_path)
+        return path if path.suffix == BUNDLE_SUFFIX else path.with_name(path.name + BUNDLE_SUFFIX)
+    
+    def index_loader(self) -> Optional[Callable[[], None]]:
+        """
+        Loader for the server's background index load, followed by the cache warm start.
+        
+        Loads the bundle at vector_store.index_path, or indexes data.presentations_dir
+        when there is none.
+        
+        Returns:
+            The loader, or None when there is no bundle and course indexes are served
+        """
+        bundle = self.bundle_path.exists()
+        if not bundle and self.index_registry() is not None:
+            return None
+        
+        def load():
+            self.load_index()
+            self.warm_start()
+        
+        return load
+    
+    def load_index(self):
+        """Load the bundle at vector_store.index_path, or index data.presentations_dir when there is none."""
+        pipeline = self.pipeline()
+        if self.bundle_path.exists():
+            pipeline.load_bundle(str(self.bundle_path))
+        else:
+            pipeline.create_vector_store(pipeline.load_documents())
+    
+    def batch_narrator(self, checkpoint_path: Optional[str] = None):
+        """
+        BatchNarrator using the shared agent, narration_workers and requests_per_second.
+        
+        Loads the index first (see load_index) so jobs_for_index narrates the
+        same chunks, under the same index version, that the server will.
+        
+        Args:
+            checkpoint_path: JSONL checkpoint (defaults to <data.processed_dir>/narrations/checkpoint.jsonl)
+            
+        Returns:
+            BatchNarrator
+            
+        Raises:
+            ValueError: If llm.provider is none
+            ConfigError: If the worker settings conflict (see narration_workers)
+        """
+        from src.pipeline.batch_narrator import BatchNarrator
+        
+        if self.agent() is None:
+            raise ValueError("Batch narration needs an LLM provider (llm.provider is none)")
+        checkpoint_path = checkpoint_path or str(Path(self.config.data.processed_dir) / "narrations" / "checkpoint.jsonl")
+        narrator = BatchNarrator(
+            self.agent(),
+            max_workers=self.narration_workers,
+            requests_per_second=self.config.performance.requests_per_second,
+            checkpoint_path=checkpoint_path,
+            pipeline=self.pipeline()
+        )
+        self.load_index()
+        return narrator
+    
+    def server_options(self) -> Dict:
+        """Keyword arguments for serve() / NarrationServer from the server section."""
+        server = self.config.server
+        return {
+            "host": server.host,
+            "port": server.port,
+            "max_concurrency": server.concurrency,
+            "max_queue": server.queue,
+            "queue_timeout": server.queue_timeout,
+            "index_loader": self.index_loader(),
+        }
+
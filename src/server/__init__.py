@@ -0,0 +1,4 @@
+"""
+HTTP Serving Front-end
+"""
+
@@ -0,0 +1,635 @@
+"""
+Async HTTP Server for the RAG Pipeline
+Retrieve, narrate and streamed-narrate endpoints with bounded concurrency and a readiness probe.
+"""
+
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+import asyncio
+import json
+import re
+import threading
+import time
+import uuid
+
+from src.agents.llm_providers import LLMProviderError, RateLimitError
+from src.cache.metrics import LatencyHistogram, histogram_lines, render_prometheus
+from src.utils.tracing import STAGE_BUCKETS
+
+
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    408: "Request Timeout",
+    413: "Payload Too Large",
+    431: "Request Header Fields Too Large",
+    500: "Internal Server Error",
+    502: "Bad Gateway",
+    503: "Service Unavailable",
+}
+
+ENDPOINTS = ("/healthz", "/readyz", "/metrics", "/retrieve", "/narrate", "/narrate/stream")
+
+_END = object()
+
+# Fragments a streamed narrative may run ahead of a slow client before generation waits
+STREAM_BUFFER = 32
+
+# RFC 9110 token characters, which a request method must consist of
+_TOKEN = re.compile(r"[!#$%&'*+.^_`|~0-9A-Za-z-]+")
+
+
+class HTTPError(Exception):
+    """Error answered with a JSON body and the given status."""
+    
+    def __init__(self, status: int, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.retry_after = retry_after
+
+
+class Request:
+    """Parsed HTTP/1.1 request."""
+    
+    __slots__ = ("method", "path", "headers", "body", "keep_alive")
+    
+    def __init__(self, method: str, path: str, headers: Dict[str, str], body: bytes, keep_alive: bool):
+        self.method = method
+        self.path = path
+        self.headers = headers
+        self.body = body
+        self.keep_alive = keep_alive
+    
+    def json(self) -> Dict:
+        """Decode the body as a JSON object."""
+        try:
+            payload = json.loads(self.body or b"{}")
+        except ValueError:
+            raise HTTPError(400, "Body is not valid JSON")
+        if not isinstance(payload, dict):
+            raise HTTPError(400, "Body must be a JSON object")
+        return payload
+
+
+class NarrationServer:
+    """
+    Asyncio HTTP/1.1 front-end for a RAGPipeline.
+    
+    Pipeline calls are blocking, so they run on a thread pool sized to
+    max_concurrency. Requests beyond that wait for a slot; once max_queue
+    requests are waiting, or a request waits longer than queue_timeout, the
+    server answers 503 with Retry-After instead of queueing without bound.
+    """
+    
+    def __init__(
+        self,
+        pipeline,
+        host: str = "127.0.0.1",
+        port: int = 8080,
+        max_concurrency: int = 8,
+        max_queue: int = 64,
+        queue_timeout: float = 10.0,
+        idle_timeout: float = 30.0,
+        max_body_bytes: int = 64 * 1024,
+        index_loader: Optional[Callable[[], None]] = None
+    ):
+        """
+        Initialize the server.
+        
+        Args:
+            pipeline: RAGPipeline to serve
+            host: Interface to bind
+            port: Port to bind (0 picks a free port)
+            max_concurrency: Requests processed at once
+            max_queue: Requests allowed to wait for a slot before rejecting
+            queue_timeout: Seconds a request may wait for a slot
+            idle_timeout: Seconds a keep-alive connection may sit idle
+            max_body_bytes: Largest accepted request body
+            index_loader: Builds the index in the background on start (defaults to loading
+                documents_path unless the pipeline already has an index or an index registry)
+        """
+        self.pipeline = pipeline
+        self.host = host
+        self.port = port
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.idle_timeout = idle_timeout
+        self.max_body_bytes = max_body_bytes
+        self.index_loader = index_loader
+        if index_loader is None and pipeline.vector_store is None and pipeline.index_registry is None:
+            self.index_loader = self._load_index
+        
+        self.ready = self.index_loader is None
+        self.load_error: Optional[str] = None
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="rag-serve")
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._loader: Optional[asyncio.Task] = None
+        self._connections: Dict[asyncio.StreamWriter, asyncio.Task] = {}
+        self._waiting = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._responses: Dict[Tuple[str, int], int] = {}
+        self._rejected = 0
+        self._latency = {endpoint: LatencyHistogram(STAGE_BUCKETS) for endpoint in ENDPOINTS}
+        self._routes = {
+            ("GET", "/healthz"): self._health,
+            ("GET", "/readyz"): self._readiness,
+            ("GET", "/metrics"): self._metrics,
+            ("POST", "/retrieve"): self._retrieve,
+            ("POST", "/narrate"): self._narrate,
+        }
+    
+    def _load_index(self):
+        """Load documents and build the index."""
+        self.pipeline.create_vector_store(self.pipeline.load_documents())
+    
+    async def start(self):
+        """Start listening and, if needed, build the index in the background."""
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        if not self.ready:
+            self._loader = asyncio.create_task(self._build_index())
+    
+    async def _build_index(self):
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(self.executor, self.index_loader)
+        except Exception as e:
+            self.load_error = f"{type(e).__name__}: {e}"
+            print(f"✗ Index load failed: {self.load_error}")
+        else:
+            self.ready = True
+    
+    async def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for the index to load.
+        
+        Args:
+            timeout: Seconds to wait (None for no limit)
+            
+        Returns:
+            True if the server is ready
+        """
+        if self._loader is not None:
+            await asyncio.wait_for(asyncio.shield(self._loader), timeout)
+        return self.ready
+    
+    async def serve_forever(self):
+        """Start the server and serve until cancelled."""
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+    
+    async def stop(self):
+        """Stop accepting connections and release the worker threads."""
+        if self._loader is not None and not self._loader.done():
+            self._loader.cancel()
+        if self._server is not None:
+            self._server.close()
+            # Closing the transports ends idle keep-alive handlers with EOF
+            handlers = list(self._connections.values())
+            for writer in list(self._connections):
+                writer.close()
+            if handlers:
+                await asyncio.wait(handlers, timeout=1.0)
+            await self._server.wait_closed()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+    
+    # Connection handling
+    
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._connections[writer] = asyncio.current_task()
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except HTTPError as e:
+                    await self._send_error(writer, "", e, keep_alive=False)
+                    break
+                if request is None:
+                    break
+                if not await self._dispatch(request, writer):
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._connections.pop(writer, None)
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+    
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[Request]:
+        """Read one request; None when the client closed the connection or went idle."""
+        try:
+            line = await asyncio.wait_for(reader.readline(), self.idle_timeout)
+        except asyncio.TimeoutError:
+            return None
+        except ValueError:
+            raise HTTPError(431, "Request line too long")
+        if not line.strip():
+            return None
+        parts = line.decode("latin-1").split()
+        if len(parts) != 3 or not _TOKEN.fullmatch(parts[0]) or not parts[2].startswith("HTTP/1."):
+            raise HTTPError(400, "Malformed request line")
+        method, target, version = parts
+        
+        headers = {}
+        while True:
+            try:
+                line = await asyncio.wait_for(reader.readline(), self.idle_timeout)
+            except asyncio.TimeoutError:
+                raise HTTPError(408, "Timed out reading headers")
+            except ValueError:
+                raise HTTPError(431, "Header line too long")
+            if line in (b"\r\n", b"\n", b""):
+                break
+            if len(headers) >= 100:
+                raise HTTPError(431, "Too many headers")
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        
+        try:
+            length = int(headers.get("content-length", "0"))
+        except ValueError:
+            raise HTTPError(400, "Invalid Content-Length")
+        if length < 0:
+            raise HTTPError(400, "Invalid Content-Length")
+        if length > self.max_body_bytes:
+            raise HTTPError(413, f"Body exceeds {self.max_body_bytes} bytes")
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            raise HTTPError(400, "Chunked request bodies are not supported")
+        body = await reader.readexactly(length) if length > 0 else b""
+        
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+        return Request(method, urlsplit(target).path, headers, body, keep_alive)
+    
+    async def _dispatch(self, request: Request, writer: asyncio.StreamWriter) -> bool:
+        """Answer one request; returns whether to keep the connection open."""
+        request_id = request.headers.get("x-request-id") or uuid.uuid4().hex[:16]
+        start = time.perf_counter()
+        status = 500
+        try:
+            if (request.method, request.path) == ("POST", "/narrate/stream"):
+                status = await self._stream_narrative(request, writer, request_id)
+                return request.keep_alive
+            handler = self._routes.get((request.method, request.path))
+            if handler is None:
+                if request.path in ENDPOINTS:
+                    raise HTTPError(405, f"{request.method} not allowed on {request.path}")
+                raise HTTPError(404, f"No endpoint {request.path}")
+            status, content_type, body = await handler(request, request_id)
+            await self._send(writer, status, body, content_type, request_id, request.keep_alive)
+            return request.keep_alive
+        except HTTPError as e:
+            status = e.status
+            await self._send_error(writer, request_id, e, request.keep_alive)
+            return request.keep_alive
+        except (ConnectionError, asyncio.IncompleteReadError):
+            raise
+        except Exception as e:
+            print(f"✗ {request.method} {request.path} [{request_id}]: {type(e).__name__}: {e}")
+            await self._send_error(writer, request_id, HTTPError(500, "Internal server error"), False)
+            return False
+        finally:
+            self._observe(request.path, status, time.perf_counter() - start)
+    
+    async def _send(
+        self,
+        writer: asyncio.StreamWriter,
+        status: int,
+        body: bytes,
+        content_type: str,
+        request_id: str,
+        keep_alive: bool,
+        extra_headers: Optional[Dict[str, str]] = None
+    ):
+        headers = {
+            "Content-Type": content_type,
+            "Content-Length": str(len(body)),
+            "Connection": "keep-alive" if keep_alive else "close",
+        }
+        if request_id:
+            headers["X-Request-ID"] = request_id
+        headers.update(extra_headers or {})
+        writer.write(self._head(status, headers) + body)
+        await writer.drain()
+    
+    async def _send_error(self, writer: asyncio.StreamWriter, request_id: str, error: HTTPError, keep_alive: bool):
+        extra = {}
+        if error.retry_after is not None:
+            extra["Retry-After"] = str(max(1, int(round(error.retry_after))))
+        body = json.dumps({"error": error.message}).encode("utf-8")
+        await self._send(writer, error.status, body, "application/json", request_id, keep_alive, extra)
+    
+    @staticmethod
+    def _head(status: int, headers: Dict[str, str]) -> bytes:
+        lines = [f"HTTP/1.1 {status} {REASONS.get(status, '')}"]
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+    
+    @staticmethod
+    def _json(status: int, payload: Dict) -> Tuple[int, str, bytes]:
+        return status, "application/json", json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    
+    # Backpressure
+    
+    async def _acquire_slot(self):
+        """Wait for a processing slot, or reject when the queue is full."""
+        if not self._slots.locked():
+            # Free slot: acquire() returns without suspending
+            await self._slots.acquire()
+        else:
+            if self._waiting >= self.max_queue:
+                with self._lock:
+                    self._rejected += 1
+                raise HTTPError(503, "Server overloaded", retry_after=1)
+            self._waiting += 1
+            try:
+                await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                with self._lock:
+                    self._rejected += 1
+                raise HTTPError(503, "Timed out waiting for a worker", retry_after=self.queue_timeout)
+            finally:
+                self._waiting -= 1
+        self._in_flight += 1
+    
+    def _release_slot(self):
+        self._in_flight -= 1
+        self._slots.release()
+    
+    async def _run(self, fn: Callable, *args):
+        """Run a blocking pipeline call on a worker slot."""
+        self._check_ready()
+        await self._acquire_slot()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+        except RateLimitError as e:
+            raise HTTPError(503, str(e), retry_after=e.retry_after)
+        except LLMProviderError as e:
+            raise HTTPError(502, str(e))
+        except FileNotFoundError as e:
+            # Raised by the index registry for unknown courses
+            raise HTTPError(404, str(e))
+        finally:
+            self._release_slot()
+    
+    def _check_ready(self):
+        if self.load_error is not None:
+            raise HTTPError(503, f"Index failed to load: {self.load_error}")
+        if not self.ready:
+            raise HTTPError(503, "Index is loading", retry_after=1)
+    
+    # Endpoints
+    
+    async def _health(self, request: Request, request_id: str):
+        return self._json(200, {"status": "ok"})
+    
+    async def _readiness(self, request: Request, request_id: str):
+        if self.load_error is not None:
+            return self._json(503, {"status": "failed", "error": self.load_error})
+        if not self.ready:
+            return self._json(503, {"status": "loading"})
+        return self._json(200, {"status": "ready", "chunks": len(self.pipeline.chunks)})
+    
+    async def _metrics(self, request: Request, request_id: str):
+        text = self.render_prometheus()
+        return 200, "text/plain; version=0.0.4", text.encode("utf-8")
+    
+    def _query_args(self, payload: Dict) -> Tuple[str, int, Optional[str]]:
+        query = payload.get("query")
+        if not isinstance(query, str) or not query.strip():
+            raise HTTPError(400, "'query' must be a non-empty string")
+        k = payload.get("k", 5)
+        if not isinstance(k, int) or isinstance(k, bool) or not 1 <= k <= 100:
+            raise HTTPError(400, "'k' must be an integer between 1 and 100")
+        course = payload.get("course")
+        if course is not None:
+            if self.pipeline.index_registry is None:
+                raise HTTPError(400, "This server has no per-course indexes")
+            if not isinstance(course, str) or not course or "/" in course or course.startswith("."):
+                raise HTTPError(400, "'course' must be a course name")
+        return query, k, course
+    
+    async def _retrieve(self, request: Request, request_id: str):
+        query, k, course = self._query_args(request.json())
+        
+        def retrieve():
+            with self.pipeline.tracer.request(request_id):
+                return self.pipeline.retrieve_context(query, k, course)
+        
+        chunks = await self._run(retrieve)
+        return self._json(200, {"request_id": request_id, "chunks": [dict(chunk) for chunk in chunks]})
+    
+    async def _narrate(self, request: Request, request_id: str):
+        payload = request.json()
+        query, k, course = self._query_args(payload)
+        narrative = await self._run(
+            self.pipeline.generate_narrative, query, None, payload.get("presentation_id"), request_id, k, course
+        )
+        return self._json(200, {"request_id": request_id, "narrative": narrative})
+    
+    async def _stream_narrative(self, request: Request, writer: asyncio.StreamWriter, request_id: str) -> int:
+        """Send narrative fragments with chunked transfer encoding as they are generated."""
+        payload = request.json()
+        query, k, course = self._query_args(payload)
+        self._check_ready()
+        await self._acquire_slot()
+        
+        loop = asyncio.get_running_loop()
+        fragments: asyncio.Queue = asyncio.Queue(maxsize=STREAM_BUFFER)
+        cancelled = threading.Event()
+        
+        def put(item):
+            # Waits while the queue is full, so generation stalls with the client
+            asyncio.run_coroutine_threadsafe(fragments.put(item), loop).result()
+        
+        def produce():
+            # The whole iteration stays on this thread so the request's spans are scoped correctly
+            iterator = self.pipeline.stream_narrative(
+                query, None, payload.get("presentation_id"), request_id, k, course
+            )
+            item = _END
+            try:
+                for fragment in iterator:
+                    if cancelled.is_set():
+                        break
+                    put(fragment)
+            except Exception as e:
+                item = e
+            finally:
+                iterator.close()
+            put(item)
+        
+        producer = loop.run_in_executor(self.executor, produce)
+        try:
+            # Hold the headers until the first fragment so early failures get a proper status
+            first = await fragments.get()
+            if isinstance(first, RateLimitError):
+                raise HTTPError(503, str(first), retry_after=first.retry_after)
+            if isinstance(first, LLMProviderError):
+                raise HTTPError(502, str(first))
+            if isinstance(first, FileNotFoundError):
+                raise HTTPError(404, str(first))
+            if isinstance(first, Exception):
+                raise first
+            
+            writer.write(self._head(200, {
+                "Content-Type": "text/plain; charset=utf-8",
+                "Transfer-Encoding": "chunked",
+                "Connection": "keep-alive" if request.keep_alive else "close",
+                "X-Request-ID": request_id,
+            }))
+            item = first
+            while item is not _END:
+                if isinstance(item, Exception):
+                    # Headers are out; drop the connection so the client sees a truncated body
+                    raise ConnectionAbortedError(f"stream failed: {item}")
+                data = item.encode("utf-8")
+                if data:
+                    writer.write(f"{len(data):x}\r\n".encode("latin-1") + data + b"\r\n")
+                    await writer.drain()
+                item = await fragments.get()
+            writer.write(b"0\r\n\r\n")
+            await writer.drain()
+            return 200
+        finally:
+            cancelled.set()
+            try:
+                # Keep the slot until the worker thread notices and stops
+                await asyncio.shield(self._drain(fragments, producer))
+            finally:
+                self._release_slot()
+    
+    @staticmethod
+    async def _drain(fragments: asyncio.Queue, producer: asyncio.Future):
+        """Discard fragments until the producer finishes, so a put waiting on a full queue returns."""
+        while not producer.done():
+            while not fragments.empty():
+                fragments.get_nowait()
+            await asyncio.wait({producer}, timeout=0.05)
+        await producer
+    
+    # Metrics
+    
+    def _observe(self, path: str, status: int, seconds: float):
+        endpoint = path if path in ENDPOINTS else "other"
+        with self._lock:
+            key = (endpoint, status)
+            self._responses[key] = self._responses.get(key, 0) + 1
+            if endpoint in self._latency:
+                self._latency[endpoint].observe(seconds)
+    
+    def stats(self) -> Dict:
+        """
+        Server counters.
+        
+        Returns:
+            Dictionary with ready, in_flight, waiting, rejected and responses by endpoint and status
+        """
+        with self._lock:
+            responses = {f"{endpoint} {status}": count for (endpoint, status), count in sorted(self._responses.items())}
+            rejected = self._rejected
+        return {
+            "ready": self.ready,
+            "in_flight": self._in_flight,
+            "waiting": self._waiting,
+            "rejected": rejected,
+            "responses": responses,
+        }
+    
+    def render_prometheus(self) -> str:
+        """
+        Server, stage and cache metrics in the Prometheus text format.
+        
+        Returns:
+            Exposition text
+        """
+        with self._lock:
+            responses = sorted(self._responses.items())
+            rejected = self._rejected
+            latency = {endpoint: histogram.snapshot() for endpoint, histogram in self._latency.items()}
+        lines = [
+            "# HELP rag_http_responses_total HTTP responses by endpoint and status.",
+            "# TYPE rag_http_responses_total counter",
+        ]
+        for (endpoint, status), count in responses:
+            lines.append(f'rag_http_responses_total{{endpoint="{endpoint}",status="{status}"}} {count}')
+        lines.extend([
+            "# HELP rag_http_rejected_total Requests rejected by backpressure.",
+            "# TYPE rag_http_rejected_total counter",
+            f"rag_http_rejected_total {rejected}",
+            "# HELP rag_http_in_flight Requests being processed.",
+            "# TYPE rag_http_in_flight gauge",
+            f"rag_http_in_flight {self._in_flight}",
+            "# HELP rag_http_waiting Requests waiting for a worker slot.",
+            "# TYPE rag_http_waiting gauge",
+            f"rag_http_waiting {self._waiting}",
+            "# HELP rag_http_ready Whether the index is loaded.",
+            "# TYPE rag_http_ready gauge",
+            f"rag_http_ready {int(self.ready)}",
+            "# HELP rag_http_request_seconds Request latency by endpoint.",
+            "# TYPE rag_http_request_seconds histogram",
+        ])
+        for endpoint, snapshot in latency.items():
+            if snapshot["count"]:
+                lines.extend(histogram_lines("rag_http_request_seconds", f'endpoint="{endpoint}"', snapshot))
+        
+        registry = self.pipeline.index_registry
+        if registry is not None:
+            for name, kind, help_text, value in (
+                ("rag_index_resident_bytes", "gauge", "Estimated memory of loaded course indexes.",
+                 registry.current_bytes),
+                ("rag_index_loaded", "gauge", "Course indexes loaded.", len(registry)),
+                ("rag_index_loads_total", "counter", "Course index loads.", registry.stats["loads"]),
+                ("rag_index_evictions_total", "counter", "Course indexes evicted to respect the budget.",
+                 registry.stats["evictions"]),
+            ):
+                lines.extend([f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", f"{name} {value}"])
+        
+        text = "\n".join(lines) + "\n"
+        tracer = getattr(self.pipeline, "tracer", None)
+        if tracer is not None and tracer.enabled:
+            text += tracer.render_prometheus()
+        cache = getattr(getattr(self.pipeline, "agent", None), "cache", None)
+        if cache is not None:
+            text += render_prometheus(cache.metrics_snapshot())
+        return text
+
+
+def serve(pipeline, host: str = "127.0.0.1", port: int = 8080, **options):
+    """
+    Run a NarrationServer until interrupted.
+    
+    Args:
+        pipeline: RAGPipeline to serve
+        host: Interface to bind
+        port: Port to bind
+        **options: NarrationServer options
+    """
+    server = NarrationServer(pipeline, host=host, port=port, **options)
+    
+    async def main():
+        await server.start()
+        print(f"✓ Serving on http://{host}:{server.port} (index {'ready' if server.ready else 'loading'})")
+        try:
+            await server.serve_forever()
+        finally:
+            await server.stop()
+    
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
+
@@ -0,0 +1,340 @@
+"""
+Typed Configuration Loading
+Settings come from config.yaml, then RAG__<SECTION>__<KEY> environment variables, then
+command-line overrides; every value is checked against the dataclass field it sets.
+"""
+
+from dataclasses import asdict, dataclass, field, fields, is_dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Union, get_args, get_origin, get_type_hints
+import os
+
+import yaml
+
+
+ENV_PREFIX = "RAG__"
+DEFAULT_CONFIG_PATH = "config.yaml"
+
+
+class ConfigError(ValueError):
+    """Invalid configuration file, environment variable or override."""
+
+
+def _setting(default, **constraints):
+    """Dataclass field with validation constraints (choices, min, above, max)."""
+    if isinstance(default, (list, dict)):
+        return field(default_factory=lambda: type(default)(default), metadata=constraints)
+    return field(default=default, metadata=constraints)
+
+
+@dataclass
+class LLMConfig:
+    """LLM provider and generation settings (llm)."""
+    provider: str = _setting("openai", choices=("openai", "anthropic", "simulated", "none"))
+    model: str = "gpt-4"
+    temperature: float = _setting(0.7, min=0.0, max=2.0)
+    max_tokens: int = _setting(2000, min=1)
+    hedge: bool = False
+    prompt_template: str = "src/prompts/narrative_template.txt"
+    options: Dict[str, Any] = _setting({})
+
+
+@dataclass
+class VectorStoreConfig:
+    """Embedding, chunking and index settings (vector_store)."""
+    type: str = _setting("faiss", choices=("faiss",))
+    embedding_model: str = "hashing"
+    index_path: str = "models/faiss_index"
+    chunk_size: int = _setting(1000, min=1)
+    chunk_overlap: int = _setting(200, min=0)
+    dedup_threshold: Optional[float] = _setting(None, above=0.0, max=1.0)
+
+
+@dataclass
+class CacheConfig:
+    """Response cache settings (cache)."""
+    enabled: bool = True
+    type: str = _setting("disk", choices=("disk", "redis"))
+    ttl: int = _setting(3600, min=0)
+    sweep_interval: float = _setting(300.0, min=0.0)
+    metrics_interval: float = _setting(60.0, min=0.0)
+    warm_start: bool = True
+    warm_max_mb: Optional[int] = _setting(None, min=0)
+    warm_presentation: Optional[str] = None
+    hot_set_interval: float = _setting(300.0, min=0.0)
+    hot_set_size: int = _setting(1000, min=1)
+    cache_dir: str = "cache/responses"
+    disk_backend: str = _setting("sqlite", choices=("sqlite", "file"))
+    redis_url: str = "redis://localhost:6379/0"
+    redis_compress: bool = False
+    compression: Optional[str] = _setting(None, choices=(None, "none", "zlib", "zstd"))
+    compress_threshold: int = _setting(1024, min=0)
+    compression_dictionary: Optional[str] = None
+    max_memory_entries: int = _setting(10000, min=1)
+    max_memory_mb: int = _setting(64, min=1)
+
+
+@dataclass
+class AccessibilityConfig:
+    """Narrative style settings (accessibility)."""
+    narrative_format: str = "audio_friendly"
+    include_descriptions: bool = True
+    detail_level: str = _setting("high", choices=("low", "medium", "high"))
+
+
+@dataclass
+class DataConfig:
+    """Input and output locations (data)."""
+    presentations_dir: str = "data/presentations"
+    processed_dir: str = "data/processed"
+    metadata_file: str = "data/metadata/presentations_metadata.json"
+
+
+@dataclass
+class ProfilingConfig:
+    """Sampled CPU/memory profiling (observability.profiling)."""
+    enabled: bool = False
+    output_dir: str = "profiles"
+    sample_rate: float = _setting(0.01, min=0.0, max=1.0)
+    stages: Optional[List[str]] = None
+    memory: bool = False
+
+
+@dataclass
+class ObservabilityConfig:
+    """Tracing and profiling (observability)."""
+    tracing: bool = False
+    profiling: ProfilingConfig = field(default_factory=ProfilingConfig)
+
+
+@dataclass
+class PerformanceConfig:
+    """Concurrency and batching (performance)."""
+    parallel_processing: bool = True
+    batch_size: int = _setting(256, min=1)
+    max_workers: int = _setting(4, min=1)
+    narration_workers: Optional[int] = _setting(None, min=1)
+    requests_per_second: Optional[float] = _setting(None, min=0.0)
+
+
+@dataclass
+class ServerConfig:
+    """HTTP server and course index settings (server)."""
+    host: str = "127.0.0.1"
+    port: int = _setting(8080, min=0, max=65535)
+    concurrency: int = _setting(8, min=1)
+    queue: int = _setting(64, min=0)
+    queue_timeout: float = _setting(10.0, min=0.0)
+    courses_dir: Optional[str] = None
+    index_budget_mb: int = _setting(2048, min=1)
+    pin: List[str] = _setting([])
+
+
+@dataclass
+class Config:
+    """Complete configuration; see load_config."""
+    llm: LLMConfig = field(default_factory=LLMConfig)
+    vector_store: VectorStoreConfig = field(default_factory=VectorStoreConfig)
+    cache: CacheConfig = field(default_factory=CacheConfig)
+    accessibility: AccessibilityConfig = field(default_factory=AccessibilityConfig)
+    data: DataConfig = field(default_factory=DataConfig)
+    observability: ObservabilityConfig = field(default_factory=ObservabilityConfig)
+    performance: PerformanceConfig = field(default_factory=PerformanceConfig)
+    server: ServerConfig = field(default_factory=ServerConfig)
+    
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+def _coerce(value: Any, annotation: Any, path: str) -> Any:
+    """Check a value against a field's type, converting where unambiguous (int to float, CSV to list)."""
+    origin = get_origin(annotation)
+    if origin is Union:
+        options = [option for option in get_args(annotation) if option is not type(None)]
+        if value is None:
+            return None
+        return _coerce(value, options[0], path)
+    if is_dataclass(annotation):
+        if not isinstance(value, Mapping):
+            raise ConfigError(f"{path}: expected a section, got {value!r}")
+        return _build(annotation, value, path)
+    if origin in (list, List):
+        if isinstance(value, str):
+            value = [item.strip() for item in value.split(",") if item.strip()]
+        if not isinstance(value, list):
+            raise ConfigError(f"{path}: expected a list, got {value!r}")
+        item_type = get_args(annotation)[0] if get_args(annotation) else Any
+        return [_coerce(item, item_type, f"{path}[{i}]") for i, item in enumerate(value)]
+    if origin in (dict, Dict):
+        if not isinstance(value, Mapping):
+            raise ConfigError(f"{path}: expected a mapping, got {value!r}")
+        return dict(value)
+    if annotation is bool:
+        if isinstance(value, bool):
+            return value
+        if value in (0, 1):
+            return bool(value)
+    elif annotation is int:
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+    elif annotation is float:
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return float(value)
+    elif annotation is str:
+        if isinstance(value, str):
+            return value
+    elif annotation is Any:
+        return value
+    raise ConfigError(f"{path}: expected {getattr(annotation, '__name__', annotation)}, got {value!r}")
+
+
+def _check(value: Any, constraints: Mapping, path: str):
+    if "choices" in constraints and value not in constraints["choices"]:
+        raise ConfigError(f"{path}: {value!r} is not one of {list(constraints['choices'])}")
+    if value is None:
+        return
+    if "min" in constraints and value < constraints["min"]:
+        raise ConfigError(f"{path}: {value!r} is below the minimum {constraints['min']}")
+    if "above" in constraints and value <= constraints["above"]:
+        raise ConfigError(f"{path}: {value!r} must be greater than {constraints['above']}")
+    if "max" in constraints and value > constraints["max"]:
+        raise ConfigError(f"{path}: {value!r} is above the maximum {constraints['max']}")
+
+
+def _build(cls, data: Mapping, path: str = ""):
+    """Instantiate a config dataclass from a mapping, rejecting unknown keys."""
+    hints = get_type_hints(cls)
+    known = {f.name: f for f in fields(cls)}
+    unknown = set(data) - set(known)
+    if unknown:
+        where = f" in {path}" if path else ""
+        raise ConfigError(f"Unknown setting(s){where}: {', '.join(sorted(map(str, unknown)))}")
+    values = {}
+    for name, value in data.items():
+        key = f"{path}.{name}" if path else name
+        values[name] = _coerce(value, hints[name], key)
+        _check(values[name], known[name].metadata, key)
+    return cls(**values)
+
+
+def _set_path(data: Dict, key: str, value: Any):
+    """Set a dotted key (e.g. cache.ttl) in nested dictionaries."""
+    parts = key.split(".")
+    node = data
+    for part in parts[:-1]:
+        child = node.get(part)
+        if not isinstance(child, dict):
+            child = node[part] = {}
+        node = child
+    node[parts[-1]] = value
+
+
+def parse_assignments(assignments: Optional[Sequence[str]]) -> Dict[str, Any]:
+    """
+    Parse KEY=VALUE overrides; values are YAML scalars (true, 0.5, null, [a, b]).
+    
+    Args:
+        assignments: Strings such as "cache.ttl=600"
+        
+    Returns:
+        Mapping of dotted keys to values
+    """
+    overrides = {}
+    for assignment in assignments or ():
+        key, separator, raw = assignment.partition("=")
+        if not separator or not key.strip():
+            raise ConfigError(f"Expected KEY=VALUE, got {assignment!r}")
+        overrides[key.strip()] = yaml.safe_load(raw) if raw.strip() else ""
+    return overrides
+
+
+def env_overrides(environ: Optional[Mapping[str, str]] = None) -> Dict[str, Any]:
+    """
+    Overrides from RAG__<SECTION>__<KEY> variables (e.g. RAG__CACHE__TTL=600).
+    
+    Args:
+        environ: Environment to read (defaults to os.environ)
+        
+    Returns:
+        Mapping of dotted keys to values
+    """
+    environ = os.environ if environ is None else environ
+    overrides = {}
+    for name, raw in environ.items():
+        if name.startswith(ENV_PREFIX) and len(name) > len(ENV_PREFIX):
+            key = ".".join(part.lower() for part in name[len(ENV_PREFIX):].split("__"))
+            overrides[key] = yaml.safe_load(raw) if raw.strip() else ""
+    return overrides
+
+
+def load_config(
+    path: Optional[str] = None,
+    environ: Optional[Mapping[str, str]] = None,
+    overrides: Optional[Mapping[str, Any]] = None
+) -> Config:
+    """
+    Load and validate the configuration.
+    
+    Later sources win: the file, then environment variables, then overrides.
+    
+    Args:
+        path: YAML file (defaults to RAG_CONFIG, else config.yaml if it exists)
+        environ: Environment for RAG__ overrides and RAG_CONFIG (defaults to os.environ)
+        overrides: Dotted keys to values (e.g. from --set or dedicated CLI flags)
+        
+    Returns:
+        Validated Config
+    """
+    environ = os.environ if environ is None else environ
+    path = path or environ.get("RAG_CONFIG")
+    data: Dict[str, Any] = {}
+    if path is not None or Path(DEFAULT_CONFIG_PATH).exists():
+        config_path = Path(path or DEFAULT_CONFIG_PATH)
+        try:
+            with open(config_path, encoding="utf-8") as f:
+                data = yaml.safe_load(f) or {}
+        except OSError as e:
+            raise ConfigError(f"Cannot read {config_path}: {e}")
+        except yaml.YAMLError as e:
+            raise ConfigError(f"Invalid YAML in {config_path}: {e}")
+        if not isinstance(data, dict):
+            raise ConfigError(f"{config_path}: expected a mapping at the top level")
+    
+    for key, value in {**env_overrides(environ), **dict(overrides or {})}.items():
+        _set_path(data, key, value)
+    config = _build(Config, data)
+    if config.vector_store.chunk_overlap >= config.vector_store.chunk_size:
+        raise ConfigError("vector_store.chunk_overlap must be smaller than vector_store.chunk_size")
+    return config
+
+
+def add_config_arguments(parser):
+    """
+    Add --config and --set to an argparse parser.
+    
+    Args:
+        parser: ArgumentParser of a script
+    """
+    parser.add_argument("--config", help=f"Configuration file (default: RAG_CONFIG or {DEFAULT_CONFIG_PATH})")
+    parser.add_argument("--set", action="append", default=[], dest="settings", metavar="KEY=VALUE",
+                        help="Override one setting, e.g. --set performance.max_workers=8 (repeatable)")
+
+
+def config_from_args(args, flags: Optional[Mapping[str, str]] = None) -> Config:
+    """
+    Load the configuration for a script, applying its command-line overrides.
+    
+    Args:
+        args: Parsed arguments (see add_config_arguments)
+        flags: Script flag attribute to dotted key; flags left at None are not applied
+        
+    Returns:
+        Validated Config
+    """
+    overrides = parse_assignments(args.settings)
+    for attribute, key in (flags or {}).items():
+        value = getattr(args, attribute)
+        if value is not None:
+            overrides[key] = value
+    return load_config(args.config, overrides=overrides)
+
@@ -57,6 +57,35 @@ class DocumentProcessor:
             print(f"Error extracting text from PPTX {pptx_path}: {e}")
         return text
     
+    @staticmethod
+    def extract_slides(file_path: Path) -> List[str]:
+        """
+        Extract text per slide (PPTX) or per page (PDF).
+        
+        Args:
+            file_path: Path to presentation file
+            
+        Returns:
+            List of slide texts in presentation order
+        """
+        file_path = Path(file_path)
+        slides = []
+        try:
+            if file_path.suffix.lower() == '.pdf':
+                with open(file_path, 'rb') as file:
+                    pdf_reader = PyPDF2.PdfReader(file)
+                    for page in pdf_reader.pages:
+                        slides.append(page.extract_text() or "")
+            else:
+                prs = Presentation(file_path)
+                for slide in prs.slides:
+                    slides.append("\n".join(
+                        shape.text for shape in slide.shapes if hasattr(shape, "text")
+                    ))
+        except Exception as e:
+            print(f"Error extracting slides from {file_path}: {e}")
+        return slides
+    
     @staticmethod
     def chunk_text(text: str, chunk_size: int = 1000, overlap: int = 200) -> List[str]:
         """
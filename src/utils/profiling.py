@@ -0,0 +1,215 @@
+"""
+Opt-in Profiling Hooks
+Samples cProfile and tracemalloc profiles of selected stages and writes them as artifacts.
+"""
+
+from typing import Iterable, List, Optional
+from datetime import datetime
+from pathlib import Path
+import cProfile
+import io
+import os
+import pstats
+import random
+import threading
+import tracemalloc
+
+
+class _NoopProfile:
+    """Shared stand-in returned when a stage is not profiled."""
+    
+    __slots__ = ()
+    artifacts: List[Path] = []
+    
+    def __enter__(self) -> "_NoopProfile":
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        pass
+
+
+_NOOP_PROFILE = _NoopProfile()
+
+
+class _ProfileSession:
+    """Profiles one stage run and writes its artifacts on exit."""
+    
+    def __init__(self, profiler: "Profiler", name: str):
+        self.profiler = profiler
+        self.name = name
+        self.artifacts: List[Path] = []
+        self._cpu: Optional[cProfile.Profile] = None
+        self._started_tracemalloc = False
+        self._memory_start = None
+    
+    def __enter__(self) -> "_ProfileSession":
+        if self.profiler.memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(self.profiler.memory_frames)
+                self._started_tracemalloc = True
+            self._memory_start = tracemalloc.take_snapshot()
+        if self.profiler.cpu:
+            self._cpu = cProfile.Profile()
+            self._cpu.enable()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if self._cpu is not None:
+                self._cpu.disable()
+            self._write()
+        finally:
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+            self.profiler._release()
+    
+    def _write(self):
+        output_dir = self.profiler.output_dir
+        output_dir.mkdir(parents=True, exist_ok=True)
+        stem = f"{self.name}-{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}-{os.getpid()}"
+        summary = io.StringIO()
+        
+        if self._cpu is not None:
+            # pstats format: readable by pstats, snakeviz, gprof2dot
+            prof_path = output_dir / f"{stem}.prof"
+            self._cpu.dump_stats(prof_path)
+            self.artifacts.append(prof_path)
+            stats = pstats.Stats(self._cpu, stream=summary)
+            stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.profiler.top)
+        
+        if self._memory_start is not None:
+            snapshot = tracemalloc.take_snapshot()
+            # Snapshot.load() reads this back for offline comparison
+            snapshot_path = output_dir / f"{stem}.tracemalloc"
+            snapshot.dump(str(snapshot_path))
+            self.artifacts.append(snapshot_path)
+            summary.write(f"\nTop {self.profiler.top} allocation sites by growth:\n")
+            for stat in snapshot.compare_to(self._memory_start, "lineno")[:self.profiler.top]:
+                summary.write(f"{stat}\n")
+            current, peak = tracemalloc.get_traced_memory()
+            summary.write(f"\nTraced memory: current {current / 1024 / 1024:.1f} MB, "
+                          f"peak {peak / 1024 / 1024:.1f} MB\n")
+        
+        summary_path = output_dir / f"{stem}.txt"
+        summary_path.write_text(summary.getvalue())
+        self.artifacts.append(summary_path)
+
+
+class Profiler:
+    """
+    Profiles sampled runs of selected stages.
+    
+    Only one stage is profiled at a time per process; stages starting while
+    another is being profiled run unprofiled. When disabled, profile() returns
+    a shared no-op object.
+    """
+    
+    def __init__(
+        self,
+        enabled: bool = False,
+        output_dir: str = "profiles",
+        sample_rate: float = 1.0,
+        stages: Optional[Iterable[str]] = None,
+        cpu: bool = True,
+        memory: bool = False,
+        memory_frames: int = 10,
+        top: int = 25
+    ):
+        """
+        Initialize the profiler.
+        
+        Args:
+            enabled: Profile anything at all
+            output_dir: Directory for profile artifacts
+            sample_rate: Fraction of stage runs profiled (e.g. 0.01 for 1% of requests)
+            stages: Stage names to profile (ingestion, index_build, request, batch); None for all
+            cpu: Record a cProfile profile
+            memory: Record tracemalloc snapshots (slows the profiled run noticeably)
+            memory_frames: Stack frames stored per allocation
+            top: Entries in the text summary
+        """
+        self.enabled = enabled
+        self.output_dir = Path(output_dir)
+        self.sample_rate = sample_rate
+        self.stages = set(stages) if stages else None
+        self.cpu = cpu
+        self.memory = memory
+        self.memory_frames = memory_frames
+        self.top = top
+        self._active = threading.Lock()
+    
+    def profile(self, name: str, force: bool = False):
+        """
+        Profile one run of a stage if it is selected and sampled.
+        
+        Args:
+            name: Stage name
+            force: Profile regardless of sample rate (still requires enabled)
+            
+        Returns:
+            Context manager; its ``artifacts`` lists written files after exit
+        """
+        if not self.enabled:
+            return _NOOP_PROFILE
+        if self.stages is not None and name not in self.stages:
+            return _NOOP_PROFILE
+        if not force and random.random() >= self.sample_rate:
+            return _NOOP_PROFILE
+        if not self._active.acquire(blocking=False):
+            return _NOOP_PROFILE
+        return _ProfileSession(self, name)
+    
+    def _release(self):
+        self._active.release()
+
+
+def _env_flag(name: str) -> bool:
+    return os.environ.get(name, "").lower() in ("1", "true", "yes")
+
+
+_profiler: Optional[Profiler] = None
+_profiler_lock = threading.Lock()
+
+
+def get_profiler() -> Profiler:
+    """
+    Get the process-wide profiler, configured from the environment.
+    
+    RAG_PROFILE=1 enables it. RAG_PROFILE_RATE sets the sample rate (default 1.0),
+    RAG_PROFILE_STAGES a comma-separated stage list, RAG_PROFILE_DIR the output
+    directory and RAG_PROFILE_MEMORY=1 adds tracemalloc snapshots.
+    
+    Returns:
+        Shared Profiler
+    """
+    global _profiler
+    if _profiler is None:
+        with _profiler_lock:
+            if _profiler is None:
+                stages = os.environ.get("RAG_PROFILE_STAGES")
+                _profiler = Profiler(
+                    enabled=_env_flag("RAG_PROFILE"),
+                    output_dir=os.environ.get("RAG_PROFILE_DIR", "profiles"),
+                    sample_rate=float(os.environ.get("RAG_PROFILE_RATE", "1.0")),
+                    stages=[s.strip() for s in stages.split(",") if s.strip()] if stages else None,
+                    memory=_env_flag("RAG_PROFILE_MEMORY"),
+                )
+    return _profiler
+
+
+def configure_profiling(enabled: bool = True, **options) -> Profiler:
+    """
+    Replace the process-wide profiler (e.g. from the config file).
+    
+    Args:
+        enabled: Profile anything at all
+        **options: Profiler options (output_dir, sample_rate, stages, cpu, memory, top)
+        
+    Returns:
+        Shared Profiler
+    """
+    global _profiler
+    with _profiler_lock:
+        _profiler = Profiler(enabled=enabled, **options)
+    return _profiler
+
@@ -0,0 +1,291 @@
+"""
+Lightweight Request Tracing
+Per-stage spans tagged with a request ID, aggregated into latency histograms.
+"""
+
+from typing import Deque, Dict, List, Optional
+from collections import deque
+from contextvars import ContextVar
+import os
+import threading
+import time
+import uuid
+
+from src.cache.metrics import LatencyHistogram, histogram_lines, histogram_quantile
+
+
+# Upper bounds in seconds for stage durations (the last bucket is +Inf)
+STAGE_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_current_trace: ContextVar[Optional["Trace"]] = ContextVar("rag_trace", default=None)
+
+
+class Span:
+    """
+    One timed stage; use as a context manager and attach sizes with set().
+    """
+    
+    __slots__ = ("tracer", "name", "attributes", "start", "duration", "request_id")
+    
+    def __init__(self, tracer: "Tracer", name: str, attributes: Dict):
+        self.tracer = tracer
+        self.name = name
+        self.attributes = attributes
+        self.start = 0.0
+        self.duration = 0.0
+        self.request_id = None
+    
+    def set(self, **attributes):
+        """Attach attributes such as k, chunk_count, context_tokens or cache outcome."""
+        self.attributes.update(attributes)
+    
+    def __enter__(self) -> "Span":
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self.start
+        if exc_type is not None:
+            self.attributes["error"] = exc_type.__name__
+        self.tracer._finish(self)
+    
+    def to_dict(self) -> Dict:
+        return {"name": self.name, "duration_ms": self.duration * 1000, **self.attributes}
+
+
+class _NoopSpan:
+    """Shared stand-in returned while tracing is off."""
+    
+    __slots__ = ()
+    request_id = None
+    
+    def set(self, **attributes):
+        pass
+    
+    def __enter__(self) -> "_NoopSpan":
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Trace:
+    """
+    Spans recorded for one request.
+    """
+    
+    def __init__(self, request_id: str):
+        self.request_id = request_id
+        self.spans: List[Span] = []
+        self.start = time.perf_counter()
+        self.duration = 0.0
+    
+    def to_dict(self) -> Dict:
+        return {
+            "request_id": self.request_id,
+            "duration_ms": self.duration * 1000,
+            "spans": [span.to_dict() for span in self.spans],
+        }
+
+
+class _RequestScope:
+    """Context manager binding a Trace to the current context."""
+    
+    def __init__(self, tracer: "Tracer", request_id: Optional[str]):
+        self.tracer = tracer
+        self.trace = Trace(request_id or uuid.uuid4().hex[:16])
+        self._token = None
+    
+    def __enter__(self) -> Trace:
+        self._token = _current_trace.set(self.trace)
+        return self.trace
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.trace.duration = time.perf_counter() - self.trace.start
+        _current_trace.reset(self._token)
+        self.tracer._finish_trace(self.trace)
+
+
+class _JoinScope:
+    """Context manager for a nested request() that reuses the enclosing trace."""
+    
+    def __init__(self, trace: Trace):
+        self.trace = trace
+    
+    def __enter__(self) -> Trace:
+        return self.trace
+    
+    def __exit__(self, exc_type, exc, tb):
+        pass
+
+
+class Tracer:
+    """
+    Records stage spans into per-stage histograms and keeps recent traces.
+    
+    When disabled, span() and request() return a shared no-op object, so
+    instrumented code pays one attribute check per stage.
+    """
+    
+    def __init__(self, enabled: bool = True, max_traces: int = 100):
+        """
+        Initialize the tracer.
+        
+        Args:
+            enabled: Record spans
+            max_traces: Number of finished request traces kept for inspection
+        """
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self._cache_outcomes: Dict[tuple, int] = {}
+        self.recent_traces: Deque[Trace] = deque(maxlen=max_traces)
+    
+    def span(self, name: str, **attributes):
+        """
+        Time a stage.
+        
+        Args:
+            name: Stage name (e.g. retrieval, embed_query, llm)
+            **attributes: Sizes and other details recorded with the span
+            
+        Returns:
+            Span context manager (no-op when disabled)
+        """
+        if not self.enabled:
+            return _NOOP_SPAN
+        return Span(self, name, attributes)
+    
+    def request(self, request_id: Optional[str] = None):
+        """
+        Group the spans of one request under a request ID.
+        
+        Nested calls join the enclosing request instead of starting a new one.
+        
+        Args:
+            request_id: ID to use (generated if None)
+            
+        Returns:
+            Context manager yielding the Trace (no-op when disabled)
+        """
+        if not self.enabled:
+            return _NOOP_SPAN
+        current = _current_trace.get()
+        if current is not None:
+            return _JoinScope(current)
+        return _RequestScope(self, request_id)
+    
+    def _finish(self, span: Span):
+        trace = _current_trace.get()
+        with self._lock:
+            histogram = self._histograms.get(span.name)
+            if histogram is None:
+                histogram = self._histograms[span.name] = LatencyHistogram(STAGE_BUCKETS)
+            histogram.observe(span.duration)
+            outcome = span.attributes.get("cache")
+            if outcome is not None:
+                key = (span.name, outcome)
+                self._cache_outcomes[key] = self._cache_outcomes.get(key, 0) + 1
+        if trace is not None:
+            span.request_id = trace.request_id
+            trace.spans.append(span)
+    
+    def _finish_trace(self, trace: Trace):
+        with self._lock:
+            self.recent_traces.append(trace)
+    
+    def stage_stats(self) -> Dict[str, Dict]:
+        """
+        Latency percentiles per stage.
+        
+        Returns:
+            Stage name to count, p50_ms, p95_ms and p99_ms (None above the last bucket)
+        """
+        with self._lock:
+            snapshots = {name: histogram.snapshot() for name, histogram in self._histograms.items()}
+        stats = {}
+        for name, snapshot in snapshots.items():
+            stats[name] = {"count": snapshot["count"]}
+            for label, q in (("p50_ms", 0.5), ("p95_ms", 0.95), ("p99_ms", 0.99)):
+                value = histogram_quantile(snapshot, q)
+                stats[name][label] = value * 1000 if value is not None else None
+        return stats
+    
+    def render_prometheus(self) -> str:
+        """
+        Render stage histograms and cache outcomes in the Prometheus text format.
+        
+        Returns:
+            Exposition text
+        """
+        with self._lock:
+            snapshots = {name: histogram.snapshot() for name, histogram in self._histograms.items()}
+            outcomes = dict(self._cache_outcomes)
+        lines = [
+            "# HELP rag_stage_duration_seconds Duration of pipeline stages.",
+            "# TYPE rag_stage_duration_seconds histogram",
+        ]
+        for name in sorted(snapshots):
+            lines.extend(histogram_lines("rag_stage_duration_seconds", f'stage="{name}"', snapshots[name]))
+        lines.append("# HELP rag_stage_cache_total Cache outcomes recorded by stage spans.")
+        lines.append("# TYPE rag_stage_cache_total counter")
+        for (name, outcome), count in sorted(outcomes.items()):
+            lines.append(f'rag_stage_cache_total{{stage="{name}",outcome="{outcome}"}} {count}')
+        return "\n".join(lines) + "\n"
+    
+    def reset(self):
+        """Drop all recorded spans and traces."""
+        with self._lock:
+            self._histograms.clear()
+            self._cache_outcomes.clear()
+            self.recent_traces.clear()
+
+
+def current_request_id() -> Optional[str]:
+    """ID of the request being traced in this context, if any."""
+    trace = _current_trace.get()
+    return trace.request_id if trace is not None else None
+
+
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """
+    Get the process-wide tracer.
+    
+    Tracing is off unless the RAG_TRACING environment variable is set to 1,
+    true or yes, or configure_tracing() enables it.
+    
+    Returns:
+        Shared Tracer
+    """
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                enabled = os.environ.get("RAG_TRACING", "").lower() in ("1", "true", "yes")
+                _tracer = Tracer(enabled=enabled)
+    return _tracer
+
+
+def configure_tracing(enabled: bool = True, max_traces: int = 100) -> Tracer:
+    """
+    Enable or disable the process-wide tracer.
+    
+    Args:
+        enabled: Record spans
+        max_traces: Number of finished request traces kept
+        
+    Returns:
+        Shared Tracer
+    """
+    tracer = get_tracer()
+    tracer.enabled = enabled
+    tracer.recent_traces = deque(tracer.recent_traces, maxlen=max_traces)
+    return tracer
+
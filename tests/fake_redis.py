@@ -0,0 +1,200 @@
+"""
+In-process fake Redis server speaking RESP2, for backend tests.
+Implements only the commands the cache backend uses.
+"""
+
+import fnmatch
+import socketserver
+import threading
+import time
+
+
+class _Store:
+    """Keyspace with per-key expiry, shared by all connections."""
+    
+    def __init__(self):
+        self.strings = {}
+        self.zsets = {}
+        self.expires = {}
+        self.lock = threading.Lock()
+    
+    def alive(self, key):
+        expires_at = self.expires.get(key)
+        if expires_at is not None and time.time() >= expires_at:
+            self.strings.pop(key, None)
+            self.expires.pop(key, None)
+        return key in self.strings or key in self.zsets
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    
+    def handle(self):
+        while True:
+            try:
+                command = self._read_command()
+            except (ConnectionError, ValueError):
+                return
+            if command is None:
+                return
+            with self.server.store.lock:
+                reply = self._dispatch(command)
+            self.wfile.write(reply)
+            self.wfile.flush()
+    
+    def _read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            return line.strip().split()
+        args = []
+        for _ in range(int(line[1:])):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+    
+    def _dispatch(self, args):
+        name = args[0].decode().upper()
+        handler = getattr(self, f"cmd_{name.lower()}", None)
+        if handler is None:
+            return _error(f"unknown command '{name}'")
+        try:
+            return handler(self.server.store, *args[1:])
+        except (TypeError, ValueError, IndexError):
+            return _error(f"wrong arguments for '{name}'")
+    
+    def cmd_ping(self, store, *args):
+        return b"+PONG\r\n"
+    
+    def cmd_client(self, store, *args):
+        return b"+OK\r\n"
+    
+    def cmd_select(self, store, *args):
+        return b"+OK\r\n"
+    
+    def cmd_get(self, store, key):
+        return _bulk(store.strings.get(key) if store.alive(key) else None)
+    
+    def cmd_mget(self, store, *keys):
+        return _array([store.strings.get(key) if store.alive(key) else None for key in keys])
+    
+    def cmd_set(self, store, key, value, *options):
+        store.strings[key] = value
+        store.expires.pop(key, None)
+        options = [option.upper() for option in options]
+        if b"PX" in options:
+            store.expires[key] = time.time() + int(options[options.index(b"PX") + 1]) / 1000
+        if b"EX" in options:
+            store.expires[key] = time.time() + int(options[options.index(b"EX") + 1])
+        return b"+OK\r\n"
+    
+    def cmd_del(self, store, *keys):
+        removed = 0
+        for key in keys:
+            if store.alive(key):
+                removed += 1
+            store.strings.pop(key, None)
+            store.zsets.pop(key, None)
+            store.expires.pop(key, None)
+        return _int(removed)
+    
+    def cmd_exists(self, store, *keys):
+        return _int(sum(1 for key in keys if store.alive(key)))
+    
+    def cmd_strlen(self, store, key):
+        return _int(len(store.strings.get(key, b"")) if store.alive(key) else 0)
+    
+    def cmd_scan(self, store, cursor, *options):
+        pattern = b"*"
+        options = list(options)
+        if b"MATCH" in [o.upper() for o in options]:
+            pattern = options[[o.upper() for o in options].index(b"MATCH") + 1]
+        keys = [k for k in list(store.strings) + list(store.zsets)
+                if store.alive(k) and fnmatch.fnmatchcase(k.decode(), pattern.decode())]
+        return b"*2\r\n" + _bulk(b"0") + _array(keys)
+    
+    def cmd_zadd(self, store, key, *pairs):
+        zset = store.zsets.setdefault(key, {})
+        added = 0
+        for score, member in zip(pairs[::2], pairs[1::2]):
+            added += member not in zset
+            zset[member] = float(score)
+        return _int(added)
+    
+    def cmd_zrem(self, store, key, *members):
+        zset = store.zsets.get(key, {})
+        return _int(sum(1 for member in members if zset.pop(member, None) is not None))
+    
+    def cmd_zcard(self, store, key):
+        return _int(len(store.zsets.get(key, {})))
+    
+    def cmd_zrange(self, store, key, start, stop, *options):
+        return self._range(store, key, int(start), int(stop), options, reverse=False)
+    
+    def cmd_zrevrange(self, store, key, start, stop, *options):
+        return self._range(store, key, int(start), int(stop), options, reverse=True)
+    
+    def cmd_zrangebyscore(self, store, key, low, high, *options):
+        items = sorted(store.zsets.get(key, {}).items(), key=lambda item: (item[1], item[0]))
+        low_value = float("-inf") if low == b"-inf" else float(low)
+        high_value = float("inf") if high == b"+inf" else float(high)
+        members = [m for m, s in items if low_value <= s <= high_value]
+        options = [o.upper() for o in options]
+        if b"LIMIT" in options:
+            offset, count = (int(x) for x in options[options.index(b"LIMIT") + 1:][:2])
+            members = members[offset:offset + count]
+        return _array(members)
+    
+    def _range(self, store, key, start, stop, options, reverse):
+        items = sorted(store.zsets.get(key, {}).items(), key=lambda item: (item[1], item[0]), reverse=reverse)
+        stop = len(items) if stop == -1 else stop + 1
+        items = items[start:stop]
+        if b"WITHSCORES" in [o.upper() for o in options]:
+            flat = []
+            for member, score in items:
+                flat.extend([member, repr(score).encode()])
+            return _array(flat)
+        return _array([member for member, _ in items])
+
+
+def _bulk(value):
+    if value is None:
+        return b"$-1\r\n"
+    return b"$" + str(len(value)).encode() + b"\r\n" + value + b"\r\n"
+
+
+def _array(values):
+    return b"*" + str(len(values)).encode() + b"\r\n" + b"".join(_bulk(v) for v in values)
+
+
+def _int(value):
+    return b":" + str(value).encode() + b"\r\n"
+
+
+def _error(message):
+    return b"-ERR " + message.encode() + b"\r\n"
+
+
+class FakeRedisServer(socketserver.ThreadingTCPServer):
+    """Threaded RESP2 server bound to an ephemeral localhost port."""
+    
+    daemon_threads = True
+    allow_reuse_address = True
+    
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.store = _Store()
+        self._thread = threading.Thread(target=self.serve_forever, args=(0.05,), daemon=True)
+    
+    @property
+    def url(self):
+        return f"redis://127.0.0.1:{self.server_address[1]}/0"
+    
+    def start(self):
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
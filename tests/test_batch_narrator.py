@@ -0,0 +1,131 @@
+"""
+Tests for Batch Narration
+"""
+
+import json
+import time
+
+import pytest
+
+from src.agents.llm_providers import RateLimitError
+from src.pipeline.batch_narrator import BatchNarrator, NarrationJob, TokenBucket, get_rate_limiter
+
+
+class FakeAgent:
+    """Agent stand-in that records calls and can fail once per slide."""
+    
+    llm_provider = "fake"
+    
+    def __init__(self, rate_limit_first: bool = False):
+        self.calls = []
+        self.rate_limit_first = rate_limit_first
+    
+    def create_narrative(self, presentation_id, context, query=None):
+        self.calls.append((presentation_id, context))
+        if self.rate_limit_first and self.calls.count((presentation_id, context)) == 1:
+            raise RateLimitError("slow down", retry_after=0)
+        return f"narrative: {context}"
+
+
+def make_jobs(count):
+    return [NarrationJob("deck", i, f"slide {i}") for i in range(1, count + 1)]
+
+
+def test_batch_narrates_all_slides(tmp_path):
+    """Test every job is narrated and checkpointed."""
+    agent = FakeAgent()
+    checkpoint = tmp_path / "checkpoint.jsonl"
+    narrator = BatchNarrator(agent, max_workers=3, checkpoint_path=str(checkpoint),
+                             progress_callback=lambda p: None)
+    
+    progress = narrator.run(make_jobs(6))
+    assert progress["done"] == 6
+    assert progress["failed"] == 0
+    lines = [json.loads(line) for line in checkpoint.read_text().splitlines()]
+    assert sorted(line["slide_number"] for line in lines) == [1, 2, 3, 4, 5, 6]
+
+
+def test_batch_resumes_from_checkpoint(tmp_path):
+    """Test completed slides are skipped on the next run."""
+    checkpoint = tmp_path / "checkpoint.jsonl"
+    BatchNarrator(FakeAgent(), checkpoint_path=str(checkpoint),
+                  progress_callback=lambda p: None).run(make_jobs(3))
+    
+    agent = FakeAgent()
+    progress = BatchNarrator(agent, checkpoint_path=str(checkpoint),
+                             progress_callback=lambda p: None).run(make_jobs(5))
+    assert progress["skipped"] == 3
+    assert progress["done"] == 2
+    assert len(agent.calls) == 2
+
+
+def test_batch_retries_rate_limited_calls(tmp_path):
+    """Test rate-limited slides are retried."""
+    agent = FakeAgent(rate_limit_first=True)
+    narrator = BatchNarrator(agent, checkpoint_path=str(tmp_path / "cp.jsonl"),
+                             progress_callback=lambda p: None)
+    progress = narrator.run(make_jobs(2))
+    assert progress["done"] == 2
+    assert len(agent.calls) == 4
+
+
+def test_token_bucket_limits_rate():
+    """Test the bucket blocks once the burst is used up."""
+    bucket = TokenBucket(rate=50, capacity=1)
+    start = time.monotonic()
+    for _ in range(4):
+        bucket.acquire()
+    assert time.monotonic() - start >= 0.05
+
+
+def test_shared_rate_limiter_follows_latest_rate():
+    """Test asking for a provider's limiter with a new rate updates the shared bucket."""
+    limiter = get_rate_limiter("test-provider", 2.0)
+    assert get_rate_limiter("test-provider", 20.0, capacity=5) is limiter
+    assert (limiter.rate, limiter.capacity) == (20.0, 5)
+    get_rate_limiter("test-provider", 0.5)
+    assert (limiter.rate, limiter.capacity) == (0.5, 1.0)
+
+
+def test_batch_narrated_slides_are_served_from_cache(tmp_path):
+    """Test a lecture session on a fresh runtime gets the batch narratives from the cache."""
+    pytest.importorskip("faiss")
+    pytest.importorskip("langchain")
+    from benchmarks.corpus import CorpusSpec, generate_corpus
+    from src.pipeline.runtime import Runtime
+    from src.utils.config import load_config
+    
+    generate_corpus(str(tmp_path / "decks"), CorpusSpec(decks=2, slides_per_deck=3, seed=5))
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text("{}\n")
+    overrides = {
+        "data.presentations_dir": str(tmp_path / "decks"),
+        "vector_store.index_path": str(tmp_path / "index"),
+        "llm.provider": "simulated",
+        "llm.options": {"realtime": False},
+        "cache.cache_dir": str(tmp_path / "cache"),
+    }
+    
+    batch = Runtime(load_config(str(config_path), {}, overrides))
+    narrator = batch.batch_narrator(str(tmp_path / "checkpoint.jsonl"))
+    narrator.progress_callback = lambda p: None
+    jobs = narrator.jobs_for_index()
+    assert len(jobs) == 6 and all(job.hits for job in jobs)
+    assert narrator.run(jobs)["done"] == 6
+    narratives = {
+        (line["presentation_id"], line["slide_number"]): line["narrative"]
+        for line in map(json.loads, (tmp_path / "checkpoint.jsonl").read_text().splitlines())
+    }
+    batch.close()
+    
+    served = Runtime(load_config(str(config_path), {}, overrides))
+    served.load_index()
+    pipeline = served.pipeline()
+    presentation_id = pipeline.chunks.presentation_ids[0]
+    with pipeline.start_session(presentation_id) as session:
+        session.goto(session.slides[1])
+        assert session.narrate_slide() == narratives[(presentation_id, session.slides[1])]
+    tiers = served.response_cache().metrics_snapshot()["tiers"]
+    assert tiers["disk"]["hits"] == 1 and tiers["disk"]["misses"] == 0
+    served.close()
+
@@ -0,0 +1,35 @@
+"""
+Tests for the Benchmark Suite
+"""
+
+import pytest
+from benchmarks.corpus import CorpusSpec
+from benchmarks.run_benchmarks import BenchmarkRunner, compare
+
+
+def test_benchmark_runs_every_stage(tmp_path):
+    """Test a tiny benchmark run reports all stages."""
+    pytest.importorskip("faiss")
+    pytest.importorskip("langchain")
+    spec = CorpusSpec(decks=2, slides_per_deck=3, words_per_slide=30)
+    results = BenchmarkRunner(spec, str(tmp_path), query_count=5).run()
+    
+    assert set(results["stages"]) == {
+        "extraction", "chunking", "embedding", "index_build", "retrieval",
+        "cache_miss", "cache_disk_hit", "cache_memory_hit", "narrative_cold", "narrative_warm",
+    }
+    assert results["stages"]["extraction"]["slides"] == 6
+    assert results["stages"]["retrieval"]["count"] == 5
+    assert results["meta"]["corpus"]["decks"] == 2
+
+
+def test_compare_flags_regressions_above_noise():
+    """Test only slowdowns over both thresholds count as regressions."""
+    baseline = {"stages": {"retrieval": {"p50_ms": 1.0, "p95_ms": 0.010}, "embedding": {"total_seconds": 1.0}}}
+    current = {"stages": {"retrieval": {"p50_ms": 1.5, "p95_ms": 0.020}, "embedding": {"total_seconds": 0.9}}}
+    rows = {(row["stage"], row["metric"]): row for row in compare(current, baseline, threshold=0.1)}
+    
+    assert rows[("retrieval", "p50_ms")]["regression"]
+    assert not rows[("retrieval", "p95_ms")]["regression"]
+    assert not rows[("embedding", "total_seconds")]["regression"]
+
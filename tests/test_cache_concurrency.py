@@ -0,0 +1,71 @@
+"""
+Tests for Multi-process Cache Safety
+"""
+
+import os
+import threading
+import time
+from src.cache.backends import FileCacheBackend
+from src.cache.file_lock import InterProcessLock
+from src.cache.response_cache import ResponseCache
+
+
+def test_concurrent_readers_never_see_partial_entries(tmp_path):
+    """Test readers racing writers only see complete entries."""
+    backend = FileCacheBackend(str(tmp_path))
+    values = {f"v{i}" * 20000 for i in range(4)}
+    stop = threading.Event()
+    bad = []
+    
+    def writer(value):
+        while not stop.is_set():
+            backend.set("key", {'query': 'q', 'response': value, 'timestamp': time.time()})
+    
+    threads = [threading.Thread(target=writer, args=(value,)) for value in values]
+    for thread in threads:
+        thread.start()
+    deadline = time.time() + 0.5
+    while time.time() < deadline:
+        entry = backend.get("key")
+        if entry is not None and entry['response'] not in values:
+            bad.append(entry)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    
+    assert not bad
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_corrupt_entry_is_skipped_and_removed(tmp_path):
+    """Test a truncated entry reads as a miss and is deleted."""
+    cache = ResponseCache(cache_dir=str(tmp_path))
+    cache_file = tmp_path / f"{cache._generate_key('query', 'context')}.json"
+    cache_file.write_text('{"query": "query", "respo')
+    
+    assert cache.get("query", "context") is None
+    assert not cache_file.exists()
+
+
+def test_sweep_skipped_while_another_process_holds_lock(tmp_path):
+    """Test only the lock holder sweeps, and stale temp files are reclaimed."""
+    cache = ResponseCache(cache_dir=str(tmp_path), ttl=3600, process_lock=True)
+    cache.set("query", "context", "narrative")
+    stale = tmp_path / f"{cache._generate_key('query', 'context')}.json"
+    os.utime(stale, (time.time() - 10, time.time() - 10))
+    orphan = tmp_path / ".orphan.tmp"
+    orphan.write_text("partial")
+    os.utime(orphan, (time.time() - 3600, time.time() - 3600))
+    
+    other = InterProcessLock(tmp_path / ".lock")
+    assert other.acquire(blocking=False)
+    try:
+        assert cache.sweep_expired(pause=0) == 0
+        assert stale.exists()
+    finally:
+        other.release()
+    
+    assert cache.sweep_expired(pause=0) == 1
+    assert not stale.exists()
+    assert not orphan.exists()
+
@@ -0,0 +1,79 @@
+"""
+Tests for Cache Instrumentation
+"""
+
+import os
+import subprocess
+import sys
+import time
+from cache.manage_cache import CacheManager
+from src.cache.metrics import CacheMetrics, histogram_quantile, render_prometheus
+from src.cache.response_cache import ResponseCache
+
+
+def test_per_tier_hits_and_misses(tmp_path):
+    """Test lookups are counted per tier and promoted hits move to memory."""
+    cache = ResponseCache(cache_dir=str(tmp_path))
+    assert cache.get("query", "context") is None
+    cache.set("query", "context", "narrative")
+    cache.memory_cache.clear()
+    cache.get("query", "context")
+    cache.get("query", "context")
+    
+    tiers = cache.metrics_snapshot()["tiers"]
+    assert (tiers["memory"]["hits"], tiers["memory"]["misses"]) == (1, 2)
+    assert (tiers["disk"]["hits"], tiers["disk"]["misses"]) == (1, 1)
+    assert tiers["memory"]["latency"]["count"] == 3
+
+
+def test_savings_use_observed_llm_latency():
+    """Test savings are estimated from the mean observed LLM call."""
+    metrics = CacheMetrics(llm_latency_seconds=10.0, llm_cost_per_call=0.01)
+    metrics.record_lookup("memory", True, 0.0001)
+    metrics.record_lookup("memory", False, 0.0001)
+    metrics.record_lookup("disk", False, 0.001)
+    assert metrics.snapshot()["saved_seconds"] == 10.0
+    
+    metrics.record_llm_call(2.0)
+    snapshot = metrics.snapshot()
+    assert snapshot["hit_rate"] == 0.5
+    assert snapshot["saved_seconds"] == 2.0
+    assert snapshot["saved_cost"] == 0.01
+    assert histogram_quantile(snapshot["tiers"]["memory"]["latency"], 0.5) == 0.0001
+
+
+def test_manager_merges_process_snapshots(tmp_path):
+    """Test CacheManager combines written snapshots and exports Prometheus text."""
+    cache = ResponseCache(cache_dir=str(tmp_path))
+    cache.set("query", "context", "narrative")
+    cache.get("query", "context")
+    cache.write_metrics()
+    
+    manager = CacheManager(cache_dir=str(tmp_path))
+    assert manager.get_metrics()["hits"] == 1
+    text = manager.export_metrics()
+    assert 'rag_cache_lookups_total{tier="memory",result="hit"} 1' in text
+    assert 'rag_cache_lookup_seconds_bucket{tier="disk",le="+Inf"} 0' in text
+    assert text == render_prometheus(manager.get_metrics())
+    stats = manager.get_cache_stats()
+    assert stats["total_entries"] == stats["total_files"] == 1
+    assert stats["entries"][0]["file"].endswith(".json")
+
+
+def test_manager_prunes_exited_and_stale_snapshots(tmp_path):
+    """Test snapshots of exited processes are deleted and stale ones skipped."""
+    cache = ResponseCache(cache_dir=str(tmp_path))
+    cache.get("query", "context")
+    own = cache.write_metrics()
+    exited = subprocess.Popen([sys.executable, "-c", "pass"])
+    exited.wait()
+    dead = own.with_name(f"{exited.pid}.json")
+    dead.write_text(own.read_text())
+    
+    manager = CacheManager(cache_dir=str(tmp_path))
+    assert manager.get_metrics()["requests"] == 1
+    assert not dead.exists()
+    
+    os.utime(own, (time.time() - 600, time.time() - 600))
+    assert manager.get_metrics(max_age=300) is None
+    assert own.exists()
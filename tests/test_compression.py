@@ -0,0 +1,83 @@
+"""
+Tests for Cache Payload Compression
+"""
+
+import pytest
+from src.cache.compression import CodecError, PayloadCodec, train_dictionary
+from src.cache.response_cache import ResponseCache
+
+
+NARRATIVE = ("This slide introduces gradient descent. The learning rate controls the step size, "
+             "and the loss decreases as the model parameters are updated. ") * 20
+
+
+def test_codec_respects_threshold():
+    """Test small payloads stay raw and large ones are compressed."""
+    codec = PayloadCodec("zlib", threshold=100)
+    small = codec.encode(b"short")
+    large = codec.encode(NARRATIVE.encode())
+    assert small[:1] == b"j"
+    assert large[:1] == b"z"
+    assert len(large) < len(NARRATIVE)
+    assert codec.decode(large) == NARRATIVE.encode()
+    assert codec.stats["compressed"] == 1
+
+
+def test_dictionary_round_trip_and_mismatch():
+    """Test dictionary compression and detection of a changed dictionary."""
+    dictionary = train_dictionary([NARRATIVE, NARRATIVE.upper()], size=2048)
+    assert 0 < len(dictionary) <= 2048
+    codec = PayloadCodec("zlib", threshold=10, dictionary=dictionary)
+    blob = codec.encode(NARRATIVE.encode())
+    assert blob[:1] == b"d"
+    assert codec.decode(blob) == NARRATIVE.encode()
+    
+    with pytest.raises(CodecError):
+        PayloadCodec("zlib", dictionary=b"other dictionary").decode(blob)
+
+
+@pytest.mark.parametrize("backend", ["file", "sqlite"])
+def test_compressed_cache_tiers(tmp_path, backend):
+    """Test every tier stores compressed payloads and reports stored bytes."""
+    plain = ResponseCache(cache_dir=str(tmp_path / "plain"), backend=backend)
+    packed = ResponseCache(cache_dir=str(tmp_path / "packed"), backend=backend,
+                           compression="zlib", compress_threshold=256)
+    for cache in (plain, packed):
+        cache.set("query", "context", NARRATIVE)
+    
+    assert packed.get("query", "context") == NARRATIVE
+    packed.memory_cache.clear()
+    assert packed.get("query", "context") == NARRATIVE
+    
+    plain_stats, packed_stats = plain.stats(), packed.stats()
+    assert packed_stats["memory"]["bytes"] < plain_stats["memory"]["bytes"]
+    assert packed_stats["disk"]["payload_bytes"] < plain_stats["disk"]["payload_bytes"]
+    assert packed_stats["compression"]["ratio"] < 1.0
+
+
+def test_dictionary_rollout_keeps_file_entries(tmp_path):
+    """Test entries written with an old dictionary miss without being deleted."""
+    old_dictionary = tmp_path / "old.bin"
+    old_dictionary.write_bytes(train_dictionary([NARRATIVE], size=2048))
+    new_dictionary = tmp_path / "new.bin"
+    new_dictionary.write_bytes(train_dictionary([NARRATIVE.upper()], size=2048))
+    cache_dir = tmp_path / "cache"
+    
+    cache = ResponseCache(cache_dir=str(cache_dir), backend="file", compression="zlib",
+                          compress_threshold=10, compression_dictionary=str(old_dictionary))
+    cache.set("ml|slide 1", "context", NARRATIVE)
+    assert len(list(cache_dir.glob("*.json"))) == 1
+    
+    rolled_out = ResponseCache(cache_dir=str(cache_dir), backend="file", compression="zlib",
+                               compress_threshold=10, compression_dictionary=str(new_dictionary))
+    assert rolled_out.get("ml|slide 1", "context") is None
+    assert len(list(cache_dir.glob("*.json"))) == 1
+
+
+def test_corrupt_zstd_payload_raises_codec_error():
+    """Test zstd decoding failures surface as CodecError."""
+    pytest.importorskip("zstandard")
+    codec = PayloadCodec("zstd", threshold=10)
+    blob = codec.encode(NARRATIVE.encode())
+    with pytest.raises(CodecError):
+        codec.decode(blob[:1] + b"\x00" * 16)
@@ -0,0 +1,167 @@
+"""
+Tests for Configuration Loading
+"""
+
+import time
+import numpy as np
+import pytest
+from cache.manage_cache import CacheManager
+from src.utils.config import ConfigError, load_config, parse_assignments
+
+
+def _write(tmp_path, text):
+    path = tmp_path / "config.yaml"
+    path.write_text(text)
+    return str(path)
+
+
+def test_precedence_file_env_overrides(tmp_path):
+    """Test environment variables override the file and explicit overrides win."""
+    path = _write(tmp_path, "cache:\n  ttl: 100\nperformance:\n  max_workers: 2\n  batch_size: 32\n")
+    environ = {
+        "RAG__CACHE__TTL": "600",
+        "RAG__PERFORMANCE__MAX_WORKERS": "6",
+        "RAG__OBSERVABILITY__PROFILING__STAGES": "batch, request",
+        "RAG_TRACING": "1",
+    }
+    config = load_config(path, environ, parse_assignments(["performance.max_workers=8", "llm.provider=simulated"]))
+    
+    assert config.cache.ttl == 600
+    assert config.performance.max_workers == 8
+    assert config.performance.batch_size == 32
+    assert config.observability.profiling.stages == ["batch", "request"]
+    assert config.llm.provider == "simulated"
+    assert config.server.port == 8080
+    assert config.to_dict()["cache"]["ttl"] == 600
+
+
+def test_example_config_is_valid():
+    """Test the shipped example loads with every section."""
+    config = load_config("config.yaml.example", environ={})
+    assert config.vector_store.chunk_size == 1000
+    assert config.observability.profiling.sample_rate == 0.01
+    assert config.server.pin == []
+
+
+@pytest.mark.parametrize("overrides, message", [
+    ({"cache.ttl": "soon"}, "cache.ttl: expected int"),
+    ({"cache.tll": 60}, "Unknown setting(s) in cache: tll"),
+    ({"llm.provider": "other"}, "llm.provider: 'other' is not one of"),
+    ({"cache.type": "memory"}, "cache.type: 'memory' is not one of"),
+    ({"vector_store.type": "chroma"}, "vector_store.type: 'chroma' is not one of"),
+    ({"performance.max_workers": 0}, "below the minimum 1"),
+    ({"vector_store.dedup_threshold": 0.0}, "must be greater than 0.0"),
+    ({"vector_store.chunk_overlap": 1000}, "chunk_overlap must be smaller"),
+])
+def test_invalid_settings_are_rejected(tmp_path, overrides, message):
+    """Test typos, wrong types and out-of-range values fail with the setting's path."""
+    with pytest.raises(ConfigError, match=message.replace("(", r"\(").replace(")", r"\)")):
+        load_config(_write(tmp_path, "{}\n"), {}, overrides)
+
+
+def test_runtime_builds_configured_pipeline(tmp_path):
+    """Test the runtime wires performance settings into extraction and embedding."""
+    pytest.importorskip("faiss")
+    from benchmarks.corpus import CorpusSpec, generate_corpus
+    from src.pipeline.rag_pipeline import RAGPipeline
+    from src.pipeline.runtime import Runtime
+    
+    generate_corpus(str(tmp_path / "decks"), CorpusSpec(decks=3, slides_per_deck=3, seed=2))
+    config = load_config(_write(tmp_path, "{}\n"), {}, {
+        "data.presentations_dir": str(tmp_path / "decks"),
+        "llm.provider": "simulated",
+        "llm.options": {"realtime": False},
+        "cache.cache_dir": str(tmp_path / "cache"),
+        "performance.max_workers": 2,
+        "performance.batch_size": 4,
+        "vector_store.chunk_size": 300,
+        "vector_store.chunk_overlap": 30,
+    })
+    runtime = Runtime(config)
+    pipeline = runtime.pipeline()
+    assert pipeline.agent.cache is runtime.response_cache()
+    assert (pipeline.max_workers, pipeline.embedding_batch_size) == (2, 4)
+    assert runtime.server_options()["max_concurrency"] == 8
+    
+    pipeline.create_vector_store(pipeline.load_documents())
+    sequential = RAGPipeline(documents_path=str(tmp_path / "decks"), chunk_size=300, chunk_overlap=30)
+    sequential.create_vector_store(sequential.load_documents())
+    assert pipeline.index_version == sequential.index_version
+    assert np.allclose(pipeline.embed_chunks(pipeline.chunks), sequential.embed_chunks(sequential.chunks))
+    
+    serial = Runtime(load_config(_write(tmp_path, "{}\n"), {}, {"performance.parallel_processing": False}))
+    assert serial.max_workers == 1
+
+
+def test_runtime_worker_settings(tmp_path):
+    """Test narration threads default to max_workers and conflicts are reported."""
+    from src.pipeline.runtime import Runtime
+    
+    def runtime(**overrides):
+        return Runtime(load_config(_write(tmp_path, "{}\n"), {}, overrides))
+    
+    assert runtime().narration_workers == 4
+    assert runtime(**{"performance.narration_workers": 8}).narration_workers == 8
+    assert runtime(**{"performance.narration_workers": 8}).max_workers == 4
+    serial = runtime(**{"performance.parallel_processing": False, "performance.narration_workers": 8})
+    with pytest.raises(ConfigError, match="parallel_processing"):
+        serial.narration_workers
+
+
+def test_runtime_background_sweeps_and_writes_metrics(tmp_path):
+    """Test the sweeper runs only with a TTL and metrics are written either way."""
+    from src.pipeline.runtime import Runtime
+    
+    def runtime(name, **overrides):
+        overrides = {"cache.cache_dir": str(tmp_path / name), **overrides}
+        return Runtime(load_config(_write(tmp_path, "{}\n"), {}, overrides))
+    
+    swept = runtime("swept", **{"cache.sweep_interval": 60})
+    swept.start_background()
+    sweeper = swept.response_cache()._sweeper
+    assert sweeper.is_alive() and sweeper.interval == 60
+    swept.close()
+    assert not sweeper.is_alive()
+    
+    forever = runtime("forever", **{"cache.ttl": 0, "cache.metrics_interval": 0})
+    forever.start_background()
+    assert forever.response_cache()._sweeper is None
+    forever.response_cache().get("query", "context")
+    forever.close()
+    manager = CacheManager(cache_dir=str(tmp_path / "forever"), backend="sqlite")
+    assert manager.get_metrics()["requests"] == 1
+
+
+def test_runtime_warm_starts_from_last_hot_set(tmp_path):
+    """Test a restarted runtime serves the previous run's hot narratives from memory."""
+    pytest.importorskip("faiss")
+    pytest.importorskip("langchain")
+    from benchmarks.corpus import CorpusSpec, generate_corpus
+    from src.pipeline.runtime import Runtime
+    
+    generate_corpus(str(tmp_path / "decks"), CorpusSpec(decks=2, slides_per_deck=3, seed=3))
+    overrides = {
+        "data.presentations_dir": str(tmp_path / "decks"),
+        "vector_store.index_path": str(tmp_path / "index"),
+        "llm.provider": "simulated",
+        "llm.options": {"realtime": False},
+        "cache.cache_dir": str(tmp_path / "cache"),
+        "cache.hot_set_interval": 0,
+    }
+    
+    first = Runtime(load_config(_write(tmp_path, "{}\n"), {}, overrides))
+    first.start_background()
+    first.index_loader()()
+    narrative = first.pipeline().generate_narrative("explain the model")
+    first.close()
+    
+    restarted = Runtime(load_config(_write(tmp_path, "{}\n"), {}, overrides))
+    restarted.start_background()
+    restarted.index_loader()()
+    cache = restarted.response_cache()
+    deadline = time.time() + 5
+    while not len(cache.memory_cache) and time.time() < deadline:
+        time.sleep(0.01)
+    assert restarted.pipeline().generate_narrative("explain the model") == narrative
+    assert cache.metrics_snapshot()["tiers"]["memory"]["hits"] == 1
+    restarted.close()
@@ -0,0 +1,80 @@
+"""
+Tests for Near-Duplicate Detection
+"""
+
+import pickle
+import random
+import pytest
+from src.pipeline.dedup import NearDuplicateDetector, lsh_bands
+from src.pipeline.rag_pipeline import RAGPipeline
+
+
+def _documents():
+    rng = random.Random(0)
+    vocabulary = [f"term{i}" for i in range(2000)]
+    
+    def slide():
+        return " ".join(rng.choice(vocabulary) for _ in range(100))
+    
+    def revise(text):
+        words = text.split()
+        words[rng.randrange(len(words))] = "revised"
+        return " ".join(words)
+    
+    lecture = [slide() for _ in range(10)]
+    return [
+        {"id": "ml_2023", "slides": ["Agenda"] + lecture},
+        {"id": "ml_2024", "slides": ["  agenda "] + [revise(text) for text in lecture]},
+        {"id": "stats", "slides": ["Agenda"] + [slide() for _ in range(10)]},
+    ]
+
+
+def test_lsh_bands_match_threshold():
+    """Test band and row counts put the S-curve near the threshold."""
+    bands, rows = lsh_bands(0.85, 128)
+    assert bands * rows <= 128
+    assert abs((1 / bands) ** (1 / rows) - 0.85) < 0.05
+
+
+def test_collapse_keeps_provenance():
+    """Test exact and near duplicates collapse into the first occurrence."""
+    pipeline = RAGPipeline(chunk_size=2000, deduplicator=NearDuplicateDetector(0.8))
+    chunks = pipeline.chunk_documents(_documents())
+    report = pipeline.dedup_report
+    
+    assert report.chunks_in == 33
+    assert len(chunks) == report.chunks_out == 21
+    assert report.exact_duplicates == 2
+    assert report.near_duplicates == 10
+    assert report.removed_fraction == pytest.approx(12 / 33)
+    assert report.index_bytes_saved(256) == 12 * 256 * 4
+    assert 0.3 < report.embedding_bytes_saved_fraction < 0.4
+    
+    assert chunks[0].provenance == [("ml_2023", 1, 0), ("ml_2024", 1, 0), ("stats", 1, 0)]
+    assert chunks[1].provenance == [("ml_2023", 2, 0), ("ml_2024", 2, 0)]
+    assert chunks[1]["presentation_id"] == "ml_2023"
+    assert chunks.slide_rows("ml_2024")[2] == [1]
+    assert all(chunk["presentation_id"] == "stats" for chunk in chunks[11:])
+    
+    restored = pickle.loads(pickle.dumps(chunks))
+    assert restored[0].provenance == chunks[0].provenance
+
+
+def test_distinct_chunks_are_kept_and_bundled(tmp_path):
+    """Test unrelated chunks survive and provenance round-trips through a bundle."""
+    pytest.importorskip("faiss")
+    from src.pipeline.index_bundle import IndexBundle
+    
+    documents = _documents()
+    pipeline = RAGPipeline(chunk_size=2000, deduplicator=NearDuplicateDetector(0.99))
+    pipeline.create_vector_store(documents)
+    # One changed word in 100 is below a 0.99 threshold; only the agendas collapse
+    assert len(pipeline.chunks) == 31
+    assert pipeline.vector_store.ntotal == 31
+    
+    path = pipeline.save_bundle(str(tmp_path / "course.ragidx"))
+    bundle = IndexBundle(path)
+    assert bundle.config["dedup_threshold"] == 0.99
+    assert bundle.chunks[0].provenance == [("ml_2023", 1, 0), ("ml_2024", 1, 0), ("stats", 1, 0)]
+    assert bundle.chunks.slide_rows("stats")[1] == [0]
+
@@ -0,0 +1,198 @@
+"""
+Tests for the Async HTTP Server
+"""
+
+import asyncio
+import json
+import threading
+import pytest
+from benchmarks.loadgen import http_request
+from src.server.http_server import NarrationServer
+from src.utils.tracing import Tracer
+
+
+class BlockingPipeline:
+    """Pipeline stand-in whose retrieval waits for a release event."""
+    
+    def __init__(self):
+        self.vector_store = object()
+        self.index_registry = None
+        self.chunks = []
+        self.tracer = Tracer(enabled=False)
+        self.release = threading.Event()
+    
+    def retrieve_context(self, query, k=5, course=None):
+        self.release.wait(5)
+        return [{"id": "deck:1:0", "text": query}]
+
+
+class StreamingPipeline(BlockingPipeline):
+    """Pipeline stand-in that streams large fragments and counts them."""
+    
+    def __init__(self, fragments):
+        super().__init__()
+        self.fragments = fragments
+        self.produced = 0
+        self.closed = threading.Event()
+    
+    def stream_narrative(self, query, context=None, presentation_id=None, request_id=None, k=5, course=None):
+        try:
+            for _ in range(self.fragments):
+                self.produced += 1
+                yield "x" * 65536
+        finally:
+            self.closed.set()
+
+
+async def _call(server, method, path, payload=None):
+    reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+    try:
+        return await http_request(reader, writer, "127.0.0.1", method, path, payload)
+    finally:
+        writer.close()
+
+
+def test_endpoints_over_indexed_corpus(tmp_path):
+    """Test readiness, retrieve, narrate and streamed narrate on a real index."""
+    pytest.importorskip("faiss")
+    from benchmarks.corpus import CorpusSpec, generate_corpus
+    from src.pipeline.rag_pipeline import RAGPipeline
+    
+    generate_corpus(str(tmp_path), CorpusSpec(decks=2, slides_per_deck=3, seed=1))
+    pipeline = RAGPipeline(documents_path=str(tmp_path), chunk_size=200, chunk_overlap=20)
+    
+    async def scenario():
+        server = NarrationServer(pipeline, port=0)
+        await server.start()
+        try:
+            assert await server.wait_ready(30)
+            status, _, body, _ = await _call(server, "GET", "/readyz")
+            assert status == 200 and json.loads(body)["chunks"] == len(pipeline.chunks)
+            
+            status, headers, body, _ = await _call(server, "POST", "/retrieve", {"query": "gradient descent", "k": 2})
+            assert status == 200
+            assert len(json.loads(body)["chunks"]) == 2
+            assert headers["x-request-id"]
+            
+            status, _, body, _ = await _call(server, "POST", "/narrate", {"query": "gradient descent"})
+            narrative = json.loads(body)["narrative"]
+            status, headers, body, _ = await _call(server, "POST", "/narrate/stream", {"query": "gradient descent"})
+            assert status == 200 and headers["transfer-encoding"] == "chunked"
+            assert body.decode("utf-8") == narrative
+            
+            assert (await _call(server, "POST", "/narrate", {"k": 2}))[0] == 400
+            assert (await _call(server, "GET", "/narrate"))[0] == 405
+            assert (await _call(server, "GET", "/nope"))[0] == 404
+            _, _, body, _ = await _call(server, "GET", "/metrics")
+            assert 'rag_http_responses_total{endpoint="/narrate",status="200"} 1' in body.decode("utf-8")
+        finally:
+            await server.stop()
+    
+    asyncio.run(scenario())
+
+
+def test_readiness_waits_for_index():
+    """Test requests are refused until the background index load finishes."""
+    pipeline = BlockingPipeline()
+    pipeline.release.set()
+    loaded = threading.Event()
+    
+    async def scenario():
+        server = NarrationServer(pipeline, port=0, index_loader=lambda: loaded.wait(5))
+        await server.start()
+        try:
+            assert (await _call(server, "GET", "/healthz"))[0] == 200
+            assert (await _call(server, "GET", "/readyz"))[0] == 503
+            status, headers, _, _ = await _call(server, "POST", "/retrieve", {"query": "q"})
+            assert status == 503 and headers["retry-after"] == "1"
+            loaded.set()
+            assert await server.wait_ready(5)
+            assert (await _call(server, "GET", "/readyz"))[0] == 200
+        finally:
+            await server.stop()
+    
+    asyncio.run(scenario())
+
+
+def test_backpressure_rejects_when_queue_full():
+    """Test requests beyond concurrency plus queue are rejected with 503."""
+    pipeline = BlockingPipeline()
+    
+    async def scenario():
+        server = NarrationServer(pipeline, port=0, max_concurrency=1, max_queue=1)
+        await server.start()
+        try:
+            first = asyncio.create_task(_call(server, "POST", "/retrieve", {"query": "a"}))
+            second = asyncio.create_task(_call(server, "POST", "/retrieve", {"query": "b"}))
+            for _ in range(500):
+                if server.stats()["in_flight"] == 1 and server.stats()["waiting"] == 1:
+                    break
+                await asyncio.sleep(0.01)
+            status, headers, _, _ = await _call(server, "POST", "/retrieve", {"query": "c"})
+            assert status == 503 and "retry-after" in headers
+            
+            pipeline.release.set()
+            assert [(await task)[0] for task in (first, second)] == [200, 200]
+            assert server.stats()["rejected"] == 1
+        finally:
+            await server.stop()
+    
+    asyncio.run(scenario())
+
+
+def test_malformed_requests_rejected():
+    """Test negative Content-Length and non-token methods are answered with 400."""
+    pipeline = BlockingPipeline()
+    pipeline.release.set()
+    
+    async def raw_status(server, data):
+        reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+        try:
+            writer.write(data)
+            await writer.drain()
+            return int((await reader.readline()).split()[1])
+        finally:
+            writer.close()
+    
+    async def scenario():
+        server = NarrationServer(pipeline, port=0)
+        await server.start()
+        try:
+            assert await raw_status(server, b"POST /retrieve HTTP/1.1\r\nContent-Length: -5\r\n\r\n") == 400
+            assert await raw_status(server, "G\u00c9T /healthz HTTP/1.1\r\n\r\n".encode("latin-1")) == 400
+            assert await raw_status(server, b"GET /healthz HTTP/1.1\r\n\r\n") == 200
+        finally:
+            await server.stop()
+    
+    asyncio.run(scenario())
+
+
+def test_stream_waits_for_slow_client():
+    """Test generation stalls while the client is not reading and stops once it leaves."""
+    pipeline = StreamingPipeline(fragments=1000)
+    
+    async def scenario():
+        server = NarrationServer(pipeline, port=0)
+        await server.start()
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+            body = json.dumps({"query": "slow"}).encode("utf-8")
+            writer.write(
+                b"POST /narrate/stream HTTP/1.1\r\nHost: test\r\nContent-Type: application/json\r\n"
+                + f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1") + body
+            )
+            await writer.drain()
+            produced = -1
+            try:
+                while produced != pipeline.produced:
+                    produced = pipeline.produced
+                    await asyncio.sleep(0.2)
+            finally:
+                writer.close()
+            assert 0 < produced < pipeline.fragments
+            assert await asyncio.get_running_loop().run_in_executor(None, pipeline.closed.wait, 5)
+        finally:
+            await server.stop()
+    
+    asyncio.run(scenario())
+
@@ -0,0 +1,84 @@
+"""
+Tests for Index Bundles
+"""
+
+import pytest
+from src.pipeline.index_bundle import BundleError, IndexBundle, promote_bundle
+from src.pipeline.rag_pipeline import RAGPipeline
+
+pytest.importorskip("faiss")
+
+
+@pytest.fixture
+def built_pipeline(tmp_path):
+    from benchmarks.corpus import CorpusSpec, generate_corpus
+    
+    generate_corpus(str(tmp_path / "decks"), CorpusSpec(decks=2, slides_per_deck=3, seed=1))
+    pipeline = RAGPipeline(documents_path=str(tmp_path / "decks"), chunk_size=200, chunk_overlap=20)
+    pipeline.create_vector_store(pipeline.load_documents())
+    return pipeline
+
+
+def test_bundle_round_trip(tmp_path, built_pipeline):
+    """Test a bundle serves the same results, lazily and from the mapped file."""
+    path = built_pipeline.save_bundle(str(tmp_path / "ml.ragidx"), metadata={"course": "ml"})
+    
+    pipeline = RAGPipeline()
+    bundle = pipeline.load_bundle(str(path))
+    assert bundle.metadata == {"course": "ml"}
+    assert bundle.config["chunk_size"] == 200
+    assert pipeline.index_version == built_pipeline.index_version
+    assert not pipeline.vector_store.loaded
+    assert [dict(chunk) for chunk in pipeline.chunks] == [dict(chunk) for chunk in built_pipeline.chunks]
+    assert isinstance(pipeline.chunks.buffer, memoryview)
+    
+    expected = built_pipeline.retrieve_context("gradient descent", k=3)
+    assert [hit["id"] for hit in pipeline.retrieve_context("gradient descent", k=3)] == [hit["id"] for hit in expected]
+    assert pipeline.vector_store.loaded
+
+
+def test_corruption_and_model_mismatch_are_detected(tmp_path, built_pipeline):
+    """Test flipped bytes, truncation and a different embedder are rejected."""
+    from src.pipeline.embeddings import HashingEmbedder
+    
+    path = built_pipeline.save_bundle(str(tmp_path / "ml.ragidx"))
+    data = bytearray(path.read_bytes())
+    
+    corrupt = tmp_path / "corrupt.ragidx"
+    text = IndexBundle(str(path)).header["sections"]["chunk_text"]
+    data[text["offset"] + 5] ^= 0x01
+    corrupt.write_bytes(bytes(data))
+    IndexBundle(str(corrupt), verify=False)
+    with pytest.raises(BundleError, match="Checksum"):
+        IndexBundle(str(corrupt))
+    
+    truncated = tmp_path / "truncated.ragidx"
+    truncated.write_bytes(bytes(data[:200]))
+    with pytest.raises(BundleError):
+        IndexBundle(str(truncated), verify=False)
+    
+    with pytest.raises(BundleError, match="embedding model"):
+        RAGPipeline(embedder=HashingEmbedder(dim=128)).load_bundle(str(path))
+
+
+def test_promote_swaps_atomically(tmp_path, built_pipeline):
+    """Test promotion replaces the serving file while open bundles keep the old one."""
+    first = built_pipeline.save_bundle(str(tmp_path / "v1.ragidx"), metadata={"build": 1})
+    second = built_pipeline.save_bundle(str(tmp_path / "v2.ragidx"), metadata={"build": 2})
+    serving = tmp_path / "serving" / "ml.ragidx"
+    
+    promote_bundle(str(first), str(serving))
+    old = IndexBundle(str(serving))
+    promote_bundle(str(second), str(serving))
+    assert IndexBundle(str(serving)).metadata == {"build": 2}
+    assert old.metadata == {"build": 1}
+    assert old.chunks[0]["text"]
+    assert [p.name for p in serving.parent.iterdir()] == ["ml.ragidx"]
+    
+    bad = tmp_path / "bad.ragidx"
+    bad.write_bytes(b"not a bundle")
+    with pytest.raises(BundleError):
+        promote_bundle(str(bad), str(serving))
+    assert IndexBundle(str(serving)).metadata == {"build": 2}
+    assert [p.name for p in serving.parent.iterdir()] == ["ml.ragidx"]
+
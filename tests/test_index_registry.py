@@ -0,0 +1,115 @@
+"""
+Tests for the Index Registry
+"""
+
+import threading
+import time
+import pytest
+from src.pipeline.index_registry import CourseIndex, IndexRegistry
+
+
+class FakeIndex:
+    """Index stand-in sized by vector count and dimension."""
+    
+    def __init__(self, ntotal: int, d: int = 256):
+        self.ntotal = ntotal
+        self.d = d
+
+
+class CountingLoader:
+    """Loads 1000-vector fake indexes (about 1 MB each) and counts calls."""
+    
+    def __init__(self, delay: float = 0.0):
+        self.calls = []
+        self.delay = delay
+    
+    def __call__(self, name):
+        self.calls.append(name)
+        time.sleep(self.delay)
+        if name == "missing":
+            raise FileNotFoundError(name)
+        return CourseIndex(name, FakeIndex(1000), [], index_version=f"v-{name}")
+
+
+MB = 1024 * 1024
+
+
+def test_lru_eviction_within_budget():
+    """Test least recently used courses are evicted to stay under budget."""
+    loader = CountingLoader()
+    registry = IndexRegistry(loader, max_bytes=int(2.5 * MB))
+    for name in ("a", "b", "a", "c"):
+        with registry.acquire(name):
+            pass
+    assert [entry["name"] for entry in registry.loaded()] == ["a", "c"]
+    assert loader.calls == ["a", "b", "c"]
+    assert registry.stats["hits"] == 1
+    assert registry.stats["evictions"] == 1
+    assert registry.current_bytes <= registry.max_bytes
+
+
+def test_in_use_and_pinned_courses_are_kept():
+    """Test leased and pinned courses survive eviction until released or expired."""
+    registry = IndexRegistry(CountingLoader(), max_bytes=int(1.5 * MB))
+    lease = registry.acquire("a")
+    with registry.acquire("b") as course:
+        assert course.index_version == "v-b"
+        # Over budget, but both are in use
+        assert len(registry) == 2
+    assert "b" not in registry
+    lease.release()
+    lease.release()
+    assert "a" in registry
+    
+    registry.preload(["a"], pin_until=float("inf"))
+    with registry.acquire("c"):
+        pass
+    assert "a" in registry and "c" not in registry
+    
+    registry.pin("a", time.time() - 1)
+    with registry.acquire("c"):
+        pass
+    assert "a" not in registry
+
+
+def test_concurrent_acquires_share_one_load():
+    """Test threads asking for the same unloaded course trigger a single load."""
+    loader = CountingLoader(delay=0.05)
+    registry = IndexRegistry(loader)
+    
+    def use():
+        with registry.acquire("a"):
+            pass
+    
+    threads = [threading.Thread(target=use) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert loader.calls == ["a"]
+    assert registry.loaded()[0]["refs"] == 0
+    
+    with pytest.raises(FileNotFoundError):
+        registry.acquire("missing")
+    assert registry.stats["load_failures"] == 1
+
+
+def test_pipeline_retrieves_from_saved_course(tmp_path):
+    """Test a saved pipeline index is served per course through the registry."""
+    pytest.importorskip("faiss")
+    from benchmarks.corpus import CorpusSpec, generate_corpus
+    from src.pipeline.index_registry import IndexFileLoader
+    from src.pipeline.rag_pipeline import RAGPipeline
+    
+    generate_corpus(str(tmp_path / "decks"), CorpusSpec(decks=2, slides_per_deck=3, seed=1))
+    builder = RAGPipeline(documents_path=str(tmp_path / "decks"), chunk_size=200, chunk_overlap=20)
+    builder.create_vector_store(builder.load_documents())
+    builder.save_index("ml101", str(tmp_path / "models"))
+    
+    registry = IndexRegistry(IndexFileLoader(str(tmp_path / "models")))
+    pipeline = RAGPipeline(index_registry=registry)
+    context = pipeline.retrieve_context("gradient descent", k=2, course="ml101")
+    assert [chunk["id"] for chunk in context] == [chunk["id"] for chunk in builder.retrieve_context("gradient descent", 2)]
+    assert context[0]["index_version"] == builder.index_version
+    assert registry.loaded()[0]["refs"] == 0
+
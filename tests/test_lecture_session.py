@@ -0,0 +1,85 @@
+"""
+Tests for Live-Lecture Sessions
+"""
+
+import pytest
+from src.pipeline.index_registry import CourseIndex, IndexRegistry
+from src.pipeline.rag_pipeline import RAGPipeline
+
+
+@pytest.fixture
+def pipeline(tmp_path):
+    pytest.importorskip("faiss")
+    from benchmarks.corpus import CorpusSpec, generate_corpus
+    
+    generate_corpus(str(tmp_path), CorpusSpec(decks=3, slides_per_deck=6, seed=1))
+    pipeline = RAGPipeline(documents_path=str(tmp_path), chunk_size=200, chunk_overlap=20)
+    pipeline.create_vector_store(pipeline.load_documents())
+    return pipeline
+
+
+def test_window_fetches_only_new_slides(pipeline):
+    """Test moving one slide fetches just the slide entering the window."""
+    presentation_id = pipeline.chunks.presentation_ids[0]
+    slides = pipeline.chunks.slide_rows(presentation_id)
+    with pipeline.start_session(presentation_id, window_slides=1, lookahead_slides=1) as session:
+        assert session.advance() == 1
+        assert session.stats["chunks_fetched"] == len(slides[1]) + len(slides[2])
+        
+        fetched = session.goto(2)
+        assert fetched == len(slides[3])
+        assert session.stats["chunks_reused"] == len(slides[1]) + len(slides[2])
+        assert sorted(session._window) == [1, 2, 3]
+        
+        session.goto(5)
+        assert sorted(session._window) == [4, 5, 6]
+        
+        narrative = session.narrate_slide()
+        assert "Narrate slide 5" in narrative
+        context = session.slide_context()
+        assert all(hit["presentation_id"] == presentation_id for hit in context)
+        assert context[0]["slide_number"] == 5
+
+
+def test_follow_up_reuses_session_context(pipeline):
+    """Test a repeated question is answered without another index search."""
+    presentation_id = pipeline.chunks.presentation_ids[0]
+    session = pipeline.start_session(presentation_id, k=3, reuse_threshold=1.1)
+    session.goto(1)
+    
+    first = session.context_for("gradient descent and overfitting")
+    assert session.stats["retrievals"] == 1
+    assert len(first) == 3
+    assert all(hit["presentation_id"] == presentation_id for hit in first)
+    
+    second = session.context_for("gradient descent and overfitting")
+    assert session.stats["retrievals"] == 1
+    assert session.stats["window_answers"] == 1
+    assert [hit["id"] for hit in second] == [hit["id"] for hit in first]
+    assert session.ask("gradient descent and overfitting").startswith("Narrative for query")
+
+
+def test_course_session_holds_lease(pipeline):
+    """Test a course session keeps its index resident until closed."""
+    registry = IndexRegistry(
+        lambda name: CourseIndex(name, pipeline.vector_store, pipeline.chunks, index_version="v1"),
+        max_indexes=1
+    )
+    served = RAGPipeline(index_registry=registry)
+    presentation_id = pipeline.chunks.presentation_ids[1]
+    
+    session = served.start_session(presentation_id, course="ml101")
+    session.advance()
+    assert all(hit["index_version"] == "v1" for hit in session.slide_context())
+    with registry.acquire("other"):
+        pass
+    assert "ml101" in registry
+    
+    session.close()
+    with registry.acquire("third"):
+        pass
+    assert "ml101" not in registry
+    
+    with pytest.raises(ValueError):
+        served.start_session("no_such_deck", course="ml101")
+
@@ -0,0 +1,145 @@
+"""
+Tests for the Pooled LLM Client against a local stub server
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from src.agents.llm_client import HedgePolicy, LLMClient, OpenAIChat, RetryPolicy, get_shared_client
+from src.agents.llm_providers import LLMProviderError
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Replays scripted responses and records client connections."""
+    
+    protocol_version = "HTTP/1.1"
+    
+    def do_POST(self):
+        server = self.server
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        with server.lock:
+            server.client_ports.append(self.client_address[1])
+            status, delay, body = server.script.pop(0) if server.script else (200, 0, None)
+        time.sleep(delay)
+        # Drop the connection after replying, as a server closing idle keep-alives would
+        self.close_connection = server.close_after_reply
+        
+        if payload.get("stream"):
+            chunks = [json.dumps({"choices": [{"delta": {"content": word}}]}) for word in ("Hello", " there")]
+            data = "".join(f"data: {chunk}\n\n" for chunk in chunks) + "data: [DONE]\n\n"
+            self._reply(200, data.encode(), "text/event-stream")
+            return
+        
+        if body is None:
+            body = {"choices": [{"message": {"content": "stub narrative"}}]}
+        self._reply(status, json.dumps(body).encode(), "application/json")
+    
+    def _reply(self, status, data, content_type):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        if status == 429:
+            self.send_header("Retry-After", "0")
+        self.end_headers()
+        self.wfile.write(data)
+    
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.script = []
+    server.client_ports = []
+    server.close_after_reply = False
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def base_url(server):
+    return f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+def test_connections_are_kept_alive(stub_server):
+    """Test sequential requests reuse one pooled connection."""
+    client = LLMClient(base_url(stub_server))
+    for _ in range(3):
+        assert client.post_json("/chat/completions", {})["choices"]
+    assert len(set(stub_server.client_ports)) == 1
+
+
+def test_retries_on_429_and_5xx(stub_server):
+    """Test retryable statuses are retried until success."""
+    stub_server.script = [(429, 0, {"error": "rate"}), (503, 0, {"error": "busy"})]
+    client = LLMClient(base_url(stub_server), retry=RetryPolicy(max_retries=3, base_delay=0.01))
+    assert client.post_json("/chat/completions", {})["choices"]
+    assert client.stats["retries"] == 2
+
+
+def test_non_retryable_error_raises(stub_server):
+    """Test client errors are raised without retrying."""
+    stub_server.script = [(400, 0, {"error": "bad request"})]
+    client = LLMClient(base_url(stub_server), retry=RetryPolicy(base_delay=0.01))
+    with pytest.raises(LLMProviderError):
+        client.post_json("/chat/completions", {})
+    assert client.stats["retries"] == 0
+
+
+def test_hedged_request_beats_slow_call(stub_server):
+    """Test a duplicate request is fired and wins when the first is slow."""
+    stub_server.script = [(200, 1.0, None), (200, 0, None)]
+    client = LLMClient(base_url(stub_server), hedge=HedgePolicy(delay=0.05))
+    start = time.monotonic()
+    assert client.post_json("/chat/completions", {})["choices"]
+    assert time.monotonic() - start < 0.8
+    assert client.stats["hedges"] == 1
+    assert client.stats["hedge_wins"] == 1
+
+
+def test_openai_provider_invoke_and_stream(stub_server):
+    """Test the OpenAI provider against the stub."""
+    llm = OpenAIChat(api_key="test", base_url=base_url(stub_server))
+    assert llm.invoke("prompt") == "stub narrative"
+    assert "".join(llm.stream("prompt")) == "Hello there"
+
+
+def test_stream_retries_stale_keep_alive(stub_server):
+    """Test a stream on a connection the server closed while idle is retried once."""
+    stub_server.close_after_reply = True
+    client = LLMClient(base_url(stub_server), retry=RetryPolicy(max_retries=0))
+    assert client.post_json("/chat/completions", {})["choices"]
+    lines = list(client.stream_lines("/chat/completions", {"stream": True}))
+    assert lines[-1] == "data: [DONE]"
+    assert client.post_json("/chat/completions", {})["choices"]
+
+
+def test_hedge_ignores_fast_retryable_failure(stub_server):
+    """Test a fast 503 from the backup leg does not beat a slower success."""
+    stub_server.script = [(200, 0.3, None), (503, 0, {"error": "busy"})]
+    client = LLMClient(base_url(stub_server), retry=RetryPolicy(max_retries=0), hedge=HedgePolicy(delay=0.05))
+    assert client.post_json("/chat/completions", {})["choices"]
+    assert client.stats["hedges"] == 1
+    assert client.stats["hedge_wins"] == 0
+
+
+def test_shared_clients_are_keyed_on_options():
+    """Test callers asking for different options do not share a client."""
+    url = "http://127.0.0.1:9/v1"
+    plain = get_shared_client(url, {"Authorization": "Bearer a"})
+    assert get_shared_client(url, {"Authorization": "Bearer a"}) is plain
+    hedged = get_shared_client(url, {"Authorization": "Bearer a"}, hedge=HedgePolicy())
+    assert hedged is not plain
+    assert hedged.hedge is not None
+    assert get_shared_client(url, {"Authorization": "Bearer a"}, hedge=HedgePolicy()) is hedged
+    assert get_shared_client(url, {"Authorization": "Bearer a"}, timeout=5.0) is not plain
+
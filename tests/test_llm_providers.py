@@ -0,0 +1,53 @@
+"""
+Tests for the Simulated LLM Provider
+"""
+
+import pytest
+from src.agents.llm_providers import (
+    SimulatedLLM,
+    LLMProviderError,
+    RateLimitError,
+    create_llm,
+)
+
+
+def test_simulated_response_is_deterministic():
+    """Test identical prompts produce identical responses."""
+    llm = SimulatedLLM(response_tokens=10, realtime=False, seed=1)
+    first = llm.invoke("explain slide 3")
+    second = llm.invoke("explain slide 3")
+    assert first == second
+    assert len(first.split()) == 10
+    assert llm.stats["calls"] == 2
+
+
+def test_simulated_streaming():
+    """Test streaming yields the same text as invoke."""
+    llm = SimulatedLLM(response_tokens=5, realtime=False)
+    chunks = list(llm.stream("prompt"))
+    assert len(chunks) == 5
+    assert "".join(chunks) == llm.invoke("prompt")
+
+
+def test_simulated_failures():
+    """Test configured error and rate limit responses."""
+    with pytest.raises(LLMProviderError):
+        SimulatedLLM(error_rate=1.0, realtime=False).invoke("prompt")
+    
+    with pytest.raises(RateLimitError) as excinfo:
+        SimulatedLLM(rate_limit_rate=1.0, retry_after=2.5, realtime=False).invoke("prompt")
+    assert excinfo.value.retry_after == 2.5
+    
+    limited = SimulatedLLM(requests_per_minute=2, realtime=False)
+    limited.invoke("a")
+    limited.invoke("b")
+    with pytest.raises(RateLimitError):
+        limited.invoke("c")
+
+
+def test_create_llm():
+    """Test provider factory."""
+    assert isinstance(create_llm("simulated", realtime=False), SimulatedLLM)
+    with pytest.raises(ValueError):
+        create_llm("unknown")
+
@@ -0,0 +1,58 @@
+"""
+Tests for Profiling Hooks
+"""
+
+import pstats
+import tracemalloc
+import pytest
+from src.utils.profiling import Profiler
+
+
+def _work():
+    return sorted(str(i) for i in range(20000))
+
+
+def test_disabled_profiler_is_noop(tmp_path):
+    """Test a disabled profiler writes nothing."""
+    profiler = Profiler(enabled=False, output_dir=str(tmp_path))
+    with profiler.profile("request", force=True) as session:
+        _work()
+    assert session.artifacts == []
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_profile_writes_artifacts(tmp_path):
+    """Test a profiled run writes a readable .prof, snapshot and summary."""
+    profiler = Profiler(enabled=True, output_dir=str(tmp_path), memory=True)
+    with profiler.profile("index_build") as session:
+        _work()
+    
+    suffixes = sorted(path.suffix for path in session.artifacts)
+    assert suffixes == [".prof", ".tracemalloc", ".txt"]
+    prof = next(path for path in session.artifacts if path.suffix == ".prof")
+    assert pstats.Stats(str(prof)).total_calls > 0
+    snapshot_path = next(path for path in session.artifacts if path.suffix == ".tracemalloc")
+    assert tracemalloc.Snapshot.load(str(snapshot_path)).traces
+    assert not tracemalloc.is_tracing()
+
+
+def test_stage_selection_and_sampling(tmp_path):
+    """Test only selected, sampled and non-overlapping runs are profiled."""
+    profiler = Profiler(enabled=True, output_dir=str(tmp_path), stages=["batch"], sample_rate=0.0)
+    with profiler.profile("request", force=True) as session:
+        pass
+    assert session.artifacts == []
+    with profiler.profile("batch") as session:
+        pass
+    assert session.artifacts == []
+    
+    with profiler.profile("batch", force=True) as outer:
+        with profiler.profile("batch", force=True) as inner:
+            pass
+        assert inner.artifacts == []
+    assert outer.artifacts
+    # The profiling slot is free again
+    with profiler.profile("batch", force=True) as session:
+        pass
+    assert session.artifacts
+
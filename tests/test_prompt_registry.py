@@ -0,0 +1,56 @@
+"""
+Tests for the Prompt Template Registry
+"""
+
+import os
+import pytest
+
+pytest.importorskip("langchain")
+
+from src.agents.prompt_registry import PromptRegistry
+
+
+def test_template_compiled_once(tmp_path):
+    """Test repeated lookups reuse the compiled template."""
+    template_file = tmp_path / "template.txt"
+    template_file.write_text("Context: {context}\nTopic: {topic}\n")
+    
+    registry = PromptRegistry(check_interval=0)
+    first = registry.get(str(template_file))
+    second = registry.get(str(template_file))
+    assert first is second
+    assert sorted(first.input_variables) == ["context", "topic"]
+
+
+def test_template_reloaded_on_change(tmp_path):
+    """Test a modified file is recompiled."""
+    template_file = tmp_path / "template.txt"
+    template_file.write_text("Context: {context}\n")
+    
+    registry = PromptRegistry(check_interval=0)
+    first = registry.get(str(template_file))
+    old_version = registry.version(str(template_file))
+    
+    template_file.write_text("Context: {context}\nQuery: {query}\n")
+    stat = template_file.stat()
+    os.utime(template_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    
+    second = registry.get(str(template_file))
+    assert second is not first
+    assert "query" in second.input_variables
+    assert registry.version(str(template_file)) != old_version
+
+
+def test_invalid_template_rejected(tmp_path):
+    """Test templates without required variables or with bad braces fail."""
+    missing = tmp_path / "missing.txt"
+    missing.write_text("No placeholders here")
+    malformed = tmp_path / "malformed.txt"
+    malformed.write_text("Context: {context")
+    
+    registry = PromptRegistry()
+    with pytest.raises(ValueError):
+        registry.get(str(missing))
+    with pytest.raises(ValueError):
+        registry.get(str(malformed))
+
@@ -30,3 +30,21 @@ def test_generate_narrative():
     assert isinstance(narrative, str)
     assert len(narrative) > 0
 
+
+def test_pipeline_indexes_and_retrieves(tmp_path):
+    """Test documents are chunked, indexed and retrieved by relevance."""
+    pytest.importorskip("faiss")
+    from benchmarks.corpus import CorpusSpec, generate_corpus
+    
+    generate_corpus(str(tmp_path), CorpusSpec(decks=3, slides_per_deck=4, seed=1))
+    pipeline = RAGPipeline(documents_path=str(tmp_path), chunk_size=200, chunk_overlap=20)
+    documents = pipeline.load_documents()
+    assert len(documents) == 3
+    pipeline.create_vector_store(documents)
+    assert pipeline.index_version is not None
+    
+    context = pipeline.retrieve_context("explain gradient descent and overfitting", k=3)
+    assert len(context) == 3
+    assert context[0]["presentation_id"].startswith("machine_learning")
+    assert context[0]["score"] >= context[-1]["score"]
+
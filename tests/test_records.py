@@ -0,0 +1,64 @@
+"""
+Tests for Compact Records
+"""
+
+import pickle
+import pytest
+from src.pipeline.records import ChunkStore, ChunkStoreBuilder, DocumentRecord, SearchHit
+
+
+def _store():
+    builder = ChunkStoreBuilder()
+    builder.add("ml_intro", 1, 0, "Gradient descent")
+    builder.add("ml_intro", 1, 1, "minimizes loss — step by step")
+    builder.add("stats_101", 4, 0, "Variance")
+    return builder.build()
+
+
+def test_chunk_store_rows_behave_like_dicts():
+    """Test chunk views expose the former dictionary fields."""
+    store = _store()
+    assert len(store) == 3
+    assert dict(store[1]) == {
+        "id": "ml_intro:1:1",
+        "presentation_id": "ml_intro",
+        "slide_number": 1,
+        "text": "minimizes loss — step by step",
+    }
+    assert store[-1]["presentation_id"] == "stats_101"
+    assert store.presentation_ids == ["ml_intro", "stats_101"]
+    assert "score" not in store[0]
+    with pytest.raises(KeyError):
+        store[0]["score"]
+    assert store.texts() == ["Gradient descent", "minimizes loss — step by step", "Variance"]
+
+
+def test_text_views_share_the_buffer():
+    """Test text views are zero-copy slices of one buffer."""
+    store = _store()
+    view = store[1].text_view
+    assert view.obj is store.buffer
+    assert bytes(view).decode("utf-8") == store[1].text
+
+
+def test_from_dicts_and_pickle_round_trip():
+    """Test stores convert from dictionaries, keep their IDs and pickle."""
+    store = _store()
+    converted = ChunkStore.from_dicts([dict(chunk) for chunk in store])
+    assert [dict(chunk) for chunk in converted] == [dict(chunk) for chunk in store]
+    assert ChunkStore.from_dicts(store) is store
+    restored = pickle.loads(pickle.dumps(store))
+    assert [chunk["id"] for chunk in restored] == ["ml_intro:1:0", "ml_intro:1:1", "stats_101:4:0"]
+
+
+def test_search_hit_and_document_record():
+    """Test hits add score and index version; documents read like dicts."""
+    store = _store()
+    hit = SearchHit(store[2], 0.75, index_version="abc")
+    assert {**hit} == {**store[2], "score": 0.75, "index_version": "abc"}
+    assert "index_version" not in SearchHit(store[2], 0.75)
+    
+    document = DocumentRecord("ml_intro", "Ml Intro", "decks/ml_intro.pdf", ["a", "b"])
+    assert document["slides"] == ["a", "b"] and document.id == "ml_intro"
+    assert not hasattr(document, "__dict__")
+
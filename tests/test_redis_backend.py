@@ -0,0 +1,72 @@
+"""
+Tests for the Redis Cache Backend against an in-process fake server
+"""
+
+import time
+import pytest
+
+pytest.importorskip("redis")
+
+from src.cache.backends import RedisCacheBackend
+from src.cache.response_cache import ResponseCache
+from tests.fake_redis import FakeRedisServer
+
+
+@pytest.fixture
+def redis_server():
+    server = FakeRedisServer().start()
+    yield server
+    server.stop()
+
+
+def test_response_cache_on_redis(tmp_path, redis_server):
+    """Test ResponseCache reads and writes through the Redis backend."""
+    cache = ResponseCache(cache_dir=str(tmp_path), backend="redis",
+                          backend_options={"url": redis_server.url})
+    cache.set("query", "context", "narrative")
+    
+    replica = ResponseCache(cache_dir=str(tmp_path), backend="redis",
+                            backend_options={"url": redis_server.url})
+    assert replica.get("query", "context") == "narrative"
+
+
+def test_batched_get_and_set(tmp_path, redis_server):
+    """Test pipelined set_many and MGET-backed get_many."""
+    cache = ResponseCache(cache_dir=str(tmp_path), backend="redis",
+                          backend_options={"url": redis_server.url})
+    cache.set_many([(f"q{i}", "ctx", f"narrative {i}") for i in range(5)])
+    cache.memory_cache.clear()
+    
+    results = cache.get_many([("q0", "ctx"), ("missing", "ctx"), ("q4", "ctx")])
+    assert results == ["narrative 0", None, "narrative 4"]
+    assert cache.disk_cache.count() == 5
+
+
+def test_native_ttl_and_index_sweep(redis_server):
+    """Test values expire in Redis and the sweep drops stale index members."""
+    backend = RedisCacheBackend(url=redis_server.url)
+    now = time.time()
+    backend.set("short", {"query": "q", "response": "r", "timestamp": now, "expires_at": now + 0.05})
+    backend.set("long", {"query": "q", "response": "r", "timestamp": now, "expires_at": now + 60})
+    time.sleep(0.1)
+    
+    assert backend.get("short") is None
+    assert backend.sweep_expired(time.time(), pause=0) == 1
+    assert backend.count() == 1
+
+
+def test_compression_and_management(redis_server):
+    """Test compressed round trip, stats, listing and clearing."""
+    backend = RedisCacheBackend(url=redis_server.url, compress=True, compress_threshold=64)
+    now = time.time()
+    entry = {"query": "q", "response": "narrative " * 100, "timestamp": now, "expires_at": None}
+    backend.set("big", entry)
+    
+    assert backend.get("big") == entry
+    stats = backend.stats()
+    assert stats["total_entries"] == 1
+    assert 0 < stats["total_bytes"] < len(entry["response"])
+    assert backend.list_entries(5)[0]["key"] == "big"
+    assert backend.clear(older_than=now - 60) == 0
+    assert backend.clear() == 1
+
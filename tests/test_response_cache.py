@@ -0,0 +1,218 @@
+"""
+Tests for the Response Cache
+"""
+
+import json
+import os
+import time
+import pytest
+from src.cache.memory_cache import LRUMemoryCache
+from src.cache.response_cache import CacheSweeper, ResponseCache
+
+
+def test_memory_tier_evicts_least_recently_used():
+    """Test entry-count limit evicts the LRU entry."""
+    cache = LRUMemoryCache(max_entries=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    cache.get("a")
+    cache.set("c", "3")
+    assert "a" in cache and "c" in cache
+    assert "b" not in cache
+    assert cache.stats["evictions"] == 1
+
+
+def test_memory_tier_respects_byte_limit():
+    """Test byte limit bounds the tier size."""
+    cache = LRUMemoryCache(max_entries=1000, max_bytes=2000)
+    for i in range(50):
+        cache.set(f"key{i}", "x" * 100)
+    assert cache.current_bytes <= 2000
+    assert len(cache) < 50
+    assert cache.stats["evicted_bytes"] > 0
+
+
+def test_disk_hit_promoted_to_memory(tmp_path):
+    """Test a disk hit is copied back into the memory tier."""
+    cache = ResponseCache(cache_dir=str(tmp_path))
+    cache.set("query", "context", "narrative")
+    cache.memory_cache.clear()
+    
+    assert cache.get("query", "context") == "narrative"
+    assert len(cache.memory_cache) == 1
+
+
+def test_expired_entries_not_served(tmp_path):
+    """Test TTL is enforced on both tiers."""
+    cache = ResponseCache(cache_dir=str(tmp_path), ttl=1)
+    cache.set("query", "context", "narrative")
+    assert cache.get("query", "context") == "narrative"
+    
+    cache.memory_cache._expiry = {k: 0 for k in cache.memory_cache._expiry}
+    for cache_file in tmp_path.glob("*.json"):
+        data = json.loads(cache_file.read_text())
+        data["expires_at"] = time.time() - 1
+        cache_file.write_text(json.dumps(data))
+    
+    assert cache.get("query", "context") is None
+    assert cache.memory_cache.stats["expired"] == 1
+
+
+def test_sweep_removes_expired_files(tmp_path):
+    """Test the sweeper deletes only expired disk entries."""
+    cache = ResponseCache(cache_dir=str(tmp_path), ttl=3600)
+    cache.set("fresh", "context", "narrative")
+    cache.set("stale", "context", "narrative")
+    stale_file = tmp_path / f"{cache._generate_key('stale', 'context')}.json"
+    os.utime(stale_file, (time.time() - 10, time.time() - 10))
+    
+    assert cache.sweep_expired(batch_size=1, pause=0) == 1
+    assert not stale_file.exists()
+    assert len(list(tmp_path.glob("*.json"))) == 1
+
+
+def test_sweep_keeps_entries_without_expiry(tmp_path):
+    """Test ttl=0 and legacy non-expiring file entries survive a sweep."""
+    cache = ResponseCache(cache_dir=str(tmp_path), ttl=0, backend="file")
+    cache.set("forever", "context", "narrative")
+    cache.set("legacy", "context", "narrative")
+    legacy_file = tmp_path / f"{cache._generate_key('legacy', 'context')}.json"
+    os.utime(legacy_file, (time.time() - 10, time.time() - 10))
+    
+    assert cache.disk_cache.sweep_expired(time.time(), pause=0) == 0
+    assert cache.disk_cache.count() == 2
+    assert legacy_file.stat().st_mtime > time.time() + 86400
+
+
+def test_sweeper_survives_failed_pass(tmp_path, capsys):
+    """Test an unexpected error is reported and the sweeper keeps running."""
+    cache = ResponseCache(cache_dir=str(tmp_path), ttl=3600)
+    passes = []
+    
+    def sweep_expired(batch_size, stop_event=None):
+        passes.append(batch_size)
+        if len(passes) == 1:
+            raise RuntimeError("backend hiccup")
+        return 0
+    
+    cache.sweep_expired = sweep_expired
+    sweeper = CacheSweeper(cache, interval=0.01)
+    sweeper.start()
+    deadline = time.time() + 5
+    while len(passes) < 2 and time.time() < deadline:
+        time.sleep(0.01)
+    sweeper.stop()
+    assert len(passes) >= 2
+    assert "✗ Cache sweep failed: RuntimeError" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("backend", ["file", "sqlite"])
+def test_disk_backends_round_trip(tmp_path, backend):
+    """Test both disk backends store, list, sweep and clear entries."""
+    cache = ResponseCache(cache_dir=str(tmp_path), ttl=3600, backend=backend)
+    cache.set("query", "context", "narrative")
+    cache.memory_cache.clear()
+    assert cache.get("query", "context") == "narrative"
+    
+    disk = cache.disk_cache
+    assert disk.count() == 1
+    assert disk.stats()["total_entries"] == 1
+    assert disk.list_entries(5)[0]["query"] == "query"
+    assert disk.sweep_expired(time.time() + 7200, pause=0) == 1
+    assert disk.count() == 0
+    
+    cache.set("query", "context", "narrative")
+    assert disk.clear(older_than=time.time() - 60) == 0
+    assert disk.clear() == 1
+
+
+def test_keys_normalize_query_and_use_chunk_ids(tmp_path):
+    """Test normalized queries share a key and chunk IDs replace context hashing."""
+    cache = ResponseCache(cache_dir=str(tmp_path))
+    assert cache._generate_key("What is  SGD?", "ctx") == cache._generate_key("what is sgd?", "ctx")
+    
+    cache.set("query", "long context", "narrative", chunk_ids=["c1", "c2"])
+    assert cache.get("query", "other context", chunk_ids=["c1", "c2"]) == "narrative"
+    assert cache.get("query", "long context", chunk_ids=["c2", "c3"]) is None
+
+
+def test_version_change_invalidates_entries(tmp_path):
+    """Test bumping a version stamp moves the cache to a new namespace."""
+    cache = ResponseCache(cache_dir=str(tmp_path), versions={"prompt": "v1"})
+    cache.set("query", "context", "narrative")
+    assert cache.get("query", "context") == "narrative"
+    
+    cache.set_versions(prompt="v2")
+    assert cache.get("query", "context") is None
+
+
+def test_per_call_versions_keep_shared_namespace(tmp_path):
+    """Test per-call versions separate callers without moving the shared namespace."""
+    cache = ResponseCache(cache_dir=str(tmp_path), versions={"index": "i1"})
+    namespace = cache.namespace
+    cache.set("query", "context", "model a", versions={"model": "a"})
+    cache.set("query", "context", "model b", versions={"model": "b"})
+    
+    assert cache.namespace == namespace
+    assert cache.get("query", "context", versions={"model": "a"}) == "model a"
+    assert cache.get("query", "context", versions={"model": "b"}) == "model b"
+    assert cache.get("query", "context") is None
+    
+    cache.set_many([("q1", "ctx", "one"), ("q2", "ctx", "two")], chunk_ids=[["c1"], None],
+                   versions={"model": "a"})
+    cache.memory_cache.clear()
+    assert cache.get_many([("q1", "other ctx"), ("q2", "ctx")], chunk_ids=[["c1"], None],
+                          versions={"model": "a"}) == ["one", "two"]
+    with pytest.raises(ValueError):
+        cache.get_many([("q1", "ctx")], chunk_ids=[])
+
+
+def test_hot_keys_rank_by_frequency():
+    """Test frequently read entries rank above untouched ones."""
+    memory = LRUMemoryCache()
+    for key in ("a", "b", "c"):
+        memory.set(key, key)
+    for _ in range(3):
+        memory.get("b")
+    memory.get("c")
+    assert [key for key, _ in memory.hot_keys(2)] == ["b", "c"]
+
+
+@pytest.mark.parametrize("backend", ["file", "sqlite"])
+def test_warm_start_preloads_hot_set(tmp_path, backend):
+    """Test a restarted cache preloads its hot set, optionally per presentation."""
+    cache = ResponseCache(cache_dir=str(tmp_path), backend=backend)
+    for deck in ("ml", "stats"):
+        for n in range(3):
+            cache.set(f"{deck}|slide {n}", "context", f"{deck} narrative {n}")
+    cache.get("ml|slide 0", "context")
+    cache.snapshot_hot_set(limit=2)
+    
+    restarted = ResponseCache(cache_dir=str(tmp_path), backend=backend)
+    warmer = restarted.warm_start(max_entries=1)
+    warmer.join(5)
+    assert warmer.loaded == 1
+    assert restarted._generate_key("ml|slide 0", "context") in restarted.memory_cache
+    
+    restarted = ResponseCache(cache_dir=str(tmp_path), backend=backend)
+    assert restarted.warm_start(presentation_id="stats", background=False) == 3
+    assert len(restarted.memory_cache) == 3
+
+
+def test_hot_set_survives_file_backend_sweep(tmp_path):
+    """Test the snapshot is not counted, listed or swept as a cache entry."""
+    cache = ResponseCache(cache_dir=str(tmp_path), ttl=3600, backend="file")
+    cache.set("ml|slide 1", "context", "narrative")
+    cache.get("ml|slide 1", "context")
+    path = cache.snapshot_hot_set()
+    
+    assert cache.disk_cache.count() == 1
+    assert cache.disk_cache.stats()["oldest"] > 0
+    assert [entry["query"] for entry in cache.disk_cache.list_entries()] == ["ml|slide 1"]
+    
+    entry_file = tmp_path / f"{cache._generate_key('ml|slide 1', 'context')}.json"
+    os.utime(entry_file, (time.time() - 10, time.time() - 10))
+    assert cache.sweep_expired(batch_size=1, pause=0) == 1
+    assert path.exists()
+    assert json.loads(path.read_text())["entries"]
+
@@ -0,0 +1,81 @@
+"""
+Tests for the Semantic Response Cache
+"""
+
+import hashlib
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.cache.semantic_cache import SemanticCache
+
+
+def bag_of_words(text, dim=64):
+    """Deterministic toy embedding: hashed word counts."""
+    vector = np.zeros(dim)
+    for word in text.lower().replace("?", "").split():
+        vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % dim] += 1
+    return vector
+
+
+def test_paraphrase_hits_within_scope():
+    """Test a similar query returns the cached narrative."""
+    cache = SemanticCache(bag_of_words, threshold=0.6)
+    scope = SemanticCache.scope_for("ml_intro", "slide 3 text")
+    cache.add("explain slide 3", scope, "narrative for slide 3")
+    
+    assert cache.lookup("please explain slide 3", scope) == "narrative for slide 3"
+    assert cache.lookup("what is gradient descent", scope) is None
+    assert cache.stats["hits"] == 1
+    assert cache.stats["misses"] == 1
+
+
+def test_scopes_are_isolated():
+    """Test entries from another presentation or context are never served."""
+    cache = SemanticCache(bag_of_words, threshold=0.6)
+    cache.add("explain slide 3", SemanticCache.scope_for("ml_intro", "ctx"), "narrative")
+    
+    assert cache.lookup("explain slide 3", SemanticCache.scope_for("stats_101", "ctx")) is None
+    assert cache.lookup("explain slide 3", SemanticCache.scope_for("ml_intro", "other")) is None
+    assert cache.lookup("explain slide 3", SemanticCache.scope_for("ml_intro", "ctx", namespace="v2")) is None
+
+
+def test_false_hit_reported_and_removed():
+    """Test reporting a false hit drops the matched entry."""
+    cache = SemanticCache(bag_of_words, threshold=0.6)
+    scope = SemanticCache.scope_for("ml_intro", "ctx")
+    cache.add("explain slide 3", scope, "narrative")
+    
+    assert cache.lookup("explain slide 3 please", scope) == "narrative"
+    cache.report_false_hit("explain slide 3 please", scope)
+    assert cache.stats["false_hits"] == 1
+    assert cache.lookup("explain slide 3", scope) is None
+
+
+def test_scope_capacity_replaces_oldest():
+    """Test a full scope overwrites its oldest entry."""
+    cache = SemanticCache(bag_of_words, threshold=0.99, max_entries_per_scope=2)
+    scope = SemanticCache.scope_for("deck", "ctx")
+    for query in ("alpha", "beta", "gamma"):
+        cache.add(query, scope, query.upper())
+    
+    assert cache.lookup("alpha", scope) is None
+    assert cache.lookup("gamma", scope) == "GAMMA"
+
+
+def test_agent_tiers_follow_per_call_versions(tmp_path):
+    """Test an index change misses both tiers without moving the shared cache namespace."""
+    pytest.importorskip("langchain")
+    from src.agents.narrative_agent import NarrativeAgent
+    from src.cache.response_cache import ResponseCache
+    
+    cache = ResponseCache(cache_dir=str(tmp_path))
+    agent = NarrativeAgent(llm_provider="simulated", llm_options={"realtime": False}, cache=cache,
+                           semantic_cache=SemanticCache(bag_of_words, threshold=0.6))
+    namespace = cache.namespace
+    narrative = agent.create_narrative("ml_intro", "ctx", "explain slide 3", versions={"index": "i1"})
+    
+    assert cache.namespace == namespace
+    assert agent._lookup_tiers("ml_intro", "ctx", "explain slide 3", None, {"index": "i1"}) == (narrative, "hit")
+    assert agent._lookup_tiers("ml_intro", "ctx", "please explain slide 3", None, {"index": "i1"})[1] == "semantic_hit"
+    assert agent._lookup_tiers("ml_intro", "ctx", "please explain slide 3", None, {"index": "i2"}) == (None, "miss")
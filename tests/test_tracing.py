@@ -0,0 +1,67 @@
+"""
+Tests for Request Tracing
+"""
+
+import pytest
+from src.utils.tracing import Tracer, current_request_id
+
+
+def test_disabled_tracer_is_noop():
+    """Test a disabled tracer records nothing."""
+    tracer = Tracer(enabled=False)
+    with tracer.request() as trace:
+        with tracer.span("retrieval", k=5) as span:
+            span.set(chunk_count=5)
+    assert trace is span
+    assert tracer.stage_stats() == {}
+    assert not tracer.recent_traces
+
+
+def test_spans_grouped_by_request():
+    """Test spans carry the request ID and feed stage histograms."""
+    tracer = Tracer()
+    with tracer.request("req-1") as trace:
+        assert current_request_id() == "req-1"
+        with tracer.request():
+            with tracer.span("cache_lookup") as span:
+                span.set(cache="miss")
+    assert current_request_id() is None
+    
+    assert [s.name for s in trace.spans] == ["cache_lookup"]
+    assert trace.spans[0].request_id == "req-1"
+    assert tracer.recent_traces[-1] is trace
+    assert tracer.stage_stats()["cache_lookup"]["count"] == 1
+    text = tracer.render_prometheus()
+    assert 'rag_stage_duration_seconds_count{stage="cache_lookup"} 1' in text
+    assert 'rag_stage_cache_total{stage="cache_lookup",outcome="miss"} 1' in text
+
+
+def test_pipeline_request_trace(tmp_path):
+    """Test a narration records every stage with sizes and cache outcome."""
+    pytest.importorskip("faiss")
+    pytest.importorskip("langchain")
+    from benchmarks.corpus import CorpusSpec, generate_corpus
+    from src.agents.narrative_agent import NarrativeAgent
+    from src.cache.response_cache import ResponseCache
+    from src.pipeline.rag_pipeline import RAGPipeline
+    
+    tracer = Tracer()
+    generate_corpus(str(tmp_path / "decks"), CorpusSpec(decks=2, slides_per_deck=3))
+    agent = NarrativeAgent(llm_provider="simulated", llm_options={"realtime": False},
+                           cache=ResponseCache(cache_dir=str(tmp_path / "cache")), tracer=tracer)
+    pipeline = RAGPipeline(documents_path=str(tmp_path / "decks"), agent=agent, tracer=tracer)
+    pipeline.create_vector_store(pipeline.load_documents())
+    
+    pipeline.generate_narrative("explain the model", request_id="cold")
+    pipeline.generate_narrative("explain the model", request_id="warm")
+    cold, warm = list(tracer.recent_traces)
+    
+    spans = {span.name: span.attributes for span in cold.spans}
+    assert list(spans) == ["embed_query", "search", "retrieval", "context_assembly",
+                           "cache_lookup", "prompt_build", "llm", "cache_store"]
+    assert spans["retrieval"]["k"] == 5
+    assert spans["context_assembly"]["context_tokens"] > 0
+    assert spans["cache_lookup"]["cache"] == "miss"
+    assert {span.name: span.attributes for span in warm.spans}["cache_lookup"]["cache"] == "hit"
+    assert "llm" not in {span.name for span in warm.spans}
+